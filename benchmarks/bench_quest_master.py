@@ -0,0 +1,279 @@
+"""Benchmarks for QuestMaster operations and full-page reruns at scale
+
+QuestMaster is driven directly, with a stub in place of st.session_state, to
+measure per-operation cost with 10 to 100k tasks and achievements already
+loaded. Full reruns of the page go through Streamlit's AppTest harness
+against a SQLite database seeded with the same number of records, and the
+cold import of the page (Streamlit included) is timed in fresh interpreters.
+
+Results are compared with benchmarks/baselines.json. Every metric is seconds
+per operation (lower is better), and one that is slower than its baseline by
+more than the threshold counts as a regression, which makes the script exit
+with status 1. Baselines depend on the machine, so record your own before
+comparing::
+
+    python benchmarks/bench_quest_master.py --update
+    python benchmarks/bench_quest_master.py
+    python benchmarks/bench_quest_master.py --sizes 10 1000 --threshold 0.5
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+APP_PATH = ROOT / 'streamlit_app.py'
+BASELINES_PATH = Path(__file__).resolve().parent / 'baselines.json'
+SIZES = (10, 1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.25
+MAX_OPS = 1000      # operations timed per mutation benchmark
+COLD_RUNS = 3       # cold page loads timed per size
+RERUNS = 7          # warm page reruns timed per size
+MIN_SAMPLES = 200   # repeats for sizes too small to time in a few operations
+
+CATEGORIES = ('boss', 'quest', 'training')
+
+
+def make_tasks(n: int) -> list:
+    from quest_master.models import XP_REWARDS, Task
+    start = datetime(2024, 1, 1)
+    return [Task(id=str(uuid.uuid4()), title=f"Slay the frost titan {i}",
+                 description=f"Trial number {i} of the northern campaign",
+                 category=CATEGORIES[i % 3], xp_reward=XP_REWARDS[CATEGORIES[i % 3]],
+                 created_at=(start + timedelta(minutes=i)).isoformat())
+            for i in range(n)]
+
+
+def make_achievements(n: int) -> list:
+    from quest_master.models import Achievement
+    start = datetime(2024, 1, 1)
+    return [Achievement(id=str(uuid.uuid4()), title=f"Dragon {i} Victor",
+                        description=f"Conquered: Dragon {i}", icon='🐉', xp_earned=500,
+                        completed_at=(start + timedelta(minutes=i)).isoformat())
+            for i in range(n)]
+
+
+class StubSessionState(dict):
+    """Attribute-style dict standing in for st.session_state outside a script run"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+@contextmanager
+def stub_session_state():
+    import streamlit as st
+    original = st.session_state
+    st.session_state = StubSessionState()
+    try:
+        yield st.session_state
+    finally:
+        st.session_state = original
+
+
+@contextmanager
+def quiet_gc():
+    """Keep cyclic garbage collection from landing in the middle of a timing"""
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def per_op(fn: Callable, items: Sequence) -> float:
+    """Seconds per call of ``fn`` over ``items``"""
+    with quiet_gc():
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        elapsed = time.perf_counter() - started
+    return elapsed / max(len(items), 1)
+
+
+def once(fn: Callable[[], object], ops: int = 1) -> float:
+    """Seconds per operation for a single call of ``fn`` that performs ``ops`` operations"""
+    with quiet_gc():
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    return elapsed / max(ops, 1)
+
+
+def bench_operations(n: int, repeat: int) -> Dict[str, float]:
+    """Per-operation cost of QuestMaster mutations and stats with ``n`` records loaded"""
+    from quest_master import page as app
+    from quest_master import persistence
+    from quest_master.aggregates import Aggregates
+    from quest_master.service import DataService
+
+    results: Dict[str, List[float]] = {}
+
+    def record(name: str, seconds: float):
+        results.setdefault(name, []).append(seconds)
+
+    # Three disjoint slices of the loaded tasks for complete, delete and batch complete
+    ops = max(min(n // 3, MAX_OPS), 1)
+    # Tiny stores only give a handful of operations per pass; make up for it in passes
+    repeat = max(repeat, min(MIN_SAMPLES, MAX_OPS // ops))
+    with stub_session_state():
+        for _ in range(repeat):
+            quest_master = app.QuestMaster(DataService(persistence.MemoryBackend()), 'bench')
+            tasks, achievements = make_tasks(n), make_achievements(n)
+            record('insert_tasks', once(lambda: quest_master.insert_tasks(tasks), n))
+            record('insert_achievements', once(lambda: quest_master.insert_achievements(achievements), n))
+
+            ids = [task.id for task in tasks]
+            record('create_task', per_op(
+                lambda i: quest_master.create_task(f"Training drill {i}", "Practice", CATEGORIES[i % 3]),
+                range(ops)))
+            record('complete_task', per_op(quest_master.complete_task, ids[:ops]))
+            record('delete_task', per_op(quest_master.delete_task, ids[ops:2 * ops]))
+            record('complete_tasks_batch', once(lambda: quest_master.complete_tasks(ids[2 * ops:3 * ops]), ops))
+            record('stats_rebuild', once(lambda: Aggregates.from_records(quest_master.tasks)))
+            aggregates, rollups = quest_master.aggregates, quest_master.rollups
+            record('stats_read', per_op(lambda c: (aggregates.count(c), rollups.total_xp),
+                                        CATEGORIES * 10_000))
+            record('level_read', per_op(lambda _: quest_master.level, range(10_000)))
+            record('search', per_op(lambda q: quest_master.search(q, limit=24),
+                                    ('frost titan', 'dragon', 'campaign 12')))
+    return {name: min(samples) for name, samples in results.items()}
+
+
+def seed_database(path: str, sizes) -> None:
+    """Write ``n`` tasks and achievements for player bench_<n>, for each size"""
+    from quest_master import persistence
+    backend = persistence.SQLiteBackend(path)
+    for n in sizes:
+        user = f"bench_{n}"
+        backend.append_many(((persistence.CREATE_TASK, task.to_dict()) for task in make_tasks(n)), user)
+        backend.append_many(((persistence.ADD_ACHIEVEMENT, a.to_dict()) for a in make_achievements(n)), user)
+    backend.compact()
+    backend.close()
+
+
+def bench_page(n: int) -> Dict[str, float]:
+    """Fastest cold first run and warm rerun of the full page for player bench_<n>
+
+    A cold run starts with st.cache_resource cleared, so the player is loaded
+    from the database again; warm reruns find it already in memory.
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    cold, warm = [], []
+    for _ in range(COLD_RUNS):
+        st.cache_resource.clear()
+        at = AppTest.from_file(str(APP_PATH), default_timeout=600)
+        at.query_params['player'] = f"bench_{n}"
+        started = time.perf_counter()
+        at.run()
+        cold.append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"page failed at {n} records: {at.exception}")
+    for _ in range(RERUNS):
+        started = time.perf_counter()
+        at.run()
+        warm.append(time.perf_counter() - started)
+    return {'page_first_run': min(cold), 'page_rerun': min(warm)}
+
+
+def bench_import() -> Dict[str, float]:
+    """Fastest import of the page module in a fresh interpreter, the fixed part of a cold start"""
+    code = ("import time; started = time.perf_counter(); import quest_master.page; "
+            "print(time.perf_counter() - started)")
+    seconds = [float(subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                                    capture_output=True, text=True).stdout)
+               for _ in range(COLD_RUNS)]
+    return {'page_import': min(seconds)}
+
+
+def run(sizes, repeat: int) -> Dict[str, float]:
+    results = dict(bench_import())
+    for n in sizes:
+        for name, seconds in bench_operations(n, repeat if n < 100_000 else 1).items():
+            results[f"{name}@{n}"] = seconds
+        print(f"operations at {n:,} records done", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, 'bench.db')
+        seed_database(db, sizes)
+        os.environ['QUEST_MASTER_DB'] = db
+        for n in sizes:
+            for name, seconds in bench_page(n).items():
+                results[f"{name}@{n}"] = seconds
+            print(f"page at {n:,} records done", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, float], baselines: Dict[str, float], threshold: float) -> List[str]:
+    """Print results next to their baselines; return the names that regressed"""
+    regressions = []
+    print(f"{'metric':34} {'seconds/op':>12} {'ops/s':>12} {'baseline':>12} {'change':>8}")
+    for name, seconds in results.items():
+        base = baselines.get(name)
+        change = ''
+        if base:
+            ratio = seconds / base
+            change = f"{ratio - 1:+.0%}"
+            if ratio > 1 + threshold:
+                regressions.append(name)
+                change += ' !'
+        print(f"{name:34} {seconds:12.3e} {1 / seconds if seconds else 0:12,.0f} "
+              f"{base if base else float('nan'):12.3e} {change:>8}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=5, help="best-of repeats for operation benchmarks")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument('--baselines', type=Path, default=BASELINES_PATH)
+    parser.add_argument('--update', action='store_true', help="record these results as the new baselines")
+    parser.add_argument('--json', type=Path, help="also write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QUEST_MASTER_DB', ':memory:')
+    results = run(args.sizes, args.repeat)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + '\n')
+
+    baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+    regressions = compare(results, baselines.get('results', {}), args.threshold)
+    if args.update:
+        merged = {**baselines.get('results', {}), **results}
+        args.baselines.write_text(json.dumps({
+            'recorded': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'results': dict(sorted(merged.items())),
+        }, indent=2) + '\n')
+        print(f"Baselines written to {args.baselines}", file=sys.stderr)
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
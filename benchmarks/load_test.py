@@ -0,0 +1,408 @@
+"""Load test: many concurrent Streamlit sessions clicking through the quest log
+
+Starts the app with ``streamlit run`` against a temporary SQLite database in
+which every player has ``n`` tasks and achievements, then opens ``--sessions``
+websocket connections to it, each speaking the browser's protocol (the
+websockets client Streamlit already depends on). A session loads the page,
+then makes ``--actions`` clicks drawn from ACTION_WEIGHTS: Complete and
+Delete on a random task card, creating a quest, or a plain rerun. It waits
+for each click's rerun, fragment reruns included, to finish before the next,
+so the server runs main() and QuestMaster exactly as it does for real tabs.
+
+For each dataset size and concurrency level it reports the p50/p95/p99
+latency of a click (from sending it to the last script run it caused), of
+the first page load, throughput in reruns per second across all sessions,
+the server's peak RSS, and RSS per session (growth over a warmed-up server,
+divided by the number of sessions). Each level gets a fresh server and a
+fresh copy of the seeded database.
+
+``--direct`` drives QuestMaster from threads in this process instead, with
+the same mix of actions and no Streamlit, to tell the cost of the data layer
+apart from that of rendering::
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sessions 10 100 200 --sizes 100 1000 --actions 20
+    python benchmarks/load_test.py --players 5 --think 0.5 --json load.json
+    python benchmarks/load_test.py --direct --sessions 100 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlencode
+
+from bench_quest_master import APP_PATH, CATEGORIES, ROOT, make_achievements, make_tasks
+
+SESSIONS = (1, 10, 50)
+SIZES = (100, 1_000)
+ACTIONS = 10                    # clicks per session after the first page load
+ACTION_WEIGHTS = {'complete': 4, 'delete': 2, 'create': 1, 'rerun': 3}
+RERUN_TIMEOUT = 120.0           # seconds a single rerun may take before the session gives up
+STARTUP_TIMEOUT = 60.0
+WINDOW = 24                     # cards a direct session reads per column, as the page shows
+
+
+def seed_database(path: str, n: int, players: Sequence[str]) -> None:
+    """Write ``n`` tasks and achievements for each of ``players``"""
+    from quest_master import persistence
+    backend = persistence.SQLiteBackend(path)
+    for player in players:
+        backend.append_many(((persistence.CREATE_TASK, task.to_dict()) for task in make_tasks(n)), player)
+        backend.append_many(((persistence.ADD_ACHIEVEMENT, a.to_dict()) for a in make_achievements(n)), player)
+    backend.compact()
+    backend.close()
+
+
+def player_names(sessions: int, players: Optional[int]) -> List[str]:
+    """Player each session acts for; sessions share players round-robin when there are fewer"""
+    return [f"load_{i % (players or sessions)}" for i in range(sessions)]
+
+
+def rss_mb(pid: int) -> float:
+    """Resident set size of a process in MiB"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    out = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)], capture_output=True, text=True).stdout
+    return int(out) / 1024 if out.strip() else float('nan')
+
+
+def percentiles(seconds: List[float]) -> Dict[str, float]:
+    """p50, p95 and p99 of a sample"""
+    if len(seconds) < 2:
+        value = seconds[0] if seconds else float('nan')
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(seconds, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def pick_action(rng: random.Random) -> str:
+    return rng.choices(list(ACTION_WEIGHTS), weights=list(ACTION_WEIGHTS.values()))[0]
+
+
+class Session:
+    """One simulated browser tab: the widgets it was last shown and the timings of its reruns"""
+
+    def __init__(self, player: str, seed: int):
+        self.player = player
+        self.query = urlencode({'player': player})
+        self.rng = random.Random(seed)
+        self.widgets: Dict[str, str] = {}      # widget id by user key
+        self.loads: List[float] = []
+        self.clicks: List[float] = []
+        self.errors = 0
+        self.failure: Optional[str] = None
+        self.done = asyncio.Event()
+
+    def _saw(self, element):
+        kind = element.WhichOneof('type')
+        if kind == 'exception':
+            self.errors += 1
+        elif kind in ('button', 'text_input', 'text_area'):
+            widget_id = getattr(element, kind).id
+            # Widget ids with a user key look like $$ID-<hash>-<key>
+            if widget_id.startswith('$$ID-'):
+                self.widgets[widget_id.split('-', 2)[2]] = widget_id
+
+    def _cards(self, action: str) -> List[str]:
+        return [key for key in self.widgets
+                if key.startswith(f"{action}_") and not key.startswith(f"{action}_selected_")]
+
+    async def rerun(self, ws, states=()) -> float:
+        """Send a rerun and wait for the last script run it causes; return its latency"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        message = BackMsg()
+        message.rerun_script.query_string = self.query
+        message.rerun_script.widget_states.widgets.extend(states)
+        started = time.perf_counter()
+        await ws.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await asyncio.wait_for(ws.recv(), RERUN_TIMEOUT))
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                self._saw(forward.delta.new_element)
+            # A click's callback ends the run early and calls st.rerun for the fragments it touched
+            elif kind == 'script_finished' and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    self.errors += 1
+                return time.perf_counter() - started
+
+    async def act(self, ws) -> float:
+        """Make one click drawn from ACTION_WEIGHTS; a rerun if there is nothing to click"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        action = pick_action(self.rng)
+        states = []
+        if action in ('complete', 'delete') and self._cards(action):
+            key = self.rng.choice(self._cards(action))
+            states.append(WidgetState(id=self.widgets[key], trigger_value=True))
+            card = key.split('_', 1)[1]     # <category>_<task id>
+            for stale in (f"complete_{card}", f"delete_{card}"):
+                self.widgets.pop(stale, None)
+        elif action == 'create' and {'quest_title', 'quest_description', 'create_quest'} <= self.widgets.keys():
+            states += [WidgetState(id=self.widgets['quest_title'], string_value="Storm the load-test keep"),
+                       WidgetState(id=self.widgets['quest_description'], string_value="Hold it under siege"),
+                       WidgetState(id=self.widgets['create_quest'], trigger_value=True)]
+        return await self.rerun(ws, states)
+
+    async def play(self, url: str, actions: int, think: float, release: asyncio.Event):
+        """Load the page, click ``actions`` times, then stay connected until released"""
+        import websockets
+        try:
+            async with websockets.connect(url, subprotocols=['streamlit'], max_size=None,
+                                          open_timeout=RERUN_TIMEOUT) as ws:
+                self.loads.append(await self.rerun(ws))
+                for _ in range(actions):
+                    if think:
+                        await asyncio.sleep(self.rng.uniform(0, 2 * think))
+                    self.clicks.append(await self.act(ws))
+                self.done.set()
+                await release.wait()
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as exc:
+            self.failure = f"{type(exc).__name__}: {exc}"
+        finally:
+            self.done.set()
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def streamlit_server(db: str):
+    """A ``streamlit run`` of the app on a free port against ``db``; yields (process, port)"""
+    port = free_port()
+    env = dict(os.environ, QUEST_MASTER_DB=db)
+    with tempfile.TemporaryFile() as log:
+        server = subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', str(APP_PATH),
+                                   '--server.headless=true', f'--server.port={port}',
+                                   '--server.address=127.0.0.1', '--server.fileWatcherType=none',
+                                   '--browser.gatherUsageStats=false'],
+                                  cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            deadline = time.monotonic() + STARTUP_TIMEOUT
+            while True:
+                try:
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1):
+                        break
+                except OSError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        log.seek(0)
+                        raise RuntimeError(f"streamlit did not start:\n{log.read().decode(errors='replace')}")
+                    time.sleep(0.2)
+            yield server, port
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+
+async def drive_page(port: int, pid: int, players: List[str], actions: int, think: float) -> dict:
+    """Run one session per entry of ``players`` at once against the server; return their figures"""
+    url = f'ws://127.0.0.1:{port}/_stcore/stream'
+    # Warm the server up (page import, caches) on a player of its own before measuring
+    warmup = Session('load_warmup', seed=-1)
+    release = asyncio.Event()
+    release.set()
+    await warmup.play(url, 0, 0.0, release)
+    if warmup.failure:
+        raise RuntimeError(f"warm-up session failed: {warmup.failure}")
+    baseline = peak = rss_mb(pid)
+
+    sessions = [Session(player, seed) for seed, player in enumerate(players)]
+    release = asyncio.Event()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(session.play(url, actions, think, release)) for session in sessions]
+    waiting = asyncio.ensure_future(asyncio.gather(*(session.done.wait() for session in sessions)))
+    while not waiting.done():
+        peak = max(peak, rss_mb(pid))
+        await asyncio.wait([waiting], timeout=0.25)
+    elapsed = time.perf_counter() - started
+    held = rss_mb(pid)      # every session still connected
+    release.set()
+    await asyncio.gather(*tasks)
+    return figures(sessions, elapsed, baseline, max(peak, held), held)
+
+
+def figures(sessions: list, elapsed: float, baseline: float, peak: float, held: float) -> dict:
+    loads = [seconds for session in sessions for seconds in session.loads]
+    clicks = [seconds for session in sessions for seconds in session.clicks]
+    failures = [session.failure for session in sessions if session.failure]
+    return {
+        'reruns': len(loads) + len(clicks),
+        'errors': sum(session.errors for session in sessions) + len(failures),
+        'failures': failures[:5],
+        'load': percentiles(loads),
+        'click': percentiles(clicks),
+        'reruns_per_second': (len(loads) + len(clicks)) / elapsed if elapsed else 0.0,
+        'elapsed': elapsed,
+        'rss_baseline_mb': baseline,
+        'rss_peak_mb': peak,
+        'rss_per_session_mb': (held - baseline) / len(sessions),
+    }
+
+
+class DirectSession:
+    """A session driving QuestMaster in this process the way the page does on each rerun"""
+
+    def __init__(self, service, player: str, seed: int):
+        self.service = service
+        self.player = player
+        self.rng = random.Random(seed)
+        self.quest_master = None
+        self.loads: List[float] = []
+        self.clicks: List[float] = []
+        self.errors = 0
+        self.failure: Optional[str] = None
+
+    def render(self):
+        """What a rerun reads: the task columns, the hall, stats and the level"""
+        quest_master = self.quest_master
+        for category in CATEGORIES:
+            quest_master.task_window(category, WINDOW)
+        quest_master.achievement_window(WINDOW)
+        quest_master.aggregates.count(CATEGORIES[0])
+        quest_master.level
+
+    def load(self) -> float:
+        from quest_master.quests import QuestMaster
+        started = time.perf_counter()
+        # The constructor attaches to the player and materializes due tasks,
+        # as the page's first run does
+        self.quest_master = QuestMaster(self.service, self.player)
+        self.render()
+        return time.perf_counter() - started
+
+    def act(self) -> float:
+        action = pick_action(self.rng)
+        quest_master = self.quest_master
+        started = time.perf_counter()
+        if action in ('complete', 'delete'):
+            cards = quest_master.task_window(self.rng.choice(CATEGORIES), WINDOW)
+            if cards:
+                task = self.rng.choice(cards)
+                if action == 'complete':
+                    quest_master.complete_task(task.id)
+                else:
+                    quest_master.delete_task(task.id)
+        elif action == 'create':
+            quest_master.create_task("Storm the load-test keep", "Hold it under siege",
+                                     self.rng.choice(CATEGORIES))
+        self.render()
+        return time.perf_counter() - started
+
+    def play(self, actions: int, think: float, start: threading.Barrier):
+        try:
+            start.wait()
+            self.loads.append(self.load())
+            for _ in range(actions):
+                if think:
+                    time.sleep(self.rng.uniform(0, 2 * think))
+                self.clicks.append(self.act())
+        except Exception as exc:
+            self.failure = f"{type(exc).__name__}: {exc}"
+
+
+def drive_direct(db: str, players: List[str], actions: int, think: float) -> dict:
+    """Run one QuestMaster session per entry of ``players`` at once in threads; return their figures"""
+    from quest_master import persistence
+    from quest_master.service import DataService, columnar_achievements, lazy_achievements
+    service = DataService(persistence.open_backend(db), columnar_achievements=columnar_achievements(),
+                          lazy_achievements=lazy_achievements())
+    pid = os.getpid()
+    baseline = peak = rss_mb(pid)
+    sessions = [DirectSession(service, player, seed) for seed, player in enumerate(players)]
+    start = threading.Barrier(len(sessions) + 1)
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        running = [pool.submit(session.play, actions, think, start) for session in sessions]
+        start.wait()
+        started = time.perf_counter()
+        while wait(running, timeout=0.25).not_done:
+            peak = max(peak, rss_mb(pid))
+        elapsed = time.perf_counter() - started
+    held = rss_mb(pid)      # players are still resident in the service
+    result = figures(sessions, elapsed, baseline, max(peak, held), held)
+    persistence.open_backend(db).close()
+    return result
+
+
+def run(sizes, levels, players: Optional[int], actions: int, think: float, direct: bool) -> List[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            seeded = os.path.join(tmp, f'seed_{n}.db')
+            seed_database(seeded, n, sorted(set(player_names(max(levels), players))))
+            for sessions in levels:
+                db = os.path.join(tmp, f'run_{n}_{sessions}.db')
+                shutil.copyfile(seeded, db)
+                names = player_names(sessions, players)
+                if direct:
+                    result = drive_direct(db, names, actions, think)
+                else:
+                    with streamlit_server(db) as (server, port):
+                        result = asyncio.run(drive_page(port, server.pid, names, actions, think))
+                results.append({'records': n, 'sessions': sessions, 'players': len(set(names)), **result})
+                print(f"{sessions} sessions at {n:,} records done", file=sys.stderr)
+    return results
+
+
+def report(results: List[dict]):
+    """Print one row per run, latencies in milliseconds"""
+    print(f"{'records':>8} {'sessions':>8} {'reruns':>7} {'errors':>6} {'load p95':>9} {'click p50':>9} "
+          f"{'p95':>9} {'p99':>9} {'reruns/s':>9} {'RSS MiB':>8} {'MiB/sess':>8}")
+    for r in results:
+        load, click = r['load'], r['click']
+        print(f"{r['records']:8,} {r['sessions']:8} {r['reruns']:7} {r['errors']:6} {load['p95'] * 1e3:9.1f} "
+              f"{click['p50'] * 1e3:9.1f} {click['p95'] * 1e3:9.1f} {click['p99'] * 1e3:9.1f} "
+              f"{r['reruns_per_second']:9.1f} {r['rss_peak_mb']:8.0f} {r['rss_per_session_mb']:8.2f}")
+        for failure in r['failures']:
+            print(f"    {failure}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=list(SESSIONS),
+                        help="concurrency levels, one run each")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES),
+                        help="tasks and achievements per player")
+    parser.add_argument('--players', type=int, help="distinct players the sessions share (default: one each)")
+    parser.add_argument('--actions', type=int, default=ACTIONS, help="clicks per session after loading")
+    parser.add_argument('--think', type=float, default=0.0,
+                        help="mean seconds a session waits between clicks (0 clicks flat out)")
+    parser.add_argument('--direct', action='store_true', help="drive QuestMaster in threads instead of the page")
+    parser.add_argument('--json', type=Path, help="also write the raw results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, sorted(args.sessions), args.players, args.actions, args.think, args.direct)
+    report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + '\n')
+    return 1 if any(result['errors'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""Core building blocks for the Quest Master Streamlit app"""
+
+from quest_master.store import RecordStore
+
+__all__ = ["RecordStore"]
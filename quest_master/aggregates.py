@@ -0,0 +1,35 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable
+
+
+@dataclass
+class Aggregates:
+    """Running counts of open tasks behind the stats panel
+
+    QuestMaster updates these as tasks come and go, so the stats panel reads
+    them in O(1) instead of rescanning every record. XP is earned over time
+    rather than held by records, so it lives in the history rollups instead
+    (quest_master/history.py).
+    """
+    category_counts: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_records(cls, tasks: Iterable[Any]) -> 'Aggregates':
+        """Compute aggregates from scratch"""
+        aggregates = cls()
+        for task in tasks:
+            aggregates.task_added(task)
+        return aggregates
+
+    def count(self, category: str) -> int:
+        return self.category_counts.get(category, 0)
+
+    def task_added(self, task: Any):
+        self.category_counts[task.category] = self.count(task.category) + 1
+
+    def task_removed(self, task: Any):
+        remaining = self.count(task.category) - 1
+        if remaining > 0:
+            self.category_counts[task.category] = remaining
+        else:
+            self.category_counts.pop(task.category, None)
@@ -0,0 +1,277 @@
+"""REST API over the quest log, a Python counterpart of server/routes.ts
+
+Serves the same routes and JSON shapes as the Express server, backed by the
+same DataService and storage as the Streamlit page, plus batch endpoints::
+
+    GET    /api/tasks                    every task, newest first
+    POST   /api/tasks                    create one task (201)
+    POST   /api/tasks/batch              create a list of tasks (201)
+    POST   /api/tasks/:id/complete       complete a task
+    POST   /api/tasks/complete           complete {"ids": [...]}
+    DELETE /api/tasks/:id                delete a task
+    POST   /api/tasks/delete             delete {"ids": [...]}
+    GET    /api/achievements             every achievement, newest first
+    DELETE /api/achievements/:id         delete an achievement
+
+The player is picked with ``?player=`` or an ``X-Quest-Player`` header, as on
+the page. List responses carry a weak ETag built from the player's data
+version and are served from a per-version cache; a matching If-None-Match
+gets 304 without touching the records. Mutations answer with the new ETag,
+and one sent with ``If-Match`` is a compare-and-swap that gets 412 if the
+data changed in between. Creates and completions honour an
+``Idempotency-Key`` header, so a retried request returns the first one's
+result instead of acting twice. Responses are gzipped when the client
+accepts it. Run it with::
+
+    python -m quest_master.api --port 8000
+    uvicorn quest_master.api:app
+"""
+import argparse
+import json
+import sys
+import uuid
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from quest_master import persistence
+from quest_master.models import XP_REWARDS
+from quest_master.quests import QuestMaster, VersionConflict
+from quest_master.service import DataService, columnar_achievements, lazy_achievements
+
+PLAYER_HEADER = 'x-quest-player'
+IDEMPOTENCY_HEADER = 'idempotency-key'
+MAX_BATCH = 1000
+GZIP_MINIMUM_SIZE = 1000
+
+# Distinguishes this process's ETags from those of an earlier run
+_BOOT = uuid.uuid4().hex[:8]
+
+# Encoded list bodies per player data object and kind: (version, etag, body)
+_bodies: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+
+def to_json(record) -> Dict[str, Any]:
+    """A task or achievement with camelCase keys, as the Express API sends it"""
+    return {_camel(name): value for name, value in record.to_dict().items()}
+
+
+def _encode(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def get_data_service() -> DataService:
+    """Process-wide data service shared by every request"""
+    return DataService(persistence.open_backend(), columnar_achievements=columnar_achievements(),
+                       lazy_achievements=lazy_achievements())
+
+
+def player(request: Request) -> str:
+    """Player a request acts for, from ``?player=`` or the X-Quest-Player header"""
+    name = request.query_params.get('player') or request.headers.get(PLAYER_HEADER, '')
+    return name.strip()[:64] or persistence.DEFAULT_USER
+
+
+def quest_master(request: Request) -> QuestMaster:
+    return QuestMaster(get_data_service(), player(request))
+
+
+def _etag(version: int) -> str:
+    return f'W/"{_BOOT}.{version}"'
+
+
+def _expected_version(if_match: str) -> Optional[int]:
+    """Data version an If-Match header requires (0, which no data has, for a foreign ETag)"""
+    tag = if_match.strip().removeprefix('W/')
+    if not tag or tag == '*':
+        return None
+    boot, _, version = tag.strip('"').partition('.')
+    return int(version) if boot == _BOOT and version.isdigit() else 0
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in (tag.removeprefix('W/') for tag in tags)
+
+
+def _listing(request: Request, kind: str, sort_key: str) -> Response:
+    qm = quest_master(request)
+    with qm.data.lock:
+        version = qm.data.version
+        bodies = _bodies.setdefault(qm.data, {})
+        cached = bodies.get(kind)
+        if cached is None or cached[0] != version:
+            records = sorted(qm.snapshot(kind), key=lambda record: getattr(record, sort_key), reverse=True)
+            cached = bodies[kind] = (version, _etag(version), _encode([to_json(record) for record in records]))
+    _, etag, body = cached
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if _matches(request.headers.get('if-none-match', ''), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def _json_body(request: Request) -> Any:
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _task_spec(data: Any) -> Tuple[Optional[Tuple[str, str, str]], List[str]]:
+    """(title, description, category) from a task payload, or the reasons it is invalid"""
+    if not isinstance(data, dict):
+        return None, ["body must be a JSON object"]
+    errors = [f"{name} must be a non-empty string" for name in ('title', 'description')
+              if not isinstance(data.get(name), str) or not data[name].strip()]
+    if data.get('category') not in XP_REWARDS:
+        errors.append(f"category must be one of {', '.join(XP_REWARDS)}, got {data.get('category')!r}")
+    if errors:
+        return None, errors
+    return (data['title'].strip(), data['description'].strip(), data['category']), []
+
+
+def _ids(data: Any) -> Optional[List[str]]:
+    ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids) or len(ids) > MAX_BATCH:
+        return None
+    return ids
+
+
+def get_tasks(request: Request) -> Response:
+    return _listing(request, 'tasks', 'created_at')
+
+
+def get_achievements(request: Request) -> Response:
+    return _listing(request, 'achievements', 'completed_at')
+
+
+def _mutate(request: Request, action: Callable[[QuestMaster, Dict[str, Any]], Response]) -> Response:
+    """Run ``action`` with the request's preconditions, answering 412 if If-Match no longer holds"""
+    qm = quest_master(request)
+    options = {'expected_version': _expected_version(request.headers.get('if-match', ''))}
+    try:
+        response = action(qm, options)
+    except VersionConflict:
+        response = JSONResponse({'message': "Data changed since it was read"}, status_code=412)
+    response.headers['ETag'] = _etag(qm.data.version)
+    return response
+
+
+def _keyed(request: Request, options: Dict[str, Any]) -> Dict[str, Any]:
+    return {**options, 'idempotency_key': request.headers.get(IDEMPOTENCY_HEADER) or None}
+
+
+async def create_task(request: Request) -> Response:
+    spec, errors = _task_spec(await _json_body(request))
+    if spec is None:
+        return JSONResponse({'message': "Invalid task data", 'errors': errors}, status_code=400)
+    return await run_in_threadpool(_mutate, request, lambda qm, options: JSONResponse(
+        to_json(qm.create_task(*spec, **_keyed(request, options))), status_code=201))
+
+
+async def create_tasks(request: Request) -> Response:
+    data = await _json_body(request)
+    if not isinstance(data, list) or len(data) > MAX_BATCH:
+        return JSONResponse({'message': f"Expected a list of at most {MAX_BATCH} tasks"}, status_code=400)
+    specs, errors = [], []
+    for position, item in enumerate(data):
+        spec, problems = _task_spec(item)
+        specs.append(spec)
+        errors += [f"[{position}] {problem}" for problem in problems]
+    if errors:
+        return JSONResponse({'message': "Invalid task data", 'errors': errors}, status_code=400)
+    return await run_in_threadpool(_mutate, request, lambda qm, options: JSONResponse(
+        [to_json(task) for task in qm.create_tasks(specs, **_keyed(request, options))], status_code=201))
+
+
+def complete_task(request: Request) -> Response:
+    def complete(qm: QuestMaster, options: Dict[str, Any]) -> Response:
+        if not qm.complete_task(request.path_params['id'], **_keyed(request, options)):
+            return JSONResponse({'message': "Task not found"}, status_code=404)
+        return JSONResponse({'message': "Task completed successfully"})
+    return _mutate(request, complete)
+
+
+async def complete_tasks(request: Request) -> Response:
+    ids = _ids(await _json_body(request))
+    if ids is None:
+        return JSONResponse({'message': f"Expected {{\"ids\": [...]}} with at most {MAX_BATCH} ids"},
+                            status_code=400)
+
+    def complete(qm: QuestMaster, options: Dict[str, Any]) -> Response:
+        completed, achievements = qm.complete_tasks(ids, **_keyed(request, options))
+        return JSONResponse({'completed': [task.id for task in completed],
+                             'achievements': [to_json(achievement) for achievement in achievements]})
+    return await run_in_threadpool(_mutate, request, complete)
+
+
+def delete_task(request: Request) -> Response:
+    def delete(qm: QuestMaster, options: Dict[str, Any]) -> Response:
+        if not qm.delete_tasks([request.path_params['id']], **options):
+            return JSONResponse({'message': "Task not found"}, status_code=404)
+        return JSONResponse({'message': "Task deleted successfully"})
+    return _mutate(request, delete)
+
+
+async def delete_tasks(request: Request) -> Response:
+    ids = _ids(await _json_body(request))
+    if ids is None:
+        return JSONResponse({'message': f"Expected {{\"ids\": [...]}} with at most {MAX_BATCH} ids"},
+                            status_code=400)
+    return await run_in_threadpool(_mutate, request, lambda qm, options: JSONResponse(
+        {'deleted': [task.id for task in qm.delete_tasks(ids, **options)]}))
+
+
+def delete_achievement(request: Request) -> Response:
+    def delete(qm: QuestMaster, options: Dict[str, Any]) -> Response:
+        if not qm.delete_achievement(request.path_params['id'], **options):
+            return JSONResponse({'message': "Achievement not found"}, status_code=404)
+        return JSONResponse({'message': "Achievement deleted successfully"})
+    return _mutate(request, delete)
+
+
+# QuestMaster blocks on the player lock and, in sync durability mode, on the
+# commit, so plain handlers are left to Starlette's thread pool and the async
+# ones (which read a body first) hand their work to it
+routes = [
+    Route('/api/tasks', get_tasks, methods=['GET']),
+    Route('/api/tasks', create_task, methods=['POST']),
+    Route('/api/tasks/batch', create_tasks, methods=['POST']),
+    Route('/api/tasks/complete', complete_tasks, methods=['POST']),
+    Route('/api/tasks/delete', delete_tasks, methods=['POST']),
+    Route('/api/tasks/{id}/complete', complete_task, methods=['POST']),
+    Route('/api/tasks/{id}', delete_task, methods=['DELETE']),
+    Route('/api/achievements', get_achievements, methods=['GET']),
+    Route('/api/achievements/{id}', delete_achievement, methods=['DELETE']),
+]
+
+app = Starlette(routes=routes, middleware=[Middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)])
+
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Streaming bulk import/export of tasks and achievements as JSONL or CSV
+
+Rows are read, validated and handed on in fixed-size batches, and records are
+written one line at a time, so neither direction ever holds a whole file in
+memory.
+
+Command line use works directly against the configured storage backend::
+
+    python -m quest_master.bulk export tasks tasks.jsonl
+    python -m quest_master.bulk import achievements legacy.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Type
+
+from quest_master import persistence
+from quest_master.icons import icon_classifier
+from quest_master.models import XP_REWARDS, Achievement, Task
+
+FORMATS = ('jsonl', 'csv')
+RECORD_TYPES = {'tasks': Task, 'achievements': Achievement}
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a bulk import"""
+    imported: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        total = self.imported + self.rejected
+        return total / self.seconds if self.seconds else 0.0
+
+
+def format_for(filename: str) -> str:
+    """Pick the format from a file name's extension"""
+    fmt = filename.rsplit('.', 1)[-1].lower()
+    if fmt == 'json':
+        fmt = 'jsonl'
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported file type {filename!r}; use .jsonl or .csv")
+    return fmt
+
+
+def iter_rows(fp: IO[str], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw rows from a text stream one at a time
+
+    A JSONL line that fails to parse is yielded as its ValueError so the
+    importer can reject it and carry on with the next line.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(fp)
+        return
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+def parse_record(row: Dict[str, Any], record_type: Type) -> Any:
+    """Validate one raw row and build a Task or Achievement from it
+
+    Missing ids are generated and missing timestamps default to now. A Task's
+    XP defaults to its category's reward and an Achievement's icon is picked
+    from its title. Anything else missing or malformed raises ValueError.
+    """
+    if isinstance(row, ValueError):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    if record_type is Task and row.get('category') not in XP_REWARDS:
+        raise ValueError(f"unknown category {row.get('category')!r}")
+    values = {}
+    for name, kind in record_type.FIELDS:
+        value = row.get(name)
+        if value in (None, ''):
+            if name == 'id':
+                value = str(uuid.uuid4())
+            elif name in ('created_at', 'completed_at'):
+                value = datetime.now().isoformat()
+            elif name == 'xp_reward' and row.get('category') in XP_REWARDS:
+                value = XP_REWARDS[row['category']]
+            elif name == 'icon' and row.get('title'):
+                value = icon_classifier().classify(str(row['title']))
+            else:
+                raise ValueError(f"missing {name}")
+        if kind is int:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be an integer, got {value!r}")
+            if value < 0:
+                raise ValueError(f"{name} must not be negative")
+        else:
+            value = str(value)
+        values[name] = value
+    for stamp in ('created_at', 'completed_at'):
+        if stamp in values:
+            try:
+                datetime.fromisoformat(values[stamp])
+            except ValueError:
+                raise ValueError(f"{stamp} is not an ISO timestamp: {values[stamp]!r}")
+    return record_type(**values)
+
+
+def import_rows(rows: Iterable[Dict[str, Any]], record_type: Type,
+                insert_batch: Callable[[List[Any]], Optional[List[Any]]],
+                batch_size: int = DEFAULT_BATCH_SIZE) -> ImportReport:
+    """Validate rows and pass valid records to ``insert_batch`` in batches
+
+    ``insert_batch`` may return the records it actually added; the rest of
+    the batch had ids that were already stored and are counted as rejected.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    batch, lines = [], []
+
+    def reject(line: int, error: str):
+        report.rejected += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(f"row {line}: {error}")
+
+    def insert():
+        added = insert_batch(batch)
+        if added is None or len(added) == len(batch):
+            report.imported += len(batch)
+            return
+        report.imported += len(added)
+        kept = {id(record) for record in added}
+        for line, record in zip(lines, batch):
+            if id(record) not in kept:
+                reject(line, f"id {record.id} already exists")
+
+    for line, row in enumerate(rows, 1):
+        try:
+            batch.append(parse_record(row, record_type))
+        except ValueError as e:
+            reject(line, str(e))
+            continue
+        lines.append(line)
+        if len(batch) >= batch_size:
+            insert()
+            batch, lines = [], []
+    if batch:
+        insert()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def write_records(records: Iterable[Any], record_type: Type, fp: IO[str], fmt: str) -> int:
+    """Write records (Task/Achievement objects or dicts) to a text stream; return the count"""
+    names = [name for name, _ in record_type.FIELDS]
+    writer = csv.DictWriter(fp, fieldnames=names, extrasaction='ignore') if fmt == 'csv' else None
+    if writer is not None:
+        writer.writeheader()
+    count = 0
+    for record in records:
+        data = record if isinstance(record, dict) else record.to_dict()
+        if writer is not None:
+            writer.writerow(data)
+        else:
+            fp.write(json.dumps(data, ensure_ascii=False))
+            fp.write('\n')
+        count += 1
+    return count
+
+
+def export_bytes(records: Iterable[Any], record_type: Type, fmt: str) -> bytes:
+    """Serialize records for a download button"""
+    buffer = io.StringIO()
+    write_records(records, record_type, buffer, fmt)
+    return buffer.getvalue().encode('utf-8')
+
+
+def backend_inserter(backend: persistence.StorageBackend, record_type: Type,
+                     user_id: str = persistence.DEFAULT_USER) -> Callable[[List[Any]], List[Any]]:
+    """Batch inserter that writes imported records straight to a player's storage
+
+    The ids already stored are read once up front, and records reusing one
+    (or one earlier in the import) are skipped, as QuestMaster's inserts do.
+    """
+    kind = 'tasks' if record_type is Task else 'achievements'
+    op = persistence.CREATE_TASK if record_type is Task else persistence.ADD_ACHIEVEMENT
+    known = {record['id'] for record in backend.iter_records(kind, user_id)}
+
+    def insert_batch(batch: List[Any]) -> List[Any]:
+        added = []
+        for record in batch:
+            if record.id not in known:
+                known.add(record.id)
+                added.append(record)
+        backend.append_many(((op, record.to_dict()) for record in added), user_id)
+        return added
+    return insert_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('kind', choices=sorted(RECORD_TYPES))
+    parser.add_argument('path', help="file to read or write ('-' for stdin/stdout)")
+    parser.add_argument('--format', choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument('--db', help="database path (defaults to QUEST_MASTER_DB)")
+    parser.add_argument('--player', default=persistence.DEFAULT_USER, help="player whose records to use")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or format_for(args.path)
+    record_type = RECORD_TYPES[args.kind]
+    backend = persistence.open_backend(args.db)
+
+    if args.action == 'export':
+        fp = sys.stdout if args.path == '-' else open(args.path, 'w', newline='', encoding='utf-8')
+        try:
+            count = write_records(backend.iter_records(args.kind, args.player), record_type, fp, fmt)
+        finally:
+            if fp is not sys.stdout:
+                fp.close()
+        print(f"Exported {count:,} {args.kind}", file=sys.stderr)
+        return 0
+
+    fp = sys.stdin if args.path == '-' else open(args.path, newline='', encoding='utf-8')
+    try:
+        report = import_rows(iter_rows(fp, fmt), record_type,
+                             backend_inserter(backend, record_type, args.player), args.batch_size)
+    finally:
+        if fp is not sys.stdin:
+            fp.close()
+    backend.compact()
+    print(f"Imported {report.imported:,} {args.kind}, rejected {report.rejected:,} "
+          f"in {report.seconds:.2f}s ({report.rows_per_second:,.0f} rows/s)", file=sys.stderr)
+    for error in report.errors:
+        print(f"  {error}", file=sys.stderr)
+    return 0 if not report.rejected else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from quest_master.models import Achievement, pack_id
+
+_ID_SIZE = 16
+_NO_ID = bytes(_ID_SIZE)
+
+
+class AchievementTable:
+    """Column-oriented, append-mostly achievement store
+
+    A drop-in replacement for the achievements RecordStore for players with
+    very long histories. Instead of one Python object per achievement, rows
+    live in parallel columns: packed UUIDs in one bytearray, XP and timestamps
+    in typed arrays, and icons interned. Achievement objects are only built for
+    the rows being rendered.
+
+    Removal leaves a tombstone that is swept once dead rows outnumber live
+    ones. The id -> row index is only built the first time a lookup or removal
+    needs it, so loading and rendering a large history never pays for it.
+    """
+
+    def __init__(self, records=()):
+        self.clear()
+        for record in records:
+            self.add(record)
+
+    def clear(self):
+        """Drop every record"""
+        self._ids = bytearray()
+        self._odd_ids: Dict[int, str] = {}       # rows whose id is not a UUID
+        self._titles: List[str] = []
+        self._descriptions: List[str] = []
+        self._icons: List[str] = []
+        self._xp = array('q')
+        self._completed = array('q')
+        self._odd_times: Dict[int, str] = {}     # rows whose timestamp didn't pack
+        self._alive = bytearray()
+        self._live = 0
+        self._interned: Dict[str, str] = {}
+        self._index: Optional[Dict[Union[bytes, str], int]] = None
+
+    def add(self, record: Achievement) -> Achievement:
+        """Insert or replace a record"""
+        key = record.key
+        # Ids are unique in practice, so duplicates are only looked for once
+        # the index exists; bulk loading stays a plain append
+        if self._index is not None and key in self._index:
+            self.remove(record.id)
+        row = len(self._alive)
+        if isinstance(key, bytes):
+            self._ids += key
+        else:
+            self._ids += _NO_ID
+            self._odd_ids[row] = key
+        self._titles.append(record.title)
+        self._descriptions.append(record.description)
+        self._icons.append(self._interned.setdefault(record.icon, record.icon))
+        self._xp.append(record.xp_earned)
+        completed = record._completed_at
+        if isinstance(completed, int):
+            self._completed.append(completed)
+        else:
+            self._completed.append(0)
+            self._odd_times[row] = completed
+        self._alive.append(1)
+        self._live += 1
+        if self._index is not None:
+            self._index[key] = row
+        return record
+
+    def get(self, record_id: str, default: Any = None) -> Any:
+        """Look up a record by id"""
+        row = self._row(pack_id(record_id))
+        return default if row is None else self._build(row)
+
+    def remove(self, record_id: str) -> Any:
+        """Remove a record by id, returning it (or None if it was not stored)"""
+        key = pack_id(record_id)
+        row = self._row(key)
+        if row is None:
+            return None
+        record = self._build(row)
+        self._alive[row] = 0
+        self._live -= 1
+        del self._index[key]
+        # Drop the row's strings now; the fixed-size columns wait for the sweep
+        self._titles[row] = self._descriptions[row] = None
+        if self._dead() > max(self._live, 1024):
+            self._sweep()
+        return record
+
+    def window(self, start: int, stop: int, bucket: Optional[str] = None) -> List[Achievement]:
+        """Records ``start:stop``, newest first, without touching the rest"""
+        records = []
+        seen = 0
+        alive = self._alive
+        for row in range(len(alive) - 1, -1, -1):
+            if not alive[row]:
+                continue
+            if seen >= stop:
+                break
+            if seen >= start:
+                records.append(self._build(row))
+            seen += 1
+        return records
+
+    def _dead(self) -> int:
+        return len(self._alive) - self._live
+
+    def _row(self, key: Union[bytes, str]) -> Optional[int]:
+        if self._index is None:
+            index = {}
+            for row, alive in enumerate(self._alive):
+                if alive:
+                    index[self._key(row)] = row
+            self._index = index
+        return self._index.get(key)
+
+    def _key(self, row: int) -> Union[bytes, str]:
+        odd = self._odd_ids.get(row)
+        if odd is not None:
+            return odd
+        offset = row * _ID_SIZE
+        return bytes(self._ids[offset:offset + _ID_SIZE])
+
+    def _build(self, row: int) -> Achievement:
+        completed = self._odd_times.get(row)
+        return Achievement.from_packed(
+            self._key(row), self._titles[row], self._descriptions[row], self._icons[row],
+            self._xp[row], self._completed[row] if completed is None else completed)
+
+    def _sweep(self):
+        """Rewrite the columns without tombstoned rows"""
+        live = [self._build(row) for row, alive in enumerate(self._alive) if alive]
+        had_index = self._index is not None
+        self.clear()
+        if had_index:
+            self._index = {}
+        for record in live:
+            self.add(record)
+
+    def __contains__(self, record_id: object) -> bool:
+        return self._row(pack_id(record_id)) is not None
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self) -> Iterator[Achievement]:
+        for row, alive in enumerate(self._alive):
+            if alive:
+                yield self._build(row)
+
+    def __bool__(self) -> bool:
+        return self._live > 0
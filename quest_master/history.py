@@ -0,0 +1,115 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from quest_master.persistence import HistoryEntry
+
+
+@dataclass
+class DayTotals:
+    """One day's activity in one category"""
+    created: int = 0
+    completed: int = 0
+    deleted: int = 0
+    xp: int = 0
+
+
+class Rollups:
+    """Daily XP and activity totals per category, folded from the history log
+
+    A player's rollups are loaded from the backend's pre-aggregated rows and
+    then kept current by applying each new event, so the dashboard charts and
+    streaks are computed from a handful of numbers per active day no matter
+    how many events lie behind them.
+    """
+
+    def __init__(self):
+        self.days: Dict[str, Dict[str, DayTotals]] = {}
+        self.total_xp = 0
+        self.completions: Dict[str, int] = {}
+        self._xp_days: List[str] = []          # sorted days with XP earned
+        self._active_days: List[str] = []      # sorted days with a completion
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, int, int, int, int]]) -> 'Rollups':
+        """Rollups from stored (day, category, created, completed, deleted, xp) rows"""
+        rollups = cls()
+        for day, category, created, completed, deleted, xp in rows:
+            rollups._add(day, category, created, completed, deleted, xp)
+        return rollups
+
+    def apply(self, entry: HistoryEntry):
+        """Fold one new history event in"""
+        self._add(entry.day, entry.category, entry.created, entry.completed, entry.deleted, entry.xp)
+
+    def _add(self, day: str, category: str, created: int, completed: int, deleted: int, xp: int):
+        by_category = self.days.setdefault(day, {})
+        totals = by_category.get(category)
+        if totals is None:
+            totals = by_category[category] = DayTotals()
+        totals.created += created
+        totals.deleted += deleted
+        if xp:
+            if not self._has(self._xp_days, day):
+                insort(self._xp_days, day)
+            totals.xp += xp
+            self.total_xp += xp
+        if completed:
+            if not self._has(self._active_days, day):
+                insort(self._active_days, day)
+            totals.completed += completed
+            self.completions[category] = self.completions.get(category, 0) + completed
+
+    @staticmethod
+    def _has(days: List[str], day: str) -> bool:
+        i = bisect_left(days, day)
+        return i < len(days) and days[i] == day
+
+    def xp_by_day(self, since: str = '') -> Dict[str, int]:
+        """XP earned on each day from ``since`` on, oldest first"""
+        days = self._xp_days[bisect_left(self._xp_days, since):]
+        return {day: sum(totals.xp for totals in self.days[day].values()) for day in days}
+
+    def xp_by_week(self, since: str = '') -> Dict[str, int]:
+        """XP earned in each week from ``since`` on, keyed by the week's Monday"""
+        weeks: Dict[str, int] = {}
+        for day, xp in self.xp_by_day(since).items():
+            start = date.fromisoformat(day)
+            monday = (start - timedelta(days=start.weekday())).isoformat()
+            weeks[monday] = weeks.get(monday, 0) + xp
+        return weeks
+
+    def current_streak(self, today: date) -> int:
+        """Consecutive days with a completion up to today (or yesterday, if today has none yet)
+
+        Walks back from the latest active day, so it costs the length of the
+        streak rather than the whole history.
+        """
+        days = self._active_days
+        if not days or (today - date.fromisoformat(days[-1])).days > 1:
+            return 0
+        run, previous = 1, date.fromisoformat(days[-1])
+        for day in reversed(days[:-1]):
+            current = date.fromisoformat(day)
+            if previous - current != timedelta(days=1):
+                break
+            run, previous = run + 1, current
+        return run
+
+    def streaks(self, today: date) -> Tuple[int, int]:
+        """(current, longest) runs of consecutive days with a completion
+
+        The current streak still counts if today's quest has not been done
+        yet, as long as yesterday's was.
+        """
+        longest = run = 0
+        previous = None
+        for day in self._active_days:
+            current = date.fromisoformat(day)
+            run = run + 1 if previous is not None and current - previous == timedelta(days=1) else 1
+            longest = max(longest, run)
+            previous = current
+        if previous is None or (today - previous).days > 1:
+            return 0, longest
+        return run, longest
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+# Keyword -> icon rules shared with the Express server (server/icons.ts)
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / 'shared' / 'icon-rules.json'
+
+
+class IconRule(NamedTuple):
+    keyword: str
+    icon: str
+    priority: int
+    order: int    # position in the rules file; breaks priority ties
+
+
+class IconClassifier:
+    """Picks an achievement icon for boss fight titles from keyword rules
+
+    Keywords match case-insensitively anywhere in a title, and multi-word
+    keywords allow any run of whitespace between their words. All keywords are
+    compiled into one regular expression shaped like a trie, so each position
+    of a title only follows the branch for its next character, however many
+    rules there are. The expression sits in a lookahead to report the longest
+    keyword starting at every position; every shorter keyword matching there
+    is a prefix of it, so each keyword carries the best rule among its
+    prefixes. A title gets the icon of its highest-priority match (ties go to
+    the rule listed first), or ``default``.
+    """
+
+    def __init__(self, rules: Iterable[IconRule], default: str):
+        self.default = default
+        self._rules: Dict[str, IconRule] = {}
+        for rule in rules:
+            keyword = ' '.join(rule.keyword.lower().split())
+            current = self._rules.get(keyword)
+            if keyword and (current is None or _outranks(rule, current)):
+                self._rules[keyword] = rule._replace(keyword=keyword)
+        self._best: Dict[str, IconRule] = {}
+        for keyword, rule in self._rules.items():
+            for end in range(1, len(keyword)):
+                prefix = self._rules.get(keyword[:end])
+                if prefix is not None and _outranks(prefix, rule):
+                    rule = prefix
+            self._best[keyword] = rule
+        self._pattern = None
+        if self._rules:
+            self._pattern = re.compile(f"(?=({_trie_pattern(self._rules)}))")
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'IconClassifier':
+        """Build from the rules file's structure (see shared/icon-rules.json)"""
+        rules = []
+        for order, entry in enumerate(config.get('rules', ())):
+            for keyword in entry['keywords']:
+                rules.append(IconRule(keyword, entry['icon'], int(entry.get('priority', 0)), order))
+        return cls(rules, config.get('default', '⚔️'))
+
+    def classify(self, title: str) -> str:
+        """Icon for one title"""
+        if self._pattern is None:
+            return self.default
+        best = None
+        for match in self._pattern.finditer(_normalize(title)):
+            rule = self._best[match.group(1)]
+            if best is None or _outranks(rule, best):
+                best = rule
+        return self.default if best is None else best.icon
+
+    def classify_many(self, titles: Iterable[str]) -> List[str]:
+        """Icons for a batch of titles, found in a single scan of all of them"""
+        titles = list(titles)
+        icons = [self.default] * len(titles)
+        if self._pattern is None or not titles:
+            return icons
+        # Titles are joined on a separator no keyword can contain, and each
+        # match is mapped back to its title through the start offsets
+        normalized = [_normalize(title) for title in titles]
+        starts = []
+        offset = 0
+        for title in normalized:
+            starts.append(offset)
+            offset += len(title) + 1
+        best: List[Any] = [None] * len(titles)
+        for match in self._pattern.finditer('\0'.join(normalized)):
+            i = bisect_right(starts, match.start()) - 1
+            rule = self._best[match.group(1)]
+            current = best[i]
+            if current is None or _outranks(rule, current):
+                best[i] = rule
+        for i, rule in enumerate(best):
+            if rule is not None:
+                icons[i] = rule.icon
+        return icons
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+
+def _normalize(text: str) -> str:
+    """Lower-case with single spaces between words, the form keywords are kept in"""
+    return ' '.join(text.lower().split())
+
+
+def _outranks(rule: IconRule, other: IconRule) -> bool:
+    return (rule.priority, -rule.order) > (other.priority, -other.order)
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation of ``keywords`` factored into a trie, longest match first"""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Optional tails are greedy, so a longer keyword wins over its prefix
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+def rules_path() -> Path:
+    """Rules file selected by QUEST_MASTER_ICON_RULES, or the bundled one"""
+    return Path(os.environ.get('QUEST_MASTER_ICON_RULES') or DEFAULT_RULES_PATH)
+
+
+@lru_cache(maxsize=None)
+def load_classifier(path: Path) -> IconClassifier:
+    """Read and compile a rules file once per process"""
+    with open(path, encoding='utf-8') as fp:
+        return IconClassifier.from_config(json.load(fp))
+
+
+def icon_classifier() -> IconClassifier:
+    """The process-wide classifier for the configured rules file"""
+    return load_classifier(rules_path())
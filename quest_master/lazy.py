@@ -0,0 +1,143 @@
+import heapq
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from quest_master.models import Achievement, pack_id, unpack_id
+from quest_master.persistence import StorageBackend
+from quest_master.search import ACHIEVEMENT, SearchIndex, query_terms, score_text, storage_terms
+
+
+def _order(record: Achievement) -> Tuple[str, str]:
+    return record.completed_at, record.id
+
+
+class LazyAchievements:
+    """Achievements read from storage a page at a time, newest first
+
+    A stand-in for the achievements RecordStore for players whose history is
+    too long to keep in memory. Only the newest stretch that somebody has
+    scrolled to is held, and further pages are fetched with a keyset cursor
+    on (completed_at, id), so each page is one index range scan however deep
+    it is. The count is read once and then kept current as achievements come
+    and go; total XP comes from the history rollups, which are maintained at
+    write time.
+
+    Writes still go to storage through QuestMaster as events; the view only
+    keeps its loaded pages in step with them. Their text is not in the
+    player's search index either: see ``search``.
+    """
+
+    page_size = 48
+
+    def __init__(self, backend: StorageBackend, user_id: str, count: Optional[int] = None):
+        self.backend = backend
+        self.user_id = user_id
+        self._count = backend.count_records('achievements', user_id) if count is None else count
+        self._loaded: List[Achievement] = []    # newest first
+        self._exhausted = False
+
+    def add(self, record: Achievement) -> Achievement:
+        """Account for a new achievement, showing it if it falls inside the loaded pages"""
+        self._count += 1
+        order = _order(record)
+        if self._exhausted or (self._loaded and order > _order(self._loaded[-1])):
+            position = 0
+            while position < len(self._loaded) and _order(self._loaded[position]) > order:
+                position += 1
+            self._loaded.insert(position, record)
+        return record
+
+    def get(self, record_id: str, default: Any = None) -> Any:
+        """Look up an achievement, from the loaded pages or else from storage"""
+        key = pack_id(record_id)
+        for record in self._loaded:
+            if record.key == key:
+                return record
+        data = self.backend.get_achievement(record_id, self.user_id)
+        return default if data is None else Achievement(**data)
+
+    def remove(self, record_id: str) -> Any:
+        """Account for a deleted achievement, returning it (or None if it was not stored)"""
+        record = self.get(record_id)
+        if record is None:
+            return None
+        self._loaded = [loaded for loaded in self._loaded if loaded.key != record.key]
+        self._count -= 1
+        return record
+
+    def window(self, start: int, stop: int, bucket: Optional[str] = None) -> List[Achievement]:
+        """Achievements ``start:stop``, newest first, fetching pages as far as ``stop``"""
+        while len(self._loaded) < stop and not self._exhausted:
+            self._fetch(max(stop - len(self._loaded), self.page_size))
+        records = self._loaded[start:stop]
+        # Keep what was asked for (and at least a page), not everything ever scrolled to
+        keep = max(stop, self.page_size)
+        if len(self._loaded) > keep:
+            del self._loaded[keep:]
+            self._exhausted = False
+        return records
+
+    def _fetch(self, limit: int):
+        before = _order(self._loaded[-1]) if self._loaded else None
+        rows = self.backend.page_achievements(limit, before, self.user_id)
+        self._loaded.extend(Achievement(**row) for row in rows)
+        if len(rows) < limit:
+            self._exhausted = True
+
+    def loaded(self) -> int:
+        """Number of achievements currently held in memory"""
+        return len(self._loaded)
+
+    def __contains__(self, record_id: object) -> bool:
+        return self.get(record_id) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Achievement]:
+        for row in self.backend.iter_records('achievements', self.user_id):
+            yield Achievement(**row)
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+
+def search(index: SearchIndex, tasks: Any, achievements: LazyAchievements, query: str,
+           categories: Optional[Iterable[str]] = None, since: Optional[str] = None,
+           until: Optional[str] = None, limit: int = 50) -> Tuple[int, list]:
+    """SearchIndex.search over tasks in the index and a lazy view's achievements in storage
+
+    Each side returns its own best ``limit`` records, which are then scored
+    together the way the index ranks, with word rarity taken over both, so
+    the merged page orders like a single index would. Returns the total match
+    count and the records.
+    """
+    categories = tuple(dict.fromkeys(categories)) if categories else None
+    total, hits = index.search(query, categories, since, until, limit)
+    records = [record for record in (tasks.get(unpack_id(hit.key)) for hit in hits) if record is not None]
+    if categories is not None and ACHIEVEMENT not in categories:
+        return total, records
+    backend, user_id = achievements.backend, achievements.user_id
+    terms = query_terms(query)
+    stored, rows = backend.search_achievements(storage_terms(terms), since, until, limit, user_id)
+    records.extend(Achievement(**row) for row in rows)
+    if not terms:
+        # Both sides come newest day first; a stable sort keeps each day's order
+        records.sort(key=lambda record: _when(record)[:10], reverse=True)
+        return total + stored, records[:limit]
+
+    docs = len(index) + len(achievements)
+    idfs: Dict[str, float] = {}
+
+    def idf(word: str) -> float:
+        if word not in idfs:
+            found = index.document_frequency(word) + backend.search_achievements([word], limit=0, user_id=user_id)[0]
+            idfs[word] = math.log(1 + docs / max(found, 1))
+        return idfs[word]
+
+    best = heapq.nlargest(limit, records, key=lambda record: score_text(terms, record.title, record.description, idf))
+    return total + stored, best
+
+
+def _when(record: Any) -> str:
+    return record.completed_at if isinstance(record, Achievement) else record.created_at
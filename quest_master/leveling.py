@@ -0,0 +1,127 @@
+import json
+import os
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Level curve, category multipliers and streak bonus (see shared/leveling.json)
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / 'shared' / 'leveling.json'
+
+CURVES = ('linear', 'polynomial', 'exponential')
+
+
+def thresholds(curve: str, base: float, max_level: int, exponent: float = 2.0,
+               growth: float = 1.5) -> List[int]:
+    """Total XP needed to reach each level, from level 1 (0 XP) to ``max_level``
+
+    ``base`` is the XP needed for level 2. After that each level costs the
+    same (linear), follows ``base * (level - 1) ** exponent`` (polynomial),
+    or costs ``growth`` times the one before (exponential).
+    """
+    if curve not in CURVES:
+        raise ValueError(f"Leveling curve must be one of {', '.join(CURVES)}, got {curve!r}")
+    if base <= 0 or max_level < 1:
+        raise ValueError(f"Leveling needs a positive base and max_level, got {base!r} and {max_level!r}")
+    table = []
+    for steps in range(max_level):
+        if curve == 'linear':
+            xp = base * steps
+        elif curve == 'polynomial':
+            xp = base * steps ** exponent
+        else:
+            xp = base * steps if growth == 1 else base * (growth ** steps - 1) / (growth - 1)
+        table.append(round(xp))
+    if any(later <= earlier for earlier, later in zip(table, table[1:])):
+        raise ValueError(f"Leveling curve {curve!r} must need more XP for every level")
+    return table
+
+
+class LevelProgress(NamedTuple):
+    level: int
+    xp: int
+    floor: int                  # XP at which this level was reached
+    ceiling: Optional[int]      # XP needed for the next level (None at the top)
+
+    @property
+    def to_next(self) -> int:
+        return 0 if self.ceiling is None else self.ceiling - self.xp
+
+    @property
+    def fraction(self) -> float:
+        """How far through this level, from 0 to 1"""
+        if self.ceiling is None:
+            return 1.0
+        return (self.xp - self.floor) / (self.ceiling - self.floor)
+
+
+class Leveling:
+    """Levels from total XP, and the XP a completion is worth
+
+    The curve is expanded once into a table of level thresholds, so the
+    level for any XP total is a binary search: O(log levels), however much
+    history lies behind the total. The total itself is kept current by the
+    history rollups as completions come in. A completion earns its task's
+    reward times the category multiplier, plus a bonus for each day of the
+    player's current streak up to a cap.
+    """
+
+    def __init__(self, table: List[int], multipliers: Dict[str, float], streak_per_day: float = 0.0,
+                 streak_max: float = 0.0):
+        self.thresholds = table
+        self.multipliers = multipliers
+        self.streak_per_day = streak_per_day
+        self.streak_max = streak_max
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'Leveling':
+        """Build from the config file's structure (see shared/leveling.json)"""
+        table = thresholds(config.get('curve', 'polynomial'), float(config.get('base', 500)),
+                           int(config.get('max_level', 100)), float(config.get('exponent', 2.0)),
+                           float(config.get('growth', 1.5)))
+        multipliers = {category: float(value) for category, value in config.get('multipliers', {}).items()}
+        bonus = config.get('streak_bonus', {})
+        return cls(table, multipliers, float(bonus.get('per_day', 0.0)), float(bonus.get('max', 0.0)))
+
+    @property
+    def max_level(self) -> int:
+        return len(self.thresholds)
+
+    def level(self, xp: int) -> int:
+        """Level reached with ``xp`` in total"""
+        return max(bisect_right(self.thresholds, xp), 1)
+
+    def progress(self, xp: int) -> LevelProgress:
+        """Level reached with ``xp`` and how far it is to the next"""
+        level = self.level(xp)
+        ceiling = self.thresholds[level] if level < self.max_level else None
+        return LevelProgress(level, xp, self.thresholds[level - 1], ceiling)
+
+    def streak_bonus(self, streak: int) -> float:
+        """Extra share of XP for a streak of ``streak`` days"""
+        return min(streak * self.streak_per_day, self.streak_max)
+
+    def award(self, category: str, reward: int, streak: int = 0) -> int:
+        """XP earned by completing a task of ``category`` worth ``reward`` during a ``streak``"""
+        return round(reward * self.multipliers.get(category, 1.0) * (1 + self.streak_bonus(streak)))
+
+
+@lru_cache(maxsize=None)
+def load_leveling(path: Path) -> Leveling:
+    """Read a config file and build its threshold table once per process"""
+    with open(path, encoding='utf-8') as fp:
+        return Leveling.from_config(json.load(fp))
+
+
+@lru_cache(maxsize=None)
+def _leveling_for(setting: Optional[str]) -> Leveling:
+    return load_leveling(Path(setting or DEFAULT_CONFIG_PATH))
+
+
+def leveling() -> Leveling:
+    """The process-wide leveling rules for the configured file
+
+    Read on every level display and completion, so the rules are cached by
+    the raw QUEST_MASTER_LEVELING value and no path is built per call.
+    """
+    return _leveling_for(os.environ.get('QUEST_MASTER_LEVELING'))
@@ -0,0 +1,218 @@
+"""Lightweight timing spans and counters for finding slow reruns
+
+Profiling is switched on with QUEST_MASTER_PROFILE=1. While it is off,
+``timed`` returns functions unchanged and ``span`` hands back one shared no-op
+context manager, so instrumented code pays for little more than a flag check.
+
+When on, every span and counter feeds two places:
+
+* a process-wide ``REGISTRY`` of totals, exported as Prometheus text
+* the profile of the script run in progress on the current thread, which the
+  developer panel shows and which is appended to QUEST_MASTER_PROFILE_LOG as
+  one JSON line per rerun when that is set
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+ENABLED = _env_flag('QUEST_MASTER_PROFILE')
+LOG_PATH = os.environ.get('QUEST_MASTER_PROFILE_LOG')
+
+_NOOP = nullcontext()
+
+
+@dataclass
+class SpanStats:
+    """Running totals for one span name"""
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def observe(self, seconds: float):
+        self.calls += 1
+        self.seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+
+class Registry:
+    """Process-wide span and counter totals, shared by every session"""
+
+    def __init__(self):
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.observe(seconds)
+
+    def add(self, name: str, amount: int):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def prometheus_text(self) -> str:
+        """Totals in the Prometheus text exposition format"""
+        with self._lock:
+            spans = sorted(self.spans.items())
+            counters = sorted(self.counters.items())
+        lines = [
+            '# HELP questmaster_span_seconds_total Time spent inside each span.',
+            '# TYPE questmaster_span_seconds_total counter',
+        ]
+        lines += [f'questmaster_span_seconds_total{{span="{name}"}} {stats.seconds:.6f}' for name, stats in spans]
+        lines += [
+            '# HELP questmaster_span_calls_total Times each span was entered.',
+            '# TYPE questmaster_span_calls_total counter',
+        ]
+        lines += [f'questmaster_span_calls_total{{span="{name}"}} {stats.calls}' for name, stats in spans]
+        lines += [
+            '# HELP questmaster_span_max_seconds Longest single pass through each span.',
+            '# TYPE questmaster_span_max_seconds gauge',
+        ]
+        lines += [f'questmaster_span_max_seconds{{span="{name}"}} {stats.max_seconds:.6f}' for name, stats in spans]
+        lines += [
+            '# HELP questmaster_events_total Rendering counters (elements emitted, HTML bytes).',
+            '# TYPE questmaster_events_total counter',
+        ]
+        lines += [f'questmaster_events_total{{name="{name}"}} {value}' for name, value in counters]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+@dataclass
+class RunProfile:
+    """Spans and counters recorded during one script run"""
+    started: float = field(default_factory=time.time)
+    spans: List[Tuple[str, int, float]] = field(default_factory=list)  # (name, depth, seconds)
+    counters: Dict[str, int] = field(default_factory=dict)
+    depth: int = 0
+
+    def total_seconds(self) -> float:
+        return sum(seconds for _, depth, seconds in self.spans if depth == 0)
+
+    def to_dict(self) -> dict:
+        return {
+            'started': self.started,
+            'seconds': round(self.total_seconds(), 6),
+            'spans': [{'name': name, 'depth': depth, 'seconds': round(seconds, 6)}
+                      for name, depth, seconds in self.spans],
+            'counters': dict(self.counters),
+        }
+
+
+_local = threading.local()
+
+
+def start_run() -> Optional[RunProfile]:
+    """Begin recording a script run on this thread"""
+    if not ENABLED:
+        return None
+    _local.run = RunProfile()
+    return _local.run
+
+
+def current_run() -> Optional[RunProfile]:
+    """The run being recorded on this thread, if any"""
+    return getattr(_local, 'run', None) if ENABLED else None
+
+
+def finish_run() -> Optional[RunProfile]:
+    """Stop recording this thread's run and append it to the profile log"""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    if LOG_PATH:
+        with open(LOG_PATH, 'a', encoding='utf-8') as fp:
+            fp.write(json.dumps(run.to_dict()) + '\n')
+    return run
+
+
+class _Span:
+    __slots__ = ('name', 'run', 'index', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.run = current_run()
+        if self.run is not None:
+            # Reserve the slot now so nested spans are listed after their parent
+            self.index = len(self.run.spans)
+            self.run.spans.append((self.name, self.run.depth, 0.0))
+            self.run.depth += 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        REGISTRY.observe(self.name, seconds)
+        if self.run is not None:
+            self.run.depth -= 1
+            self.run.spans[self.index] = (self.name, self.run.depth, seconds)
+        return False
+
+
+def span(name: str):
+    """Context manager timing a block under ``name``"""
+    return _Span(name) if ENABLED else _NOOP
+
+
+def record(name: str, seconds: float, in_run: bool = True):
+    """Record a duration measured outside a span, such as one that began before the run
+
+    With ``in_run`` false it only goes to the process-wide totals, for
+    durations that overlap spans already in the run.
+    """
+    if not ENABLED:
+        return
+    REGISTRY.observe(name, seconds)
+    run = current_run() if in_run else None
+    if run is not None:
+        run.spans.append((name, run.depth, seconds))
+
+
+def timed(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator timing every call of a function (named by its qualname by default)"""
+    def decorate(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, amount: int = 1):
+    """Add to a rendering counter"""
+    if not ENABLED:
+        return
+    REGISTRY.add(name, amount)
+    run = current_run()
+    if run is not None:
+        run.counters[name] = run.counters.get(name, 0) + amount
@@ -0,0 +1,207 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple, Union
+
+# XP granted per task category
+XP_REWARDS = {'boss': 500, 'quest': 200, 'training': 100}
+
+# Canonical category strings; records point at these instead of holding copies
+CATEGORIES = {category: category for category in XP_REWARDS}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def pack_id(value: str) -> Union[bytes, str]:
+    """Store a canonical UUID string as its 16 raw bytes (other ids stay as-is)"""
+    try:
+        packed = uuid.UUID(value)
+    except (ValueError, AttributeError, TypeError):
+        return value
+    return packed.bytes if str(packed) == value else value
+
+
+def unpack_id(value: Union[bytes, str]) -> str:
+    return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+
+def pack_timestamp(value: str) -> Union[int, str]:
+    """Store a naive ISO timestamp as integer microseconds since the epoch
+
+    Only strings that round-trip exactly are packed; anything else (timezone
+    offsets, date-only values) is kept verbatim.
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return value
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        return value
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def unpack_timestamp(value: Union[int, str]) -> str:
+    if isinstance(value, int):
+        return (_EPOCH + timedelta(microseconds=value)).isoformat()
+    return value
+
+
+class Record:
+    """Immutable, slotted base for tasks and achievements
+
+    Records are created once and never modified, so they carry no per-instance
+    __dict__ and keep ids and timestamps in packed form. The public attributes
+    (and the keyword constructor) still use plain strings and ints.
+    """
+    __slots__ = ()
+    FIELDS: Tuple[Tuple[str, type], ...] = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def id(self) -> str:
+        return unpack_id(self._id)
+
+    @property
+    def key(self) -> Union[bytes, str]:
+        """Packed id, for indexing records without unpacking them"""
+        return self._id
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain field dict, as stored and exported"""
+        return {name: getattr(self, name) for name, _ in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Record':
+        return cls(**data)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash(self._id)
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name, _ in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        return (type(self).from_dict, (self.to_dict(),))
+
+
+class Task(Record):
+    __slots__ = ('_id', 'title', 'description', 'category', '_xp_reward', '_created_at')
+    FIELDS = (
+        ('id', str),
+        ('title', str),
+        ('description', str),
+        ('category', str),  # 'boss', 'quest', 'training'
+        ('xp_reward', int),
+        ('created_at', str),
+    )
+
+    def __init__(self, id: str, title: str, description: str, category: str,
+                 xp_reward: int, created_at: str):
+        init = object.__setattr__
+        init(self, '_id', pack_id(id))
+        init(self, 'title', title)
+        init(self, 'description', description)
+        init(self, 'category', CATEGORIES.get(category, category))
+        # None means "the category's standard reward", so it isn't stored per task
+        init(self, '_xp_reward', None if XP_REWARDS.get(category) == xp_reward else xp_reward)
+        init(self, '_created_at', pack_timestamp(created_at))
+
+    @property
+    def xp_reward(self) -> int:
+        return XP_REWARDS[self.category] if self._xp_reward is None else self._xp_reward
+
+    @property
+    def created_at(self) -> str:
+        return unpack_timestamp(self._created_at)
+
+
+class Achievement(Record):
+    __slots__ = ('_id', 'title', 'description', 'icon', 'xp_earned', '_completed_at')
+    FIELDS = (
+        ('id', str),
+        ('title', str),
+        ('description', str),
+        ('icon', str),
+        ('xp_earned', int),
+        ('completed_at', str),
+    )
+
+    def __init__(self, id: str, title: str, description: str, icon: str,
+                 xp_earned: int, completed_at: str):
+        init = object.__setattr__
+        init(self, '_id', pack_id(id))
+        init(self, 'title', title)
+        init(self, 'description', description)
+        init(self, 'icon', icon)
+        init(self, 'xp_earned', xp_earned)
+        init(self, '_completed_at', pack_timestamp(completed_at))
+
+    @property
+    def completed_at(self) -> str:
+        return unpack_timestamp(self._completed_at)
+
+    @classmethod
+    def from_packed(cls, key: Union[bytes, str], title: str, description: str, icon: str,
+                    xp_earned: int, completed_at: Union[int, str]) -> 'Achievement':
+        """Rebuild an achievement from already-packed columns (see AchievementTable)"""
+        achievement = object.__new__(cls)
+        init = object.__setattr__
+        init(achievement, '_id', key)
+        init(achievement, 'title', title)
+        init(achievement, 'description', description)
+        init(achievement, 'icon', icon)
+        init(achievement, 'xp_earned', xp_earned)
+        init(achievement, '_completed_at', completed_at)
+        return achievement
+
+
+class QuestTemplate(Record):
+    """A recurring or scheduled quest that turns into a Task whenever it comes due
+
+    ``cron`` is a five-field cron expression, or empty for a one-off quest
+    scheduled for ``next_at``. Templates are immutable like other records;
+    advancing to the next occurrence builds a new one.
+    """
+    __slots__ = ('_id', 'title', 'description', 'category', 'cron', '_next_at', '_created_at')
+    FIELDS = (
+        ('id', str),
+        ('title', str),
+        ('description', str),
+        ('category', str),
+        ('cron', str),
+        ('next_at', str),
+        ('created_at', str),
+    )
+
+    def __init__(self, id: str, title: str, description: str, category: str, cron: str,
+                 next_at: str, created_at: str):
+        init = object.__setattr__
+        init(self, '_id', pack_id(id))
+        init(self, 'title', title)
+        init(self, 'description', description)
+        init(self, 'category', CATEGORIES.get(category, category))
+        init(self, 'cron', cron)
+        init(self, '_next_at', pack_timestamp(next_at))
+        init(self, '_created_at', pack_timestamp(created_at))
+
+    @property
+    def next_at(self) -> str:
+        return unpack_timestamp(self._next_at)
+
+    @property
+    def created_at(self) -> str:
+        return unpack_timestamp(self._created_at)
+
+    def advanced(self, next_at: str) -> 'QuestTemplate':
+        """This template with its next occurrence moved to ``next_at``"""
+        return QuestTemplate(**{**self.to_dict(), 'next_at': next_at})
@@ -0,0 +1,785 @@
+"""The Quest Master page: every section of the Streamlit UI
+
+Imported once per process by the entry script (streamlit_app.py), which
+Streamlit re-executes on every interaction; keeping the page here means a
+rerun only pays for running ``main``, not for redefining the whole UI.
+"""
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import streamlit as st
+
+from quest_master import metrics, persistence, quests, schedule, theme
+from quest_master.history import Rollups
+from quest_master.leveling import LevelProgress, leveling
+from quest_master.html_cache import HTMLCache
+from quest_master.models import Achievement, QuestTemplate, Task
+from quest_master.search import ACHIEVEMENT
+from quest_master.service import DataService, columnar_achievements, lazy_achievements
+
+class QuestMaster(quests.QuestMaster):
+    """QuestMaster for the player of the current browser session"""
+    
+    def __init__(self, service: DataService = None, user_id: str = None):
+        self.init_session_state()
+        super().__init__(service if service is not None else get_data_service(),
+                         user_id if user_id is not None else st.session_state.player)
+    
+    def init_session_state(self):
+        """Initialize session state variables"""
+        # Sessions only remember which player they are; the data itself lives
+        # in the process-wide DataService and is shared across tabs
+        if 'player' not in st.session_state:
+            st.session_state.player = current_player()
+        if 'initialized' not in st.session_state:
+            st.session_state.initialized = True
+
+def session_quest_master() -> QuestMaster:
+    """This session's QuestMaster, created on its first run and reused by later reruns"""
+    quest_master = st.session_state.get('quest_master')
+    if quest_master is None or quest_master.service is not get_data_service():
+        quest_master = st.session_state.quest_master = QuestMaster()
+    else:
+        # Re-attach in case the player was evicted and reloaded, and pick up due quests
+        quest_master.load_data()
+        quest_master.materialize_due()
+    return quest_master
+
+@st.cache_resource
+def get_data_service() -> DataService:
+    """Process-wide data service shared by every browser session"""
+    return DataService(persistence.open_backend(), columnar_achievements=columnar_achievements(),
+                       lazy_achievements=lazy_achievements())
+
+def current_player() -> str:
+    """Player id for this browser session
+
+    Taken from the ``?player=`` query parameter so several people (or several
+    named save slots) can share one server; defaults to a single shared player.
+    """
+    player = st.query_params.get("player", "").strip()
+    return player[:64] or persistence.DEFAULT_USER
+
+def render_html(body: str):
+    """st.markdown for raw HTML, counted by the profiler"""
+    metrics.count('elements')
+    metrics.count('html_bytes', len(body))
+    st.markdown(body, unsafe_allow_html=True)
+
+# CSS for medieval theme, kept in static/medieval.css
+@metrics.timed("main.css")
+def inject_medieval_css():
+    """Load the medieval theme stylesheet
+
+    With static serving enabled this is a tiny <style>@import</style> that the
+    browser resolves from its HTTP cache; otherwise the CSS is inlined from a
+    per-process cache. Style-only HTML goes to Streamlit's event container, so
+    it takes no space in the layout.
+    """
+    st.html(theme.theme_html(st.get_option("server.enableStaticServing"), theme.font_mode()))
+
+CATEGORY_STYLES = {
+    'boss': {
+        'class': 'boss-fight-card',
+        'color': '#DC143C', 
+        'icon': '⚔️',
+        'badge': 'Epic Challenge',
+        'badge_class': 'boss-badge'
+    },
+    'quest': {
+        'class': 'quest-card',
+        'color': '#DAA520', 
+        'icon': '🗺️',
+        'badge': 'Noble Mission',
+        'badge_class': 'quest-badge'
+    }, 
+    'training': {
+        'class': 'training-card',
+        'color': '#228B22', 
+        'icon': '🛡️',
+        'badge': 'Skill Development',
+        'badge_class': 'training-badge'
+    }
+}
+
+@st.cache_resource
+def get_card_html_cache() -> HTMLCache:
+    """Pre-rendered card markup shared by every session in this process"""
+    return HTMLCache()
+
+def card_key(record) -> tuple:
+    """Card cache key: the record's content, as ids repeat across players"""
+    return (type(record).__name__, *record.to_dict().values())
+
+def task_card_html(task: Task) -> str:
+    """Format the HTML block for a task card"""
+    style = CATEGORY_STYLES[task.category]
+    return f"""
+        <div class="parchment-card {style['class']}">
+            <div class="task-title" style="color: {style['color']};">
+                {style['icon']} {task.title}
+            </div>
+            <div class="category-badge {style['badge_class']}">{style['badge']}</div>
+            <div class="task-description">{task.description}</div>
+            <div class="task-reward">Base reward: {task.xp_reward} XP</div>
+        </div>
+        """
+
+def achievement_badge_html(achievement: Achievement) -> str:
+    """Format the HTML block for an achievement badge"""
+    completed_date = datetime.fromisoformat(achievement.completed_at).strftime("%B %d, %Y")
+    return f"""
+        <div class="achievement-badge">
+            <div style="font-size: 3rem; margin-bottom: 1rem;">{achievement.icon}</div>
+            <h3 style="font-family: 'Cinzel', serif; margin-bottom: 0.5rem; font-weight: bold;">
+                {achievement.title}
+            </h3>
+            <p style="margin-bottom: 1rem; opacity: 0.9;">{achievement.description}</p>
+            <div style="font-size: 0.8rem; opacity: 0.8;">
+                📅 Completed: {completed_date}<br>
+                ⭐ {achievement.xp_earned} XP Earned
+            </div>
+        </div>
+        """
+
+# Button callbacks. Each mutation reruns only the fragments whose data it
+# touched (see the @st.fragment sections below) instead of the whole page.
+
+def column_fragment(category: str) -> str:
+    """Fragment key of a category column"""
+    return f"column_{category}"
+
+def on_create_task(quest_master: QuestMaster, create_key: str):
+    """Create a task from the form fields
+
+    ``create_key`` is fixed when the form is drawn, so a double click (or a
+    second tab replaying the same click) creates the quest only once.
+    """
+    title = st.session_state.quest_title
+    description = st.session_state.quest_description
+    category = st.session_state.quest_category
+    if not (title and description and category):
+        # Returning normally reruns just the form fragment, which shows the error
+        st.session_state.create_error = "Please fill in all fields to create your quest."
+        return
+    repeat = st.session_state.get("quest_repeat", "none")
+    if repeat == "none":
+        quest_master.create_task(title, description, category, idempotency_key=create_key)
+        st.session_state.create_notice = "Quest created! Your new adventure awaits in the quest log."
+    else:
+        try:
+            if repeat == "due":
+                template = quest_master.schedule_task(title, description, category, due_at=datetime.combine(
+                    st.session_state.quest_due_date, st.session_state.quest_time), idempotency_key=create_key)
+            else:
+                template = quest_master.schedule_task(title, description, category, cron=repeat_cron(repeat),
+                                                      idempotency_key=create_key)
+        except ValueError as exc:
+            st.session_state.create_error = str(exc)
+            return
+        st.session_state.create_notice = (
+            f"Quest scheduled {schedule.describe(template)}! The first one appears "
+            f"{datetime.fromisoformat(template.next_at):%B %d, %Y at %H:%M}."
+            if template.key in quest_master.data.schedule.templates else
+            "Quest scheduled and already due! It awaits in the quest log.")
+    st.session_state.create_key = str(uuid.uuid4())
+    st.rerun(["create_form", column_fragment(category), "stats", "search"])
+
+def repeat_cron(repeat: str) -> str:
+    """Cron expression for the repeat options chosen in the creation form"""
+    if repeat == "daily":
+        return schedule.daily(st.session_state.quest_time)
+    if repeat == "weekly":
+        return schedule.weekly(st.session_state.quest_time, st.session_state.quest_weekdays)
+    expression = st.session_state.quest_cron.strip()
+    schedule.parse(expression)
+    return expression
+
+def on_unschedule_task(quest_master: QuestMaster, template: QuestTemplate):
+    """Stop a recurring or scheduled quest from the schedule list"""
+    quest_master.unschedule_task(template.id)
+    st.rerun(["create_form"])
+
+def on_complete_task(quest_master: QuestMaster, task: Task):
+    """Complete a task from its card"""
+    quest_master.complete_task(task.id)
+    deselect(task.category, [task.id])
+    get_card_html_cache().discard(card_key(task))
+    st.session_state[f"notice_{task.category}"] = "Quest completed! Victory is yours!"
+    sections = [column_fragment(task.category), "stats", "search"]
+    if task.category == 'boss':
+        sections.append("hall")
+    st.rerun(sections)
+
+def on_delete_task(quest_master: QuestMaster, task: Task):
+    """Delete a task from its card"""
+    quest_master.delete_task(task.id)
+    deselect(task.category, [task.id])
+    get_card_html_cache().discard(card_key(task))
+    st.rerun([column_fragment(task.category), "stats", "search"])
+
+def on_delete_achievement(quest_master: QuestMaster, achievement: Achievement):
+    """Remove an achievement from the Hall of Victories"""
+    quest_master.delete_achievement(achievement.id)
+    get_card_html_cache().discard(card_key(achievement))
+    st.rerun(["hall", "stats", "search"])
+
+def render_task_card(task: Task, quest_master: QuestMaster, key_prefix: str, selectable: bool = False):
+    """Render individual task card with medieval styling"""
+    card_html_cache = get_card_html_cache()
+    html = card_html_cache.get_or_render(card_key(task), lambda: task_card_html(task))
+    
+    with st.container():
+        render_html(html)
+        metrics.count('elements', 3 if selectable else 2)
+        
+        if selectable:
+            st.checkbox("Select", key=select_key(task.category, task.id),
+                        on_change=toggle_selected, args=(task.category, task.id))
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("✅ Complete", key=f"complete_{key_prefix}_{task.id}", type="primary",
+                      on_click=on_complete_task, args=(quest_master, task))
+        with col2:
+            st.button("❌ Delete", key=f"delete_{key_prefix}_{task.id}",
+                      on_click=on_delete_task, args=(quest_master, task))
+
+# Multi-select. Each column keeps the ids of its ticked cards in session state
+# so a bulk action applies them all in one pass and one rerun.
+
+def select_key(category: str, task_id: str) -> str:
+    """Widget key of a card's selection checkbox"""
+    return f"select_{category}_{task_id}"
+
+def selected_ids(category: str) -> set:
+    """Ids of the tasks ticked in a column"""
+    return st.session_state.setdefault(f"selected_{category}", set())
+
+def toggle_selected(category: str, task_id: str):
+    """Track a card's checkbox in its column's selection"""
+    if st.session_state[select_key(category, task_id)]:
+        selected_ids(category).add(task_id)
+    else:
+        selected_ids(category).discard(task_id)
+
+def select_all(category: str, task_ids):
+    """Tick every card currently shown in a column"""
+    selected = selected_ids(category)
+    for task_id in task_ids:
+        selected.add(task_id)
+        st.session_state[select_key(category, task_id)] = True
+
+def deselect(category: str, task_ids=None):
+    """Untick some (or all) cards in a column"""
+    selected = selected_ids(category)
+    for task_id in list(selected if task_ids is None else task_ids):
+        selected.discard(task_id)
+        st.session_state.pop(select_key(category, task_id), None)
+
+def on_complete_selected(quest_master: QuestMaster, category: str):
+    """Complete every selected task in a column with one mutation pass and one rerun"""
+    completed, achievements = quest_master.complete_tasks(list(selected_ids(category)))
+    card_html_cache = get_card_html_cache()
+    for task in completed:
+        card_html_cache.discard(card_key(task))
+    deselect(category)
+    count = len(completed)
+    st.session_state[f"notice_{category}"] = f"{count} quest{'' if count == 1 else 's'} completed! Victory is yours!"
+    sections = [column_fragment(category), "stats", "search"]
+    if achievements:
+        sections.append("hall")
+    st.rerun(sections)
+
+def on_delete_selected(quest_master: QuestMaster, category: str):
+    """Delete every selected task in a column with one mutation pass and one rerun"""
+    deleted = quest_master.delete_tasks(list(selected_ids(category)))
+    card_html_cache = get_card_html_cache()
+    for task in deleted:
+        card_html_cache.discard(card_key(task))
+    deselect(category)
+    st.rerun([column_fragment(category), "stats", "search"])
+
+def render_selection_bar(category: str, quest_master: QuestMaster, visible):
+    """Bulk actions for a column's selected cards"""
+    selected = selected_ids(category)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.button("☑️ Select shown", key=f"select_all_{category}",
+                  on_click=select_all, args=(category, [task.id for task in visible]))
+    if not selected:
+        return
+    with col2:
+        st.button(f"✅ Complete {len(selected)}", key=f"complete_selected_{category}", type="primary",
+                  on_click=on_complete_selected, args=(quest_master, category))
+    with col3:
+        st.button(f"❌ Delete {len(selected)}", key=f"delete_selected_{category}",
+                  on_click=on_delete_selected, args=(quest_master, category))
+
+def render_achievement_badge(achievement: Achievement, quest_master: QuestMaster, key_prefix: str = "ach"):
+    """Render individual achievement badge"""
+    card_html_cache = get_card_html_cache()
+    html = card_html_cache.get_or_render(card_key(achievement),
+                                         lambda: achievement_badge_html(achievement))
+    
+    with st.container():
+        render_html(html)
+        metrics.count('elements')
+        
+        st.button("🗑️ Remove Achievement", key=f"del_{key_prefix}_{achievement.id}",
+                  on_click=on_delete_achievement, args=(quest_master, achievement))
+
+PAGE_SIZE_OPTIONS = [6, 12, 24, 48]
+
+TASK_COLUMNS = {
+    'boss': ('boss-header', '⚔️ Boss Fights', '⚔️<br>No boss fights await...'),
+    'quest': ('quest-header', '🗺️ Quests', '🗺️<br>No quests available...'),
+    'training': ('training-header', '🛡️ Training', '🛡️<br>No training sessions planned...'),
+}
+
+def page_size(group: str) -> int:
+    """Page size selected for a group of paginated sections"""
+    return st.session_state.get(f"page_size_{group}", PAGE_SIZE_OPTIONS[0])
+
+def visible_count(section: str, group: str) -> int:
+    """Number of items currently revealed in a paginated section"""
+    return st.session_state.get(f"visible_{section}", page_size(group))
+
+def show_more(section: str, group: str, shown: int):
+    """Reveal another page of a paginated section"""
+    st.session_state[f"visible_{section}"] = shown + page_size(group)
+
+def reset_visible(sections, fragments=()):
+    """Collapse paginated sections back to their first page"""
+    for section in sections:
+        st.session_state.pop(f"visible_{section}", None)
+    if fragments:
+        st.rerun(list(fragments))
+
+def render_load_more(section: str, group: str, shown: int, total: int):
+    """Render the progress caption and "load more" button for a section"""
+    if shown >= total:
+        return
+    st.caption(f"Showing {shown} of {total}")
+    st.button("📜 Load more", key=f"load_more_{section}",
+              on_click=show_more, args=(section, group, shown))
+
+def render_page_size_control(group: str, sections, fragments=()):
+    """Render the page size selector shared by a group of sections"""
+    st.selectbox("Cards per page", options=PAGE_SIZE_OPTIONS, key=f"page_size_{group}",
+                 on_change=reset_visible, args=(tuple(sections), tuple(fragments)))
+
+def render_task_column(category: str, quest_master: QuestMaster):
+    """Render one category column, limited to its visible window"""
+    header_class, header, empty_message = TASK_COLUMNS[category]
+    render_html(f'<div class="section-header {header_class}">{header}</div>')
+    notice = st.session_state.pop(f"notice_{category}", None)
+    if notice:
+        st.success(notice)
+    
+    total = quest_master.tasks.count(category)
+    if not total:
+        render_html(f"""
+        <div style="text-align: center; padding: 2rem; color: #888; font-family: 'Cinzel', serif;">
+            {empty_message}
+        </div>
+        """)
+        return
+    
+    visible = quest_master.task_window(category, visible_count(category, "tasks"))
+    render_selection_bar(category, quest_master, visible)
+    for task in visible:
+        render_task_card(task, quest_master, category, selectable=True)
+    render_load_more(category, "tasks", len(visible), total)
+
+# Each column is its own fragment so a click reruns only that column
+TASK_COLUMN_FRAGMENTS = {
+    category: st.fragment(metrics.timed(f"render.column.{category}")(render_task_column),
+                          key=column_fragment(category))
+    for category in TASK_COLUMNS
+}
+
+@st.fragment(key="create_form")
+@metrics.timed("render.create_form")
+def render_creation_form(quest_master: QuestMaster):
+    """Task creation form"""
+    render_html('<div class="section-header" style="color: #8B4513;">📜 Chronicle New Adventures</div>')
+    
+    with st.container():
+        render_html('<div class="parchment-card">')
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.text_input("🖋️ Quest Title", placeholder="Enter your noble quest...", key="quest_title")
+        with col2:
+            st.selectbox("🏴 Adventure Type", 
+                         options=['boss', 'quest', 'training'],
+                         format_func=lambda x: {
+                             'boss': '⚔️ Boss Fight - Epic Challenge', 
+                             'quest': '🗺️ Quest - Noble Mission',
+                             'training': '🛡️ Training - Skill Development'
+                         }[x],
+                         key="quest_category")
+        
+        st.text_area("📋 Quest Description", 
+                     placeholder="Describe the trials and rewards that await...",
+                     key="quest_description")
+        
+        render_repeat_controls()
+        
+        create_key = st.session_state.setdefault('create_key', str(uuid.uuid4()))
+        st.button("🌟 Embark on Adventure", type="primary", key="create_quest",
+                  on_click=on_create_task, args=(quest_master, create_key))
+        notice = st.session_state.pop('create_notice', None)
+        if notice:
+            st.success(notice)
+        error = st.session_state.pop('create_error', None)
+        if error:
+            st.error(error)
+        
+        render_schedule_list(quest_master)
+        
+        render_html('</div>')
+
+REPEAT_OPTIONS = {
+    'none': '✨ Just once, now',
+    'daily': '🔁 Every day',
+    'weekly': '📅 Every week',
+    'cron': '⚙️ Custom (cron)',
+    'due': '⏳ On a set date',
+}
+
+def render_repeat_controls():
+    """Repeat and schedule inputs of the creation form"""
+    col1, col2 = st.columns(2)
+    with col1:
+        repeat = st.selectbox("🔁 Repeat", options=list(REPEAT_OPTIONS), format_func=REPEAT_OPTIONS.get,
+                              key="quest_repeat")
+    with col2:
+        if repeat == 'cron':
+            st.text_input("Cron schedule", placeholder="0 7 * * 1-5", key="quest_cron",
+                          help="minute hour day-of-month month day-of-week")
+        elif repeat != 'none':
+            st.time_input("At", value=schedule.DEFAULT_TIME, key="quest_time")
+    if repeat == 'weekly':
+        st.multiselect("On", options=range(7), default=[0], format_func=schedule.WEEKDAYS.__getitem__,
+                       key="quest_weekdays")
+    elif repeat == 'due':
+        st.date_input("On", key="quest_due_date")
+
+def render_schedule_list(quest_master: QuestMaster):
+    """Recurring and scheduled quests, soonest first, each with a stop button"""
+    with quest_master.data.lock:
+        templates = quest_master.data.schedule.ordered()
+    if not templates:
+        return
+    with st.expander(f"🔁 Recurring & scheduled quests ({len(templates)})"):
+        for template in templates:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.caption(f"{CATEGORY_STYLES[template.category]['icon']} **{template.title}** · "
+                           f"{schedule.describe(template)} · next "
+                           f"{datetime.fromisoformat(template.next_at):%b %d, %H:%M}")
+            with col2:
+                st.button("⏹️ Stop", key=f"unschedule_{template.id}",
+                          on_click=on_unschedule_task, args=(quest_master, template))
+
+@st.fragment(key="stats")
+@metrics.timed("render.stats")
+def render_stats_panel(quest_master: QuestMaster):
+    """Per-category counts and total XP"""
+    aggregates = quest_master.aggregates
+    
+    stat_col1, stat_col2, stat_col3, stat_col4 = st.columns(4)
+    
+    with stat_col1:
+        render_html(f"""
+        <div class="stats-panel">
+            <div class="stats-icon" style="color: #DC143C;">⚔️</div>
+            <div class="stats-number">{aggregates.count('boss')}</div>
+            <div class="stats-label">Boss Fights</div>
+        </div>
+        """)
+    
+    with stat_col2:
+        render_html(f"""
+        <div class="stats-panel">
+            <div class="stats-icon" style="color: #DAA520;">🗺️</div>
+            <div class="stats-number">{aggregates.count('quest')}</div>
+            <div class="stats-label">Active Quests</div>
+        </div>
+        """)
+    
+    with stat_col3:
+        render_html(f"""
+        <div class="stats-panel">
+            <div class="stats-icon" style="color: #228B22;">🛡️</div>
+            <div class="stats-number">{aggregates.count('training')}</div>
+            <div class="stats-label">Training Sessions</div>
+        </div>
+        """)
+    
+    with stat_col4:
+        render_html(f"""
+        <div class="stats-panel">
+            <div class="stats-icon" style="color: #DAA520;">⭐</div>
+            <div class="stats-number">{quest_master.rollups.total_xp:,}</div>
+            <div class="stats-label">Total XP</div>
+        </div>
+        """)
+    
+    render_level_bar(quest_master.level, leveling().streak_bonus(quest_master.rollups.current_streak(date.today())))
+    
+    render_chronicle(quest_master.rollups)
+
+def render_level_bar(progress: LevelProgress, streak_bonus: float):
+    """Player level, progress towards the next and the streak bonus on offer"""
+    if progress.ceiling is None:
+        text = f"🏰 Level {progress.level} · the highest rank in the realm"
+    else:
+        text = f"🏰 Level {progress.level} · {progress.to_next:,} XP to level {progress.level + 1}"
+    if streak_bonus:
+        text += f" · 🔥 +{streak_bonus:.0%} XP streak bonus"
+    st.progress(progress.fraction, text=text)
+
+CHRONICLE_DAYS = 30
+CHRONICLE_WEEKS = 26
+
+@metrics.timed("render.chronicle")
+def render_chronicle(rollups: Rollups):
+    """XP, completion and streak charts, read from the history rollups"""
+    chronicle = st.expander("📈 Chronicle of deeds", key="chronicle", on_change="rerun")
+    if not chronicle.open:
+        # Charts load pandas and Altair on first use, which would dominate
+        # a cold first paint; draw them only once somebody looks
+        return
+    with chronicle:
+        today = date.today()
+        current, longest = rollups.streaks(today)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("🔥 Current streak", f"{current} day{'' if current == 1 else 's'}")
+        col2.metric("🏅 Longest streak", f"{longest} day{'' if longest == 1 else 's'}")
+        col3.metric("✅ Deeds completed", f"{sum(rollups.completions.values()):,}")
+        
+        period = st.radio("XP per", options=["day", "week"], horizontal=True, key="chronicle_period")
+        if period == "day":
+            starts = [today - timedelta(days=n) for n in range(CHRONICLE_DAYS - 1, -1, -1)]
+            earned = rollups.xp_by_day(starts[0].isoformat())
+        else:
+            monday = today - timedelta(days=today.weekday())
+            starts = [monday - timedelta(weeks=n) for n in range(CHRONICLE_WEEKS - 1, -1, -1)]
+            earned = rollups.xp_by_week(starts[0].isoformat())
+        st.bar_chart({"XP": {start.isoformat(): earned.get(start.isoformat(), 0) for start in starts}},
+                     height=220)
+        st.bar_chart({"Completed": {TASK_COLUMNS[category][1]: rollups.completions.get(category, 0)
+                                    for category in TASK_COLUMNS}}, height=220, horizontal=True)
+
+@st.fragment(key="hall")
+@metrics.timed("render.hall")
+def render_hall_of_victories(quest_master: QuestMaster):
+    """Achievement gallery"""
+    render_html('<div class="section-header achievement-header">🏆 Hall of Victories 👑</div>')
+    
+    total_achievements = len(quest_master.achievements)
+    if total_achievements:
+        # Display only the visible slice of achievements in a grid
+        achievements = quest_master.achievement_window(visible_count("achievements", "achievements"))
+        cols_per_row = 3
+        for i in range(0, len(achievements), cols_per_row):
+            cols = st.columns(cols_per_row)
+            for j, achievement in enumerate(achievements[i:i+cols_per_row]):
+                with cols[j]:
+                    render_achievement_badge(achievement, quest_master)
+        render_load_more("achievements", "achievements", len(achievements), total_achievements)
+        render_page_size_control("achievements", ["achievements"])
+    else:
+        render_html("""
+        <div style="text-align: center; padding: 3rem; border: 2px dashed #DAA520; border-radius: 15px; margin: 2rem 0; background: rgba(218, 165, 32, 0.05);">
+            <div style="font-size: 3rem; margin-bottom: 1rem;">🏆</div>
+            <p style="color: #DAA520; font-family: 'Cinzel', serif; font-size: 1.1rem;">
+                Complete Boss Fights to earn eternal glory!
+            </p>
+        </div>
+        """)
+
+SEARCH_LIMIT = 24
+
+SEARCH_CATEGORIES = {
+    'boss': '⚔️ Boss Fights',
+    'quest': '🗺️ Quests',
+    'training': '🛡️ Training',
+    ACHIEVEMENT: '🏆 Achievements',
+}
+
+@st.fragment(key="search")
+@metrics.timed("render.search")
+def render_search(quest_master: QuestMaster):
+    """Search bar over every task and achievement, with category and date filters"""
+    col1, col2, col3 = st.columns([3, 2, 2])
+    with col1:
+        query = st.text_input("🔍 Search the chronicle", placeholder="dragon, frost titan, train...",
+                              key="search_query")
+    with col2:
+        categories = st.multiselect("Kinds", options=list(SEARCH_CATEGORIES),
+                                    format_func=SEARCH_CATEGORIES.get, key="search_categories")
+    with col3:
+        dates = st.date_input("Between", value=(), key="search_dates")
+    since = until = None
+    if dates:
+        since = dates[0].isoformat()
+        until = dates[-1].isoformat()
+    if not (query.strip() or categories or since):
+        return
+    
+    started = time.perf_counter()
+    total, records = quest_master.search(query, categories, since, until, SEARCH_LIMIT)
+    elapsed = (time.perf_counter() - started) * 1000
+    st.caption(f"{total:,} match{'' if total == 1 else 'es'} in {elapsed:.1f} ms" +
+               (f" · showing the best {len(records)}" if total > len(records) else ""))
+    cols_per_row = 3
+    for i in range(0, len(records), cols_per_row):
+        cols = st.columns(cols_per_row)
+        for j, record in enumerate(records[i:i+cols_per_row]):
+            with cols[j]:
+                if isinstance(record, Task):
+                    render_task_card(record, quest_master, "search")
+                else:
+                    render_achievement_badge(record, quest_master, "search")
+
+@metrics.timed("render.bulk_tools")
+def render_bulk_tools(quest_master: QuestMaster):
+    """Sidebar tools for migrating quests and achievements in and out"""
+    tools = st.sidebar.expander("📦 Bulk import / export", key="bulk_tools", on_change="rerun")
+    if not tools.open:
+        return
+    # Only sessions that open the panel pay for the import machinery
+    import io
+    from quest_master import bulk
+    with tools:
+        kind = st.radio("Records", options=['tasks', 'achievements'], horizontal=True, key="bulk_kind")
+        record_type = bulk.RECORD_TYPES[kind]
+        
+        upload = st.file_uploader("Import JSONL or CSV", type=['jsonl', 'json', 'csv'], key="bulk_upload")
+        if upload is not None and st.button("📥 Import", key="bulk_import"):
+            insert = quest_master.insert_tasks if kind == 'tasks' else quest_master.insert_achievements
+            rows = bulk.iter_rows(io.TextIOWrapper(upload, encoding='utf-8', newline=''),
+                                  bulk.format_for(upload.name))
+            report = bulk.import_rows(rows, record_type, insert)
+            st.session_state.bulk_report = report
+            st.rerun()
+        report = st.session_state.get('bulk_report')
+        if report is not None:
+            st.caption(f"Imported {report.imported:,}, rejected {report.rejected:,} "
+                       f"in {report.seconds:.2f}s ({report.rows_per_second:,.0f} rows/s)")
+            for error in report.errors:
+                st.caption(f"⚠️ {error}")
+        
+        fmt = st.radio("Export format", options=list(bulk.FORMATS), horizontal=True, key="bulk_format")
+        st.download_button("📤 Export", file_name=f"{kind}.{fmt}", key="bulk_export",
+                           data=lambda: bulk.export_bytes(quest_master.snapshot(kind), record_type, fmt))
+
+def render_profile_panel():
+    """Developer sidebar panel with the spans and counters of this rerun"""
+    run = metrics.current_run()
+    if run is None:
+        return
+    profiler = st.sidebar.expander("⏱️ Profiler", key="profiler", on_change="rerun")
+    if not profiler.open:
+        return
+    with profiler:
+        st.caption(f"Rerun: {run.total_seconds() * 1000:.1f} ms · "
+                   f"{run.counters.get('elements', 0):,} elements · "
+                   f"{run.counters.get('html_bytes', 0):,} bytes of HTML · "
+                   f"first paint {st.session_state.get('first_paint', 0) * 1000:.0f} ms")
+        st.dataframe([{'span': '\u2003' * depth + name, 'ms': round(seconds * 1000, 2)}
+                      for name, depth, seconds in run.spans], hide_index=True)
+        st.download_button("📈 Prometheus metrics", key="profile_export", file_name="quest_master.prom",
+                           mime="text/plain", data=metrics.REGISTRY.prometheus_text)
+
+def render_page():
+    # Inject medieval CSS styling
+    inject_medieval_css()
+    
+    # Initialize Quest Master
+    with metrics.span("main.quest_master"):
+        quest_master = session_quest_master()
+    
+    # Header Section
+    render_html('<div class="medieval-header">⚔️ Quest Master ⚔️</div>')
+    render_html('<div class="medieval-subtitle">"Forge your destiny through valorous deeds and noble quests"</div>')
+    render_html('<div class="scroll-divider"></div>')
+    
+    # Task Creation Form
+    render_creation_form(quest_master)
+    
+    render_html('<div class="scroll-divider"></div>')
+    
+    # Search
+    render_search(quest_master)
+    
+    render_html('<div class="scroll-divider"></div>')
+    
+    # Task Categories Display
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        TASK_COLUMN_FRAGMENTS['boss']('boss', quest_master)
+    
+    with col2:
+        TASK_COLUMN_FRAGMENTS['quest']('quest', quest_master)
+    
+    with col3:
+        TASK_COLUMN_FRAGMENTS['training']('training', quest_master)
+    
+    render_page_size_control("tasks", TASK_COLUMNS, [column_fragment(c) for c in TASK_COLUMNS])
+    
+    render_html('<div class="scroll-divider"></div>')
+    
+    # Stats Panel
+    render_stats_panel(quest_master)
+    
+    render_html('<div class="scroll-divider"></div>')
+    
+    # Hall of Victories (Achievement Gallery)
+    render_hall_of_victories(quest_master)
+    
+    render_html('<div class="scroll-divider"></div>')
+    
+    # Render cache effectiveness, tucked away in the (collapsed) sidebar
+    cache_stats = get_card_html_cache().stats()
+    st.sidebar.caption(
+        f"🗃️ Card cache: {cache_stats['hits']:,} hits · {cache_stats['misses']:,} misses · "
+        f"{cache_stats['evictions']:,} evictions ({cache_stats['size']:,}/{cache_stats['maxsize']:,})"
+    )
+    
+    render_bulk_tools(quest_master)
+    
+    # Footer
+    render_html("""
+    <div style="text-align: center; margin-top: 3rem; padding: 2rem; background: rgba(47, 27, 20, 0.5); border-top: 2px solid #DAA520; border-radius: 15px;">
+        <div class="scroll-divider" style="width: 200px;"></div>
+        <p style="font-family: 'Cinzel', serif; color: #DAA520; margin: 2rem 0 1rem 0; font-size: 1.1rem;">
+            "May your quests be legendary and your victories eternal"
+        </p>
+        <small style="color: #888;">Quest Master RPG Task Manager © 2024</small>
+    </div>
+    """)
+
+def main(started: float = None):
+    """Render the page; ``started`` is when the entry script began running
+
+    The time from there to here (Streamlit and page imports on a cold
+    start, next to nothing on a rerun) is recorded as ``main.entry``, and a
+    session's first complete run as ``main.first_paint``.
+    """
+    started = started if started is not None else time.perf_counter()
+    metrics.start_run()
+    metrics.record("main.entry", time.perf_counter() - started)
+    with metrics.span("main"):
+        render_page()
+    if 'first_paint' not in st.session_state:
+        st.session_state.first_paint = time.perf_counter() - started
+        metrics.record("main.first_paint", st.session_state.first_paint, in_run=False)
+    render_profile_panel()
+    metrics.finish_run()
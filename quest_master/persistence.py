@@ -0,0 +1,873 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from quest_master.search import TITLE_WEIGHT, tokenize
+
+# Mutation events written to the log. Payloads are plain dicts so the backend
+# never needs to know about the Task/Achievement classes.
+CREATE_TASK = 'create_task'
+COMPLETE_TASK = 'complete_task'
+DELETE_TASK = 'delete_task'
+DELETE_ACHIEVEMENT = 'delete_achievement'
+ADD_ACHIEVEMENT = 'add_achievement'
+SAVE_TEMPLATE = 'save_template'
+DELETE_TEMPLATE = 'delete_template'
+TEMPLATE_EVENTS = (SAVE_TEMPLATE, DELETE_TEMPLATE)
+
+DEFAULT_DB_PATH = 'quest_master.db'
+DEFAULT_USER = 'default'
+
+# How writes reach the disk. 'sync': each mutation waits until its batch is
+# committed and fsynced. 'batched': mutations return at once and a background
+# thread commits whatever has queued up as soon as it can. 'interval': the
+# thread commits every QUEST_MASTER_FLUSH_INTERVAL seconds instead, trading a
+# wider window of loss on a crash for fewer, larger transactions.
+SYNC = 'sync'
+BATCHED = 'batched'
+INTERVAL = 'interval'
+DURABILITY_MODES = (SYNC, BATCHED, INTERVAL)
+DEFAULT_DURABILITY = BATCHED
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+# History category of achievement events, next to the task categories (the
+# same key search.ACHIEVEMENT files achievements under)
+ACHIEVEMENT = 'achievement'
+
+# The snapshot tables are keyed by (user_id, id), so two players holding a
+# record with the same id never share a row. Achievements copy completed_at
+# out of the JSON so the Hall can be paged newest first by index. ``history``
+# and ``rollups`` are appended to and updated in the same transaction as
+# ``events``, and compaction never touches them. So are ``achievement_docs``
+# and the full-text ``achievement_text`` index over their titles and
+# descriptions (one row each, sharing the rowid), so lazily held achievements
+# can be searched in storage; the tokenizer splits words the way
+# search.tokenize does.
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        user_id TEXT NOT NULL, id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL,
+        PRIMARY KEY (user_id, id));
+    CREATE TABLE IF NOT EXISTS achievements (
+        user_id TEXT NOT NULL, id TEXT NOT NULL, seq INTEGER NOT NULL, completed_at TEXT, data TEXT NOT NULL,
+        PRIMARY KEY (user_id, id));
+    CREATE TABLE IF NOT EXISTS templates (
+        user_id TEXT NOT NULL, id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL,
+        PRIMARY KEY (user_id, id));
+    CREATE TABLE IF NOT EXISTS events (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, op TEXT NOT NULL, data TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS achievements_by_completion ON achievements (user_id, completed_at, id);
+    CREATE INDEX IF NOT EXISTS tasks_by_user ON tasks (user_id, seq);
+    CREATE INDEX IF NOT EXISTS achievements_by_user ON achievements (user_id, seq);
+    CREATE INDEX IF NOT EXISTS events_by_user ON events (user_id, seq);
+    CREATE INDEX IF NOT EXISTS templates_by_user ON templates (user_id, seq);
+    CREATE TABLE IF NOT EXISTS history (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, day TEXT NOT NULL,
+        at TEXT NOT NULL, op TEXT NOT NULL, data TEXT NOT NULL);
+    CREATE INDEX IF NOT EXISTS history_by_day ON history (user_id, day, seq);
+    CREATE INDEX IF NOT EXISTS history_created_tasks ON history (user_id, json_extract(data, '$.id'))
+        WHERE op = 'create_task';
+    CREATE TABLE IF NOT EXISTS rollups (
+        user_id TEXT NOT NULL, day TEXT NOT NULL, category TEXT NOT NULL,
+        created INTEGER NOT NULL DEFAULT 0, completed INTEGER NOT NULL DEFAULT 0,
+        deleted INTEGER NOT NULL DEFAULT 0, xp INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, category)) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS achievement_docs (
+        doc INTEGER PRIMARY KEY, user_id TEXT NOT NULL, id TEXT NOT NULL, completed_at TEXT NOT NULL,
+        data TEXT NOT NULL, UNIQUE (user_id, id));
+    CREATE INDEX IF NOT EXISTS achievement_docs_by_completion ON achievement_docs (user_id, completed_at, id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS achievement_text USING fts5(
+        title, description, tokenize="unicode61 remove_diacritics 0 tokenchars '_'");
+"""
+
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+
+
+class HistoryEntry(NamedTuple):
+    """What one mutation event contributes to the history rollups"""
+    at: str          # ISO timestamp of the change
+    category: str    # task category, or ACHIEVEMENT
+    created: int
+    completed: int
+    deleted: int
+    xp: int
+
+    @property
+    def day(self) -> str:
+        return self.at[:10]
+
+
+def history_entry(op: str, data: Dict[str, Any]) -> Optional[HistoryEntry]:
+    """Classify one logged event for the history log and its rollups (None for schedule changes)
+
+    XP is credited when it is earned: by every task completion (boss fights
+    included, so their achievement adds nothing on top) and by achievements
+    imported without a completion. Deleting an achievement removes the badge
+    but not the XP already earned.
+    """
+    at = data.get('at') or datetime.now().isoformat()
+    if op == CREATE_TASK:
+        return HistoryEntry(data['created_at'], data['category'], 1, 0, 0, 0)
+    if op == COMPLETE_TASK:
+        return HistoryEntry(at, data.get('category', ''), 0, 1, 0, data.get('xp', 0))
+    if op == DELETE_TASK:
+        return HistoryEntry(at, data.get('category', ''), 0, 0, 1, 0)
+    if op == ADD_ACHIEVEMENT:
+        return HistoryEntry(data['completed_at'], ACHIEVEMENT, 1, 0, 0, data['xp_earned'])
+    if op == DELETE_ACHIEVEMENT:
+        return HistoryEntry(at, ACHIEVEMENT, 0, 0, 1, 0)
+    if op in TEMPLATE_EVENTS:
+        return None
+    raise ValueError(f"Unknown event type: {op}")
+
+
+def replay(tasks: Dict[str, dict], achievements: Dict[str, dict], op: str, data: Dict[str, Any],
+           templates: Optional[Dict[str, dict]] = None):
+    """Apply one logged event to id-keyed task, achievement and (if given) template dicts"""
+    if op == CREATE_TASK:
+        tasks[data['id']] = data
+    elif op == COMPLETE_TASK:
+        tasks.pop(data['id'], None)
+        if data.get('achievement'):
+            achievements[data['achievement']['id']] = data['achievement']
+    elif op == DELETE_TASK:
+        tasks.pop(data['id'], None)
+    elif op == DELETE_ACHIEVEMENT:
+        achievements.pop(data['id'], None)
+    elif op == ADD_ACHIEVEMENT:
+        achievements[data['id']] = data
+    elif op == SAVE_TEMPLATE:
+        if templates is not None:
+            templates[data['id']] = data
+    elif op == DELETE_TEMPLATE:
+        if templates is not None:
+            templates.pop(data['id'], None)
+    else:
+        raise ValueError(f"Unknown event type: {op}")
+
+
+# Events that change each kind of record, for reading the uncompacted log tail
+TAIL_EVENTS = {
+    'tasks': (CREATE_TASK, COMPLETE_TASK, DELETE_TASK),
+    'achievements': (COMPLETE_TASK, ADD_ACHIEVEMENT, DELETE_ACHIEVEMENT),
+}
+
+
+class _Touched(dict):
+    """Id-keyed dict for replay() that keeps removed ids, mapped to None"""
+
+    def pop(self, key, default=None):
+        self[key] = None
+        return default
+
+
+class StorageBackend:
+    """Interface QuestMaster.load_data/save_data talk to
+
+    Every call is scoped to a player id so one backend can hold many players'
+    data side by side.
+    """
+
+    # Whether page_achievements and friends query storage directly; the
+    # generic versions below load everything, so lazy achievement views are
+    # only worth using when this is set
+    pages_achievements = False
+
+    def load(self, user_id: str = DEFAULT_USER) -> Tuple[List[dict], List[dict]]:
+        """Return (tasks, achievements) as dicts, in insertion order"""
+        raise NotImplementedError
+
+    def append(self, op: str, data: Dict[str, Any], user_id: str = DEFAULT_USER):
+        """Durably record one mutation event"""
+        raise NotImplementedError
+
+    def append_many(self, events: Iterable[Tuple[str, Dict[str, Any]]], user_id: str = DEFAULT_USER):
+        """Record a batch of mutation events"""
+        for op, data in events:
+            self.append(op, data, user_id)
+
+    def append_batch(self, events: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        """Record (user_id, op, data) events for any number of players"""
+        for user_id, op, data in events:
+            self.append(op, data, user_id)
+
+    def iter_records(self, kind: str, user_id: str = DEFAULT_USER) -> Iterator[dict]:
+        """Stream stored 'tasks' or 'achievements' without loading them all"""
+        tasks, achievements = self.load(user_id)
+        return iter(tasks if kind == 'tasks' else achievements)
+
+    def page_achievements(self, limit: int, before: Optional[Tuple[str, str]] = None,
+                          user_id: str = DEFAULT_USER) -> List[dict]:
+        """Up to ``limit`` achievements, newest first by (completed_at, id), all older than ``before``"""
+        ordered = sorted(self.load(user_id)[1], key=lambda a: (a['completed_at'], a['id']), reverse=True)
+        if before is not None:
+            ordered = [a for a in ordered if (a['completed_at'], a['id']) < tuple(before)]
+        return ordered[:limit]
+
+    def get_achievement(self, achievement_id: str, user_id: str = DEFAULT_USER) -> Optional[dict]:
+        """One stored achievement by id"""
+        return next((a for a in self.load(user_id)[1] if a['id'] == achievement_id), None)
+
+    def count_records(self, kind: str, user_id: str = DEFAULT_USER) -> int:
+        """Number of stored 'tasks' or 'achievements'"""
+        return sum(1 for _ in self.iter_records(kind, user_id))
+
+    def search_achievements(self, terms: List[str], since: Optional[str] = None, until: Optional[str] = None,
+                            limit: int = 50, user_id: str = DEFAULT_USER) -> Tuple[int, List[dict]]:
+        """Count stored achievements completed between two inclusive days with every term in their text, and return the best ``limit``
+
+        A term matches a title or description word, or with a trailing ``*``
+        any word it prefixes. Without terms every achievement in range
+        matches, newest first; with them the order is the backend's own
+        relevance ranking (here, newest first too).
+        """
+        matches = []
+        for data in sorted(self.load(user_id)[1], key=lambda a: (a['completed_at'], a['id']), reverse=True):
+            day = data['completed_at'][:10]
+            if (since and day < since) or (until and day > until):
+                continue
+            words = tokenize(f"{data['title']} {data['description']}")
+            if all(any(word.startswith(term[:-1]) if term.endswith('*') else word == term for word in words)
+                   for term in terms):
+                matches.append(data)
+        return len(matches), matches[:limit]
+
+    def created_tasks(self, task_ids: Iterable[str], user_id: str = DEFAULT_USER) -> Dict[str, dict]:
+        """The data each of these tasks was created with, for those ever created, even if since completed or deleted"""
+        wanted = set(task_ids)
+        created: Dict[str, dict] = {}
+        for _, op, data in self.iter_history(user_id):
+            if op == CREATE_TASK and data['id'] in wanted:
+                created.setdefault(data['id'], data)
+        return created
+
+    def load_rollups(self, user_id: str = DEFAULT_USER) -> List[Tuple[str, str, int, int, int, int]]:
+        """Stored daily totals as (day, category, created, completed, deleted, xp) rows"""
+        return []
+
+    def load_templates(self, user_id: str = DEFAULT_USER) -> List[dict]:
+        """Stored recurring and scheduled quest templates"""
+        return []
+
+    def iter_history(self, user_id: str = DEFAULT_USER, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Stream (timestamp, op, data) history events between two inclusive days, oldest first"""
+        return iter(())
+
+    def compact(self):
+        """Fold logged events into the snapshot"""
+
+    def flush(self):
+        """Wait until every accepted event is durably stored"""
+
+    def close(self):
+        """Release any held resources"""
+
+
+class MemoryBackend(StorageBackend):
+    """Session-only storage: nothing survives a server restart"""
+
+    def load(self, user_id: str = DEFAULT_USER) -> Tuple[List[dict], List[dict]]:
+        return [], []
+
+    def append(self, op: str, data: Dict[str, Any], user_id: str = DEFAULT_USER):
+        pass
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite snapshot tables plus an append-only event log
+
+    Every mutation is a single INSERT into ``events``. Once ``compact_every``
+    events have accumulated, the log tail is folded into the ``tasks`` and
+    ``achievements`` snapshot tables inside one transaction and truncated, so
+    compaction cost is proportional to the tail rather than the whole dataset.
+    Loading reads the snapshot and replays whatever tail is left, and paged
+    reads and counts lay the tail over the snapshot the same way, so reading
+    never compacts.
+
+    Every event is also written, in the same transaction, to ``history``: an
+    append-only log that compaction never touches, indexed by player and day
+    so a time window is one contiguous index range. Each write folds the
+    events into ``rollups`` as well, daily created/completed/deleted counts and
+    XP per category, so analytics read a few rows per day instead of
+    rescanning years of history.
+
+    A write only raises if its events were not stored. Compaction failing
+    after the commit is logged and retried by the next write, so a caller
+    retrying a failed append never stores its events twice.
+
+    All rows carry a ``user_id``, and the snapshot tables are keyed by
+    (user_id, id), so players may hold records with the same id. Writes go
+    through one shared connection (SQLite allows a single writer at a time);
+    reads borrow a connection from a small pool, which WAL mode lets run
+    alongside the writer.
+    """
+
+    pages_achievements = True
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, compact_every: int = 1000, pool_size: int = 4,
+                 synchronous: str = 'NORMAL'):
+        self.path = path
+        self.compact_every = compact_every
+        self.synchronous = synchronous
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._readers: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue(maxsize=pool_size)
+        self._pending = self._conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        # NORMAL only syncs the WAL at checkpoints; FULL fsyncs every commit
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        return conn
+
+    def _write_events(self, conn: sqlite3.Connection, events: List[Tuple[str, str, Dict[str, Any]]]):
+        """Log (user_id, op, data) events, extend the history and fold them into the rollups, in one transaction"""
+        history = []
+        totals: Dict[Tuple[str, str, str], List[int]] = {}
+        logged = []
+        docs = []
+        for user_id, op, data in events:
+            raw = _dumps(data)
+            logged.append((user_id, op, raw))
+            if op == ADD_ACHIEVEMENT:
+                docs.append((user_id, data['id'], data))
+            elif op == COMPLETE_TASK and data.get('achievement'):
+                docs.append((user_id, data['achievement']['id'], data['achievement']))
+            elif op == DELETE_ACHIEVEMENT:
+                docs.append((user_id, data['id'], None))
+            entry = history_entry(op, data)
+            if entry is None:
+                continue
+            history.append((user_id, entry.day, entry.at, op, raw))
+            counts = totals.setdefault((user_id, entry.day, entry.category), [0, 0, 0, 0])
+            counts[0] += entry.created
+            counts[1] += entry.completed
+            counts[2] += entry.deleted
+            counts[3] += entry.xp
+        conn.execute('BEGIN')
+        try:
+            conn.executemany('INSERT INTO events (user_id, op, data) VALUES (?, ?, ?)', logged)
+            conn.executemany('INSERT INTO history (user_id, day, at, op, data) VALUES (?, ?, ?, ?, ?)',
+                             history)
+            conn.executemany(
+                'INSERT INTO rollups (user_id, day, category, created, completed, deleted, xp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (user_id, day, category) DO UPDATE SET '
+                'created = created + excluded.created, completed = completed + excluded.completed, '
+                'deleted = deleted + excluded.deleted, xp = xp + excluded.xp',
+                [(*key, *counts) for key, counts in totals.items()])
+            for user_id, achievement_id, data in docs:
+                self._write_doc(conn, user_id, achievement_id, data)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _write_doc(conn: sqlite3.Connection, user_id: str, achievement_id: str, data: Optional[Dict[str, Any]]):
+        """Replace (or with None, drop) one achievement's searchable copy"""
+        row = conn.execute('SELECT doc FROM achievement_docs WHERE user_id = ? AND id = ?',
+                           (user_id, achievement_id)).fetchone()
+        if row is not None:
+            conn.execute('DELETE FROM achievement_docs WHERE doc = ?', row)
+            conn.execute('DELETE FROM achievement_text WHERE rowid = ?', row)
+        if data is not None:
+            doc = conn.execute('INSERT INTO achievement_docs (user_id, id, completed_at, data) VALUES (?, ?, ?, ?)',
+                               (user_id, achievement_id, data['completed_at'], _dumps(data))).lastrowid
+            conn.execute('INSERT INTO achievement_text (rowid, title, description) VALUES (?, ?, ?)',
+                         (doc, data['title'], data['description']))
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled read connection"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def load(self, user_id: str = DEFAULT_USER) -> Tuple[List[dict], List[dict]]:
+        with self._reader() as conn:
+            # One read transaction so the snapshot and log tail are consistent
+            conn.execute('BEGIN')
+            try:
+                tasks = {row[0]: json.loads(row[1]) for row in conn.execute(
+                    'SELECT id, data FROM tasks WHERE user_id = ? ORDER BY seq', (user_id,))}
+                achievements = {row[0]: json.loads(row[1]) for row in conn.execute(
+                    'SELECT id, data FROM achievements WHERE user_id = ? ORDER BY seq', (user_id,))}
+                for op, data in conn.execute(
+                        'SELECT op, data FROM events WHERE user_id = ? ORDER BY seq', (user_id,)):
+                    replay(tasks, achievements, op, json.loads(data))
+            finally:
+                conn.execute('COMMIT')
+        return list(tasks.values()), list(achievements.values())
+
+    def append(self, op: str, data: Dict[str, Any], user_id: str = DEFAULT_USER):
+        self.append_many([(op, data)], user_id)
+
+    def append_many(self, events: Iterable[Tuple[str, Dict[str, Any]]], user_id: str = DEFAULT_USER):
+        self.append_batch((user_id, op, data) for op, data in events)
+
+    def append_batch(self, events: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        events = list(events)
+        if not events:
+            return
+        with self._lock:
+            self._write_events(self._conn, events)
+            self._pending += len(events)
+            if self._pending >= self.compact_every:
+                try:
+                    self._compact_locked()
+                except Exception:
+                    # The events are committed and stay in the log, so the
+                    # write succeeded; the next one tries compacting again
+                    logger.exception("Compacting %d logged events failed", self._pending)
+
+    def iter_records(self, kind: str, user_id: str = DEFAULT_USER) -> Iterator[dict]:
+        # Stream the snapshot in batches on a pooled reader while writers keep
+        # using the shared connection, then what the log tail adds
+        with self._reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                touched = self._tail(conn, kind, user_id)
+                cursor = conn.execute(f'SELECT id, data FROM {kind} WHERE user_id = ? ORDER BY seq', (user_id,))
+                while True:
+                    rows = cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    for record_id, data in rows:
+                        if record_id not in touched:
+                            yield json.loads(data)
+            finally:
+                conn.execute('COMMIT')
+        yield from (data for data in touched.values() if data is not None)
+
+    def load_rollups(self, user_id: str = DEFAULT_USER) -> List[Tuple[str, str, int, int, int, int]]:
+        with self._reader() as conn:
+            return conn.execute('SELECT day, category, created, completed, deleted, xp FROM rollups '
+                                'WHERE user_id = ? ORDER BY day', (user_id,)).fetchall()
+
+    def load_templates(self, user_id: str = DEFAULT_USER) -> List[dict]:
+        with self._reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                templates = {row[0]: json.loads(row[1]) for row in conn.execute(
+                    'SELECT id, data FROM templates WHERE user_id = ? ORDER BY seq', (user_id,))}
+                for op, data in conn.execute(
+                        'SELECT op, data FROM events WHERE user_id = ? AND op IN (?, ?) ORDER BY seq',
+                        (user_id, *TEMPLATE_EVENTS)):
+                    replay({}, {}, op, json.loads(data), templates)
+            finally:
+                conn.execute('COMMIT')
+        return list(templates.values())
+
+    def iter_history(self, user_id: str = DEFAULT_USER, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        with self._reader() as conn:
+            cursor = conn.execute('SELECT at, op, data FROM history WHERE user_id = ? AND day >= ? '
+                                  'AND day <= ? ORDER BY day, seq',
+                                  (user_id, since or '', until or '\uffff'))
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for at, op, data in rows:
+                    yield at, op, json.loads(data)
+
+    def page_achievements(self, limit: int, before: Optional[Tuple[str, str]] = None,
+                          user_id: str = DEFAULT_USER) -> List[dict]:
+        with self._reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                touched = self._tail(conn, 'achievements', user_id)
+                # Snapshot rows the tail replaced or removed are skipped, so
+                # read that many more to still fill the page
+                if before is None:
+                    rows = conn.execute('SELECT id, data FROM achievements WHERE user_id = ? '
+                                        'ORDER BY completed_at DESC, id DESC LIMIT ?',
+                                        (user_id, limit + len(touched)))
+                else:
+                    rows = conn.execute('SELECT id, data FROM achievements WHERE user_id = ? '
+                                        'AND (completed_at, id) < (?, ?) ORDER BY completed_at DESC, id DESC LIMIT ?',
+                                        (user_id, *before, limit + len(touched)))
+                page = [json.loads(data) for record_id, data in rows if record_id not in touched]
+            finally:
+                conn.execute('COMMIT')
+        page.extend(data for data in touched.values() if data is not None and
+                    (before is None or (data['completed_at'], data['id']) < tuple(before)))
+        page.sort(key=lambda a: (a['completed_at'], a['id']), reverse=True)
+        return page[:limit]
+
+    def get_achievement(self, achievement_id: str, user_id: str = DEFAULT_USER) -> Optional[dict]:
+        with self._reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                touched = self._tail(conn, 'achievements', user_id)
+                if achievement_id in touched:
+                    return touched[achievement_id]
+                row = conn.execute('SELECT data FROM achievements WHERE id = ? AND user_id = ?',
+                                   (achievement_id, user_id)).fetchone()
+            finally:
+                conn.execute('COMMIT')
+        return None if row is None else json.loads(row[0])
+
+    def count_records(self, kind: str, user_id: str = DEFAULT_USER) -> int:
+        with self._reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                touched = self._tail(conn, kind, user_id)
+                count = conn.execute(f'SELECT COUNT(*) FROM {kind} WHERE user_id = ?', (user_id,)).fetchone()[0]
+                ids = list(touched)
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    count -= conn.execute(f"SELECT COUNT(*) FROM {kind} WHERE user_id = ? "
+                                          f"AND id IN ({', '.join('?' * len(chunk))})",
+                                          (user_id, *chunk)).fetchone()[0]
+            finally:
+                conn.execute('COMMIT')
+        return count + sum(1 for data in touched.values() if data is not None)
+
+    def created_tasks(self, task_ids: Iterable[str], user_id: str = DEFAULT_USER) -> Dict[str, dict]:
+        ids = list(dict.fromkeys(task_ids))
+        created: Dict[str, dict] = {}
+        with self._reader() as conn:
+            # Matches the partial history_created_tasks index, so each id is one lookup
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                for task_id, data in conn.execute(
+                        f"SELECT json_extract(data, '$.id'), data FROM history WHERE op = '{CREATE_TASK}' "
+                        f"AND user_id = ? AND json_extract(data, '$.id') IN ({', '.join('?' * len(chunk))}) "
+                        f"ORDER BY seq", (user_id, *chunk)):
+                    created.setdefault(task_id, json.loads(data))
+        return created
+
+    def search_achievements(self, terms: List[str], since: Optional[str] = None, until: Optional[str] = None,
+                            limit: int = 50, user_id: str = DEFAULT_USER) -> Tuple[int, List[dict]]:
+        # Days compare as prefixes of completed_at, so the range stays on the index
+        days = (user_id, since or '', (until or '\uffff') + '\uffff')
+        if terms:
+            match = ' AND '.join(f'"{term.rstrip("*")}"' + ('*' if term.endswith('*') else '') for term in terms)
+            source = ('FROM achievement_text JOIN achievement_docs ON doc = achievement_text.rowid '
+                      'WHERE achievement_text MATCH ? AND user_id = ? AND completed_at >= ? AND completed_at <= ?')
+            params: Tuple[Any, ...] = (match, *days)
+            order = f'bm25(achievement_text, {TITLE_WEIGHT}, 1)'
+        else:
+            source = 'FROM achievement_docs WHERE user_id = ? AND completed_at >= ? AND completed_at <= ?'
+            params = days
+            order = 'completed_at DESC, id DESC'
+        with self._reader() as conn:
+            conn.execute('BEGIN')
+            try:
+                total = conn.execute(f'SELECT COUNT(*) {source}', params).fetchone()[0]
+                rows = conn.execute(f'SELECT data {source} ORDER BY {order} LIMIT ?', (*params, limit)).fetchall()
+            finally:
+                conn.execute('COMMIT')
+        return total, [json.loads(data) for data, in rows]
+
+    def _tail(self, conn: sqlite3.Connection, kind: str, user_id: str) -> Dict[str, Optional[dict]]:
+        """Latest state of each 'tasks' or 'achievements' record the uncompacted log touches
+
+        Maps record ids to their data, or to None once removed, so reads can
+        lay the tail over the snapshot instead of compacting first. Call
+        inside the read transaction that also reads the snapshot.
+        """
+        if kind not in TAIL_EVENTS:
+            raise ValueError(f"Unknown record kind: {kind}")
+        ops = TAIL_EVENTS[kind]
+        tasks, achievements = _Touched(), _Touched()
+        for op, data in conn.execute(f"SELECT op, data FROM events WHERE user_id = ? "
+                                     f"AND op IN ({', '.join('?' * len(ops))}) ORDER BY seq", (user_id, *ops)):
+            replay(tasks, achievements, op, json.loads(data))
+        return tasks if kind == 'tasks' else achievements
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute('SELECT seq, user_id, op, data FROM events ORDER BY seq').fetchall()
+            for seq, user_id, op, raw in rows:
+                data = json.loads(raw)
+                # Rows are keyed by (user_id, id): every write names the player
+                if op == CREATE_TASK:
+                    conn.execute('INSERT OR REPLACE INTO tasks (id, user_id, seq, data) VALUES (?, ?, ?, ?)',
+                                 (data['id'], user_id, seq, raw))
+                elif op == COMPLETE_TASK:
+                    conn.execute('DELETE FROM tasks WHERE id = ? AND user_id = ?', (data['id'], user_id))
+                    achievement = data.get('achievement')
+                    if achievement:
+                        conn.execute('INSERT OR REPLACE INTO achievements (id, user_id, seq, completed_at, data) '
+                                     'VALUES (?, ?, ?, ?, ?)', (achievement['id'], user_id, seq,
+                                                                achievement['completed_at'], _dumps(achievement)))
+                elif op == DELETE_TASK:
+                    conn.execute('DELETE FROM tasks WHERE id = ? AND user_id = ?', (data['id'], user_id))
+                elif op == DELETE_ACHIEVEMENT:
+                    conn.execute('DELETE FROM achievements WHERE id = ? AND user_id = ?', (data['id'], user_id))
+                elif op == ADD_ACHIEVEMENT:
+                    conn.execute('INSERT OR REPLACE INTO achievements (id, user_id, seq, completed_at, data) '
+                                 'VALUES (?, ?, ?, ?, ?)', (data['id'], user_id, seq, data['completed_at'], raw))
+                elif op == SAVE_TEMPLATE:
+                    conn.execute('INSERT OR REPLACE INTO templates (id, user_id, seq, data) '
+                                 'VALUES (?, ?, ?, ?)', (data['id'], user_id, seq, raw))
+                elif op == DELETE_TEMPLATE:
+                    conn.execute('DELETE FROM templates WHERE id = ? AND user_id = ?', (data['id'], user_id))
+            if rows:
+                conn.execute('DELETE FROM events WHERE seq <= ?', (rows[-1][0],))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class WriteBehindBackend(StorageBackend):
+    """Hands writes to a background thread so mutations never wait on storage I/O
+
+    ``append`` and ``append_many`` only queue their events. A worker thread
+    drains the queue and passes everything that piled up in the meantime to
+    the wrapped backend's ``append_batch``, so a burst of clicks from any
+    number of sessions becomes one transaction. ``durability`` (one of
+    DURABILITY_MODES) decides when the worker writes and whether callers wait
+    for it. Reads flush the queue first so they always see every write, and
+    closing the backend, which also happens at interpreter exit, flushes it
+    too.
+
+    A failed write is logged and retried with backoff; its events stay at the
+    front of the queue, in order, until it succeeds.
+    """
+
+    max_retries_on_close = 5
+
+    @property
+    def pages_achievements(self) -> bool:
+        return self.backend.pages_achievements
+
+    def __init__(self, backend: StorageBackend, durability: str = DEFAULT_DURABILITY,
+                 interval: float = DEFAULT_FLUSH_INTERVAL, max_batch: int = 5000):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}, got {durability!r}")
+        self.backend = backend
+        self.durability = durability
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue: List[Tuple[str, str, Dict[str, Any]]] = []
+        self._accepted = 0      # events queued since start
+        self._written = 0       # of those, events the wrapped backend has stored
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name='quest-master-writer', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def append(self, op: str, data: Dict[str, Any], user_id: str = DEFAULT_USER):
+        self.append_batch([(user_id, op, data)])
+
+    def append_many(self, events: Iterable[Tuple[str, Dict[str, Any]]], user_id: str = DEFAULT_USER):
+        self.append_batch((user_id, op, data) for op, data in events)
+
+    def append_batch(self, events: Iterable[Tuple[str, str, Dict[str, Any]]]):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind backend is closed")
+            queued = len(self._queue)
+            self._queue.extend(events)
+            if len(self._queue) == queued:
+                return
+            self._accepted += len(self._queue) - queued
+            if self.durability != INTERVAL or len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+            if self.durability == SYNC:
+                self._wait_for(self._accepted)
+
+    def flush(self):
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._wait_for(self._accepted)
+        self.backend.flush()
+
+    def _wait_for(self, target: int):
+        """Block until the first ``target`` events are written (call holding the condition)"""
+        while self._written < target:
+            if not self._worker.is_alive():
+                raise RuntimeError(f"{self._accepted - self._written} queued events were not written")
+            self._cond.wait(1.0)
+
+    def _next_batch(self) -> Optional[List[Tuple[str, str, Dict[str, Any]]]]:
+        """Wait for the next batch to write; None once closed and drained"""
+        with self._cond:
+            if self.durability == INTERVAL:
+                deadline = time.monotonic() + self.interval
+                while not (self._closed or self._flush_requested or len(self._queue) >= self.max_batch):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            else:
+                while not (self._queue or self._closed):
+                    self._cond.wait()
+            if not self._queue:
+                self._flush_requested = False
+                return None if self._closed else []
+            batch = self._queue[:self.max_batch]
+            del self._queue[:len(batch)]
+            return batch
+
+    def _run(self):
+        failures = 0
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            try:
+                self.backend.append_batch(batch)
+            except Exception:
+                failures += 1
+                logger.exception("Writing %d queued events failed (attempt %d)", len(batch), failures)
+                with self._cond:
+                    self._queue[:0] = batch
+                    if self._closed and failures >= self.max_retries_on_close:
+                        return
+                time.sleep(min(0.1 * 2 ** failures, 5.0))
+                continue
+            failures = 0
+            with self._cond:
+                self._written += len(batch)
+                if not self._queue:
+                    self._flush_requested = False
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        """Events accepted but not yet written"""
+        with self._cond:
+            return self._accepted - self._written
+
+    def load(self, user_id: str = DEFAULT_USER) -> Tuple[List[dict], List[dict]]:
+        self.flush()
+        return self.backend.load(user_id)
+
+    def iter_records(self, kind: str, user_id: str = DEFAULT_USER) -> Iterator[dict]:
+        self.flush()
+        return self.backend.iter_records(kind, user_id)
+
+    def load_rollups(self, user_id: str = DEFAULT_USER) -> List[Tuple[str, str, int, int, int, int]]:
+        self.flush()
+        return self.backend.load_rollups(user_id)
+
+    def load_templates(self, user_id: str = DEFAULT_USER) -> List[dict]:
+        self.flush()
+        return self.backend.load_templates(user_id)
+
+    def page_achievements(self, limit: int, before: Optional[Tuple[str, str]] = None,
+                          user_id: str = DEFAULT_USER) -> List[dict]:
+        self.flush()
+        return self.backend.page_achievements(limit, before, user_id)
+
+    def get_achievement(self, achievement_id: str, user_id: str = DEFAULT_USER) -> Optional[dict]:
+        self.flush()
+        return self.backend.get_achievement(achievement_id, user_id)
+
+    def count_records(self, kind: str, user_id: str = DEFAULT_USER) -> int:
+        self.flush()
+        return self.backend.count_records(kind, user_id)
+
+    def created_tasks(self, task_ids: Iterable[str], user_id: str = DEFAULT_USER) -> Dict[str, dict]:
+        self.flush()
+        return self.backend.created_tasks(task_ids, user_id)
+
+    def search_achievements(self, terms: List[str], since: Optional[str] = None, until: Optional[str] = None,
+                            limit: int = 50, user_id: str = DEFAULT_USER) -> Tuple[int, List[dict]]:
+        self.flush()
+        return self.backend.search_achievements(terms, since, until, limit, user_id)
+
+    def iter_history(self, user_id: str = DEFAULT_USER, since: Optional[str] = None,
+                     until: Optional[str] = None) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        self.flush()
+        return self.backend.iter_history(user_id, since, until)
+
+    def compact(self):
+        self.flush()
+        self.backend.compact()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+        atexit.unregister(self.close)
+        if self._queue:
+            logger.error("%d queued events could not be written before closing", len(self._queue))
+        self.backend.close()
+
+
+def durability() -> str:
+    """Durability mode selected by the QUEST_MASTER_DURABILITY environment variable"""
+    mode = os.environ.get('QUEST_MASTER_DURABILITY', DEFAULT_DURABILITY).strip().lower()
+    if mode not in DURABILITY_MODES:
+        raise ValueError(f"QUEST_MASTER_DURABILITY must be one of {', '.join(DURABILITY_MODES)}, got {mode!r}")
+    return mode
+
+
+def flush_interval() -> float:
+    """Seconds between writes in 'interval' mode, from QUEST_MASTER_FLUSH_INTERVAL"""
+    return float(os.environ.get('QUEST_MASTER_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+
+
+def open_backend(path: Optional[str] = None) -> StorageBackend:
+    """Return the process-wide backend for ``path``
+
+    ``path`` defaults to the QUEST_MASTER_DB environment variable, falling back
+    to ``quest_master.db``. ``:memory:`` selects session-only storage. Database
+    writes go through a WriteBehindBackend configured by
+    QUEST_MASTER_DURABILITY and QUEST_MASTER_FLUSH_INTERVAL.
+    """
+    if path is None:
+        path = os.environ.get('QUEST_MASTER_DB', DEFAULT_DB_PATH)
+    return _open_backend(path, durability(), flush_interval())
+
+
+@lru_cache(maxsize=None)
+def _open_backend(path: str, mode: str, interval: float) -> StorageBackend:
+    if path == ':memory:':
+        return MemoryBackend()
+    # Only 'sync' promises each mutation is on disk, so only it pays for an
+    # fsync per commit
+    database = SQLiteBackend(path, synchronous='FULL' if mode == SYNC else 'NORMAL')
+    return WriteBehindBackend(database, mode, interval)
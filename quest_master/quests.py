@@ -0,0 +1,450 @@
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from quest_master import lazy, metrics, persistence, schedule
+from quest_master.aggregates import Aggregates
+from quest_master.history import Rollups
+from quest_master.icons import icon_classifier
+from quest_master.lazy import LazyAchievements
+from quest_master.leveling import LevelProgress, leveling
+from quest_master.models import XP_REWARDS, Achievement, QuestTemplate, Task, unpack_id
+from quest_master.search import ACHIEVEMENT
+from quest_master.service import DataService, PlayerData
+from quest_master.store import RecordStore
+
+# Namespace for record ids derived from a player and an idempotency key
+IDEMPOTENCY_NAMESPACE = uuid.UUID('0b7e4f3c-5d21-4a8e-b6c9-2f1d8a7e3c54')
+
+
+class VersionConflict(Exception):
+    """A mutation expected the player's data at a version it is no longer at"""
+
+    def __init__(self, expected: int, actual: int):
+        super().__init__(f"Expected data version {expected}, found {actual}")
+        self.expected = expected
+        self.actual = actual
+
+
+class QuestMaster:
+    """One player's quest log: every read and mutation the front ends perform
+
+    Holds no state of its own beyond which player it acts for; the records
+    live in the DataService's shared PlayerData and every change is logged
+    to the storage backend. The Streamlit page and the REST API
+    (quest_master/api.py) are both thin layers over this class.
+
+    Mutations run under the player's own lock, so players never wait on each
+    other and a task is removed (and its achievement minted) exactly once
+    however many tabs or requests race to complete it. Creates and
+    completions take an optional idempotency key: a repeat of a keyed call
+    returns the first call's result instead of acting again, and created
+    records get ids derived from the key. Any mutation can also be made a
+    compare-and-swap by passing the ``expected_version`` of the data it was
+    decided on; it then raises VersionConflict if anything changed since.
+    """
+
+    def __init__(self, service: DataService, user_id: str = persistence.DEFAULT_USER):
+        self.service = service
+        self.backend = self.service.backend
+        self.user_id = user_id
+        self.load_data()
+        self.materialize_due()
+
+    @metrics.timed()
+    def load_data(self):
+        """Attach to this player's shared data, loading it from storage on first use"""
+        self.data = self.service.player(self.user_id)
+
+    @contextmanager
+    def _mutation(self) -> Iterator[PlayerData]:
+        """Hold the player's lock for a mutation, re-attaching first if the data was evicted"""
+        while True:
+            data = self.data
+            with data.lock:
+                if not data.retired:
+                    yield data
+                    return
+            self.load_data()
+
+    def _check_version(self, expected_version: Optional[int]):
+        if expected_version is not None and expected_version != self.data.version:
+            raise VersionConflict(expected_version, self.data.version)
+
+    def _keyed_id(self, idempotency_key: str, *parts) -> str:
+        return str(uuid.uuid5(IDEMPOTENCY_NAMESPACE, '/'.join((self.user_id, idempotency_key) + parts)))
+
+    def save_data(self, op: str, data: dict):
+        """Append one mutation event to the storage backend's log"""
+        self.save_many([(op, data)])
+
+    def save_many(self, events):
+        """Append mutation events to the log in one transaction and fold them into the rollups"""
+        events = list(events)
+        if not events:
+            return
+        self.backend.append_many(events, self.user_id)
+        self.data.touch()
+        for op, data in events:
+            entry = persistence.history_entry(op, data)
+            if entry is not None:
+                self.data.rollups.apply(entry)
+
+    @property
+    def tasks(self) -> RecordStore:
+        return self.data.tasks
+
+    @property
+    def achievements(self) -> RecordStore:
+        return self.data.achievements
+
+    @property
+    def aggregates(self) -> Aggregates:
+        return self.data.aggregates
+
+    @property
+    def rollups(self) -> Rollups:
+        return self.data.rollups
+
+    @property
+    def level(self) -> LevelProgress:
+        """The player's level and progress towards the next, from their running XP total"""
+        return leveling().progress(self.data.rollups.total_xp)
+
+    @metrics.timed()
+    def task_window(self, category: str, limit: int) -> list:
+        """First ``limit`` tasks of a category, copied out under the player lock"""
+        with self.data.lock:
+            return self.data.tasks.window(0, limit, bucket=category)
+
+    @metrics.timed()
+    def achievement_window(self, limit: int) -> list:
+        """Newest ``limit`` achievements, copied out under the player lock"""
+        with self.data.lock:
+            return self.data.achievements.window(0, limit)
+
+    @metrics.timed()
+    def snapshot(self, kind: str) -> list:
+        """Copy of every task or achievement, taken under the player lock"""
+        with self.data.lock:
+            return list(self.data.tasks if kind == 'tasks' else self.data.achievements)
+
+    @metrics.timed()
+    def search(self, query: str, categories=None, since: str = None, until: str = None,
+               limit: int = 50):
+        """Ranked tasks and achievements matching a query; returns (total, records)"""
+        with self.data.lock:
+            if isinstance(self.data.achievements, LazyAchievements):
+                return lazy.search(self.data.search, self.data.tasks, self.data.achievements, query,
+                                   categories, since, until, limit)
+            total, hits = self.data.search.search(query, categories, since, until, limit)
+            records = []
+            for hit in hits:
+                store = self.data.achievements if hit.category == ACHIEVEMENT else self.data.tasks
+                record = store.get(unpack_id(hit.key))
+                if record is not None:
+                    records.append(record)
+        return total, records
+
+    @metrics.timed()
+    def check_aggregates(self) -> bool:
+        """Rebuild aggregates and the XP total from scratch; return whether the running ones matched
+
+        XP is earned by completions and imported achievements and survives
+        deleting the badge, so the total is rebuilt from the stored history
+        rollups when the backend keeps them. Without them it can only be
+        checked to cover the XP of the achievements still held.
+        """
+        with self.data.lock:
+            rebuilt = Aggregates.from_records(self.data.tasks)
+            consistent = rebuilt == self.data.aggregates
+            self.data.aggregates = rebuilt
+            stored = self.backend.load_rollups(self.user_id)
+            if stored:
+                rollups = Rollups.from_rows(stored)
+                if rollups.total_xp != self.data.rollups.total_xp:
+                    consistent = False
+                    self.data.rollups = rollups
+            elif self.data.rollups.total_xp < sum(a.xp_earned for a in self.data.achievements):
+                consistent = False
+        return consistent
+
+    def get_icon_for_boss(self, title: str) -> str:
+        """Generate achievement icons based on boss fight titles (rules in shared/icon-rules.json)"""
+        return icon_classifier().classify(title)
+
+    @metrics.timed()
+    def create_task(self, title: str, description: str, category: str, idempotency_key: str = None,
+                    expected_version: int = None):
+        """Create a new task"""
+        task = Task(
+            id=self._keyed_id(idempotency_key) if idempotency_key else str(uuid.uuid4()),
+            title=title,
+            description=description,
+            category=category,
+            xp_reward=XP_REWARDS[category],
+            created_at=datetime.now().isoformat()
+        )
+        with self._mutation():
+            if idempotency_key:
+                replay = self.data.recall(('create', idempotency_key)) or self._created([task])[0]
+                if replay is not task:
+                    return replay
+            self._check_version(expected_version)
+            self.data.tasks.add(task)
+            self.data.aggregates.task_added(task)
+            self.data.search.task_added(task)
+            self.save_data(persistence.CREATE_TASK, task.to_dict())
+            if idempotency_key:
+                self.data.remember(('create', idempotency_key), task)
+        return task
+
+    @metrics.timed()
+    def create_tasks(self, specs, idempotency_key: str = None, expected_version: int = None) -> list:
+        """Create a batch of tasks from (title, description, category) triples, persisted together"""
+        created_at = datetime.now().isoformat()
+        tasks = [Task(id=self._keyed_id(idempotency_key, str(i)) if idempotency_key else str(uuid.uuid4()),
+                      title=title, description=description, category=category,
+                      xp_reward=XP_REWARDS[category], created_at=created_at)
+                 for i, (title, description, category) in enumerate(specs)]
+        with self._mutation():
+            fresh = tasks
+            if idempotency_key:
+                replay = self.data.recall(('create_batch', idempotency_key))
+                if replay is not None:
+                    return replay
+                tasks = self._created(tasks)
+                fresh = [task for task, built in zip(tasks, fresh) if task is built]
+            self._check_version(expected_version)
+            self.insert_tasks(fresh)
+            if idempotency_key:
+                self.data.remember(('create_batch', idempotency_key), tasks)
+        return tasks
+
+    def _created(self, tasks: list) -> list:
+        """Each task as it was first created under its derived id, or itself if it never was
+
+        Past the remembered window, or after a restart, a keyed replay is only
+        recognised by its id: open tasks are found in memory, and tasks since
+        completed or deleted in the stored history, so they are not recreated
+        (and completed again for more XP).
+        """
+        missing = [task.id for task in tasks if task.id not in self.data.tasks]
+        created = self.backend.created_tasks(missing, self.user_id) if missing else {}
+        return [self.data.tasks.get(task.id) or (Task(**created[task.id]) if task.id in created else task)
+                for task in tasks]
+
+    @metrics.timed()
+    def schedule_task(self, title: str, description: str, category: str, cron: str = '',
+                      due_at: datetime = None, idempotency_key: str = None) -> QuestTemplate:
+        """Schedule a recurring quest (``cron``) or a one-off quest that appears at ``due_at``"""
+        now = datetime.now()
+        next_at = schedule.parse(cron).next_after(now) if cron else due_at
+        template = QuestTemplate(
+            id=self._keyed_id(idempotency_key) if idempotency_key else str(uuid.uuid4()),
+            title=title,
+            description=description,
+            category=category,
+            cron=cron,
+            next_at=next_at.isoformat(),
+            created_at=now.isoformat()
+        )
+        with self._mutation():
+            if idempotency_key:
+                replay = self.data.recall(('schedule', idempotency_key))
+                if replay is not None:
+                    return replay
+            self.data.schedule.add(template)
+            self.save_data(persistence.SAVE_TEMPLATE, template.to_dict())
+            if idempotency_key:
+                self.data.remember(('schedule', idempotency_key), template)
+        self.materialize_due()
+        return template
+
+    @metrics.timed()
+    def unschedule_task(self, template_id: str):
+        """Stop a recurring or scheduled quest (tasks it already created stay)"""
+        with self._mutation():
+            if self.data.schedule.remove(template_id):
+                self.save_data(persistence.DELETE_TEMPLATE, {'id': template_id})
+
+    @metrics.timed()
+    def materialize_due(self, now: datetime = None) -> list:
+        """Create the tasks of every template that has come due; returns them
+
+        Only templates at the top of the schedule's heap are looked at. Each
+        occurrence gets an id derived from its template and time, and the
+        template's advance is logged in the same batch as its tasks, so
+        catching up after downtime never creates an occurrence twice.
+        """
+        now = now or datetime.now()
+        with self._mutation():
+            next_due = self.data.schedule.next_due()
+            if next_due is None or next_due > now:
+                return []
+            created, events = [], []
+            for template in self.data.schedule.pop_due(now):
+                moments, next_at = schedule.occurrences(template, now)
+                for moment in moments:
+                    task_id = schedule.occurrence_id(template.id, moment)
+                    if task_id in self.data.tasks:
+                        continue
+                    task = Task(
+                        id=task_id,
+                        title=template.title,
+                        description=template.description,
+                        category=template.category,
+                        xp_reward=XP_REWARDS[template.category],
+                        created_at=moment.isoformat()
+                    )
+                    self.data.tasks.add(task)
+                    self.data.aggregates.task_added(task)
+                    self.data.search.task_added(task)
+                    events.append((persistence.CREATE_TASK, task.to_dict()))
+                    created.append(task)
+                if next_at is None:
+                    self.data.schedule.remove(template.id)
+                    events.append((persistence.DELETE_TEMPLATE, {'id': template.id}))
+                else:
+                    advanced = template.advanced(next_at.isoformat())
+                    self.data.schedule.add(advanced)
+                    events.append((persistence.SAVE_TEMPLATE, advanced.to_dict()))
+            self.save_many(events)
+        return created
+
+    @metrics.timed()
+    def complete_task(self, task_id: str, idempotency_key: str = None, expected_version: int = None):
+        """Complete a task and create achievement if boss fight"""
+        completed, _ = self.complete_tasks([task_id], idempotency_key, expected_version)
+        return True if completed else None
+
+    @metrics.timed()
+    def complete_tasks(self, task_ids, idempotency_key: str = None, expected_version: int = None):
+        """Complete a batch of tasks in one pass; returns (completed tasks, new achievements)
+
+        Boss fight icons are classified together, and every completion is
+        persisted in a single append_many transaction. Tasks that are already
+        gone are skipped, so completing one twice has no further effect. XP
+        is awarded by the leveling rules for the streak standing before the
+        batch.
+        """
+        now = datetime.now()
+        completed_at = now.isoformat()
+        with self._mutation():
+            if idempotency_key:
+                replay = self.data.recall(('complete', idempotency_key))
+                if replay is not None:
+                    return replay
+            self._check_version(expected_version)
+            rules, streak = leveling(), self.data.rollups.current_streak(now.date())
+            completed = []
+            for task_id in task_ids:
+                task = self.data.tasks.remove(task_id)
+                if task:
+                    self.data.aggregates.task_removed(task)
+                    self.data.search.task_removed(task)
+                    completed.append(task)
+            xp = {task.id: rules.award(task.category, task.xp_reward, streak) for task in completed}
+
+            # Create achievements for boss fights
+            bosses = [task for task in completed if task.category == 'boss']
+            icons = icon_classifier().classify_many(task.title for task in bosses)
+            earned = {}
+            for task, icon in zip(bosses, icons):
+                achievement = Achievement(
+                    id=str(uuid.uuid4()),
+                    title=f"{task.title} Victor",
+                    description=f"Conquered: {task.description}",
+                    icon=icon,
+                    xp_earned=xp[task.id],
+                    completed_at=completed_at
+                )
+                self.data.achievements.add(achievement)
+                self.data.search.achievement_added(achievement)
+                earned[task.id] = achievement
+
+            if completed:
+                self.save_many((persistence.COMPLETE_TASK, {
+                    'id': task.id,
+                    'category': task.category,
+                    'xp': xp[task.id],
+                    'at': completed_at,
+                    'achievement': earned[task.id].to_dict() if task.id in earned else None,
+                }) for task in completed)
+            result = completed, list(earned.values())
+            if idempotency_key:
+                self.data.remember(('complete', idempotency_key), result)
+        return result
+
+    @metrics.timed()
+    def delete_task(self, task_id: str, expected_version: int = None):
+        """Delete a task"""
+        self.delete_tasks([task_id], expected_version)
+
+    @metrics.timed()
+    def delete_tasks(self, task_ids, expected_version: int = None):
+        """Delete a batch of tasks in one pass, persisted together; returns the deleted tasks"""
+        deleted_at = datetime.now().isoformat()
+        with self._mutation():
+            self._check_version(expected_version)
+            deleted = []
+            for task_id in task_ids:
+                task = self.data.tasks.remove(task_id)
+                if task:
+                    self.data.aggregates.task_removed(task)
+                    self.data.search.task_removed(task)
+                    deleted.append(task)
+            if deleted:
+                self.save_many((persistence.DELETE_TASK, {'id': task.id, 'category': task.category,
+                                                          'at': deleted_at}) for task in deleted)
+        return deleted
+
+    @metrics.timed()
+    def insert_tasks(self, tasks) -> list:
+        """Add a batch of already-built tasks (bulk import); returns the ones added
+
+        A task whose id is already stored is skipped, so importing the same
+        file twice adds nothing the second time.
+        """
+        with self._mutation():
+            added = []
+            for task in tasks:
+                if task.id in self.data.tasks:
+                    continue
+                self.data.tasks.add(task)
+                self.data.aggregates.task_added(task)
+                self.data.search.task_added(task)
+                added.append(task)
+            self.save_many((persistence.CREATE_TASK, task.to_dict()) for task in added)
+        return added
+
+    @metrics.timed()
+    def insert_achievements(self, achievements) -> list:
+        """Add a batch of already-built achievements (bulk import); returns the ones added
+
+        An achievement whose id is already stored is skipped, so its XP is
+        never credited twice.
+        """
+        with self._mutation():
+            added = []
+            for achievement in achievements:
+                if achievement.id in self.data.achievements:
+                    continue
+                self.data.achievements.add(achievement)
+                self.data.search.achievement_added(achievement)
+                added.append(achievement)
+            self.save_many((persistence.ADD_ACHIEVEMENT, a.to_dict()) for a in added)
+        return added
+
+    @metrics.timed()
+    def delete_achievement(self, achievement_id: str, expected_version: int = None):
+        """Delete an achievement; returns it (or None if there was none)"""
+        with self._mutation():
+            self._check_version(expected_version)
+            achievement = self.data.achievements.remove(achievement_id)
+            if achievement:
+                self.data.search.achievement_removed(achievement)
+                self.save_data(persistence.DELETE_ACHIEVEMENT, {'id': achievement_id,
+                                                                'at': datetime.now().isoformat()})
+        return achievement
@@ -0,0 +1,214 @@
+import heapq
+import itertools
+import uuid
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from quest_master.models import QuestTemplate, pack_id
+
+# Cron field ranges: minute, hour, day of month, month, day of week (0 and 7 are Sunday)
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day of month', 1, 31), ('month', 1, 12),
+               ('day of week', 0, 7))
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+DEFAULT_TIME = time(7, 0)
+
+# Occurrences missed by more than this while the app was down are skipped, and
+# no template catches up more than MAX_CATCH_UP of them at once
+CATCH_UP_WINDOW = timedelta(days=7)
+MAX_CATCH_UP = 50
+
+# Every expression that can fire at all fires within this many days (29 February
+# on a given weekday comes round within 28 years)
+_MAX_SEARCH_DAYS = 366 * 28
+
+# Namespace for task ids derived from a template and an occurrence time
+OCCURRENCE_NAMESPACE = uuid.UUID('6f1c2a5e-8a43-4d0b-9f57-3a6c1b2e9d40')
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> Tuple[int, ...]:
+    values = set()
+    for part in text.split(','):
+        spec, _, step = part.partition('/')
+        try:
+            if spec == '*':
+                start, stop = low, high
+            elif '-' in spec:
+                start, _, stop = spec.partition('-')
+                start, stop = int(start), int(stop)
+            else:
+                start = stop = int(spec)
+            step = int(step) if step else 1
+        except ValueError:
+            raise ValueError(f"Cron {name} field {part!r} is not a number, range or *") from None
+        if not (low <= start <= stop <= high) or step < 1:
+            raise ValueError(f"Cron {name} field {part!r} is outside {low}-{high}")
+        values.update(range(start, stop + 1, step))
+    return tuple(sorted(values))
+
+
+class Cron:
+    """A parsed five-field cron expression: minute hour day-of-month month day-of-week
+
+    Fields take ``*``, numbers, ``a-b`` ranges, comma lists and ``/step``. As
+    in cron, when both day fields are restricted a day matching either one
+    fires.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != len(CRON_FIELDS):
+            raise ValueError(f"A cron schedule has {len(CRON_FIELDS)} fields, got {expression!r}")
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, CRON_FIELDS)]
+        self.expression = ' '.join(fields)
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+        if self.next_after(datetime(2000, 1, 1)) is None:
+            raise ValueError(f"Cron schedule {expression!r} never fires")
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment: datetime) -> Optional[datetime]:
+        """First firing time strictly after ``moment`` (None if there is none)"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(_MAX_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    if day == start.date() and hour < start.hour:
+                        continue
+                    for minute in self.minutes:
+                        if day == start.date() and hour == start.hour and minute < start.minute:
+                            continue
+                        return datetime.combine(day, time(hour, minute))
+            day += timedelta(days=1)
+        return None
+
+
+@lru_cache(maxsize=256)
+def parse(expression: str) -> Cron:
+    """Parsed cron expression, cached since templates share a handful of schedules"""
+    return Cron(expression)
+
+
+def daily(at: time) -> str:
+    """Cron expression for every day at ``at``"""
+    return f"{at.minute} {at.hour} * * *"
+
+
+def weekly(at: time, weekdays: Iterable[int]) -> str:
+    """Cron expression for ``at`` on each of ``weekdays`` (0 is Monday)"""
+    days = sorted({(weekday + 1) % 7 for weekday in weekdays})
+    if not days:
+        raise ValueError("Pick at least one day of the week")
+    return f"{at.minute} {at.hour} * * {','.join(map(str, days))}"
+
+
+def describe(template: QuestTemplate) -> str:
+    """Human-readable schedule of a template"""
+    if not template.cron:
+        return "once"
+    minute, hour, day, month, weekday = template.cron.split()
+    if minute.isdigit() and hour.isdigit() and day == month == '*':
+        at = f"{int(hour):02d}:{int(minute):02d}"
+        if weekday == '*':
+            return f"every day at {at}"
+        if all(part.isdigit() for part in weekday.split(',')):
+            names = ', '.join(WEEKDAYS[(int(part) - 1) % 7] for part in weekday.split(','))
+            return f"every {names} at {at}"
+    return f"cron {template.cron}"
+
+
+def occurrence_id(template_id: str, moment: datetime) -> str:
+    """Task id of one occurrence of a template, the same however often it is derived"""
+    return str(uuid.uuid5(OCCURRENCE_NAMESPACE, f"{template_id}/{moment.isoformat()}"))
+
+
+def occurrences(template: QuestTemplate, now: datetime) -> Tuple[List[datetime], Optional[datetime]]:
+    """Due occurrences of a template up to ``now``, and when it is next due after that
+
+    The next time is None for a one-off quest, which is then finished.
+    Occurrences older than CATCH_UP_WINDOW are skipped, and at most
+    MAX_CATCH_UP of the most recent are returned.
+    """
+    first = datetime.fromisoformat(template.next_at)
+    if not template.cron:
+        return ([first] if first <= now else []), (None if first <= now else first)
+    cron = parse(template.cron)
+    moment: Optional[datetime] = first
+    oldest = now - CATCH_UP_WINDOW
+    if moment < oldest:
+        moment = cron.next_after(oldest - timedelta(minutes=1))
+    due: List[datetime] = []
+    while moment is not None and moment <= now:
+        due.append(moment)
+        if len(due) > MAX_CATCH_UP:
+            del due[0]
+        moment = cron.next_after(moment)
+    return due, moment
+
+
+class Scheduler:
+    """Quest templates in a min-heap ordered by when each is next due
+
+    Checking for due quests looks at the top of the heap only, so a rerun
+    with nothing due costs O(1) and one with k due templates O(k log n),
+    however many templates there are. Replaced and removed templates leave
+    stale heap entries behind that are skipped when they surface.
+    """
+
+    def __init__(self):
+        self.templates: Dict[object, QuestTemplate] = {}
+        self._heap: List[Tuple[datetime, int, object]] = []
+        self._order = itertools.count()     # tie-breaker, so keys are never compared
+
+    def add(self, template: QuestTemplate):
+        """Insert or replace a template"""
+        self.templates[template.key] = template
+        heapq.heappush(self._heap, (datetime.fromisoformat(template.next_at), next(self._order), template.key))
+
+    def remove(self, template_id: str) -> Optional[QuestTemplate]:
+        """Remove a template by id, returning it (or None if it was not scheduled)"""
+        return self.templates.pop(pack_id(template_id), None)
+
+    def _is_current(self, entry: Tuple[datetime, int, object]) -> bool:
+        template = self.templates.get(entry[2])
+        return template is not None and datetime.fromisoformat(template.next_at) == entry[0]
+
+    def next_due(self) -> Optional[datetime]:
+        """When the earliest template is due"""
+        heap = self._heap
+        while heap and not self._is_current(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: datetime) -> List[QuestTemplate]:
+        """Take the templates due by ``now`` off the heap; re-add them once advanced"""
+        due = {}
+        while True:
+            next_due = self.next_due()
+            if next_due is None or next_due > now:
+                return list(due.values())
+            _, _, key = heapq.heappop(self._heap)
+            # A template re-added unchanged has two current entries; take it once
+            due[key] = self.templates[key]
+
+    def ordered(self) -> List[QuestTemplate]:
+        """Templates, soonest first"""
+        return sorted(self.templates.values(), key=lambda template: template.next_at)
+
+    def __contains__(self, template_id: object) -> bool:
+        return pack_id(template_id) in self.templates
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
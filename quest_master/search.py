@@ -0,0 +1,347 @@
+import heapq
+import math
+import re
+import sys
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from itertools import islice, product
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Words too common to narrow a search; they are indexed but ignored in queries
+STOPWORDS = frozenset(('a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'into', 'of',
+                       'on', 'or', 'the', 'to', 'with'))
+
+# A title word counts this many times as much as a description word
+TITLE_WEIGHT = 3
+# Query words shorter than this only match whole words, so a single letter
+# doesn't expand to most of the vocabulary
+MIN_PREFIX = 3
+# Prefix matches score this fraction of a single whole-word match
+PREFIX_FACTOR = 0.5
+
+# Ranking scores each matching record one by one up to this many matches, and
+# beyond it walks combinations of equally scored sets, unless a query has more
+# combinations than this
+SCORE_EACH = 2000
+MAX_COMBINATIONS = 64
+
+# Category under which achievements are indexed, next to the task categories
+ACHIEVEMENT = 'achievement'
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words of a title, description or query"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def query_terms(query: str) -> List[str]:
+    """The distinct words of a query that narrow it, in order"""
+    return [term for term in dict.fromkeys(tokenize(query)) if term not in STOPWORDS]
+
+
+def storage_terms(terms: List[str]) -> List[str]:
+    """Query words as StorageBackend.search_achievements takes them, prefixes marked with ``*``"""
+    return [term + '*' if len(term) >= MIN_PREFIX else term for term in terms]
+
+
+def score_text(terms: List[str], title: str, description: str, idf: Callable[[str], float]) -> float:
+    """A record's score for query words, as SearchIndex ranks it, given each word's idf"""
+    weights = _weights(title, description)
+    total = 0.0
+    for term in terms:
+        best = weights[term] * idf(term) if term in weights else 0.0
+        if len(term) >= MIN_PREFIX:
+            for word in weights:
+                if word != term and word.startswith(term):
+                    best = max(best, PREFIX_FACTOR * idf(word))
+        total += best
+    return total
+
+
+class SearchHit(NamedTuple):
+    key: Hashable     # the record's packed id
+    category: str     # task category, or ACHIEVEMENT
+    score: float
+
+
+class SearchIndex:
+    """Incrementally maintained inverted index over task and achievement text
+
+    Each word maps its records, grouped by title-weighted term count, so one
+    word's matches split into a handful of equally scored sets. A sorted
+    vocabulary next to the postings turns prefix matching into a bisect plus a
+    short scan, and records are also filed by category and by day (then
+    category) so filters are unions of a few sets rather than per-record
+    checks. Matching and ranking stay set operations driven by the smallest
+    set, so broad queries don't cost a Python step per match. Records are
+    identified by their packed key; the index holds no record objects.
+
+    With ``index_achievements`` off, achievements are left out entirely, for
+    players whose achievements are searched in storage instead.
+    """
+
+    def __init__(self, index_achievements: bool = True):
+        self.index_achievements = index_achievements
+        self._postings: Dict[str, Dict[int, Set[Hashable]]] = {}
+        self._vocabulary: List[str] = []
+        self._docs: Dict[Hashable, Tuple[str, str]] = {}
+        self._by_category: Dict[str, Set[Hashable]] = {}
+        self._by_day: Dict[str, Dict[str, Set[Hashable]]] = {}
+        self._days: List[str] = []
+
+    @classmethod
+    def from_records(cls, tasks: Iterable[Any], achievements: Iterable[Any] = (),
+                     index_achievements: bool = True) -> 'SearchIndex':
+        """Index existing records from scratch"""
+        index = cls(index_achievements)
+        for task in tasks:
+            index.task_added(task)
+        if index_achievements:
+            for achievement in achievements:
+                index.achievement_added(achievement)
+        return index
+
+    def task_added(self, task: Any):
+        self._add(task.key, task.category, task.created_at[:10], task.title, task.description)
+
+    def task_removed(self, task: Any):
+        self._remove(task.key, task.title, task.description)
+
+    def achievement_added(self, achievement: Any):
+        if not self.index_achievements:
+            return
+        self._add(achievement.key, ACHIEVEMENT, achievement.completed_at[:10],
+                  achievement.title, achievement.description)
+
+    def achievement_removed(self, achievement: Any):
+        if not self.index_achievements:
+            return
+        self._remove(achievement.key, achievement.title, achievement.description)
+
+    def _add(self, key: Hashable, category: str, day: str, title: str, description: str):
+        if key in self._docs:
+            return
+        day = sys.intern(day)
+        self._docs[key] = (category, day)
+        self._by_category.setdefault(category, set()).add(key)
+        on_day = self._by_day.get(day)
+        if on_day is None:
+            on_day = self._by_day[day] = {}
+            insort(self._days, day)
+        on_day.setdefault(category, set()).add(key)
+        for token, weight in _weights(title, description).items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                insort(self._vocabulary, token)
+            posting.setdefault(weight, set()).add(key)
+
+    def _remove(self, key: Hashable, title: str, description: str):
+        meta = self._docs.pop(key, None)
+        if meta is None:
+            return
+        category, day = meta
+        _discard(self._by_category, category, key)
+        on_day = self._by_day[day]
+        if _discard(on_day, category, key) and not on_day:
+            del self._by_day[day]
+            del self._days[bisect_left(self._days, day)]
+        for token, weight in _weights(title, description).items():
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            if _discard(posting, weight, key) and not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def _expand(self, term: str) -> Tuple[Optional[str], List[str]]:
+        """The vocabulary word equal to a query word (if any) and those it prefixes"""
+        exact = term if term in self._postings else None
+        if len(term) < MIN_PREFIX:
+            return exact, []
+        prefixed = []
+        vocabulary = self._vocabulary
+        for i in range(bisect_right(vocabulary, term), len(vocabulary)):
+            word = vocabulary[i]
+            if not word.startswith(term):
+                break
+            prefixed.append(word)
+        return exact, prefixed
+
+    def document_frequency(self, word: str) -> int:
+        """Number of indexed records containing a word"""
+        posting = self._postings.get(word)
+        return 0 if posting is None else sum(map(len, posting.values()))
+
+    def _idf(self, word: str) -> float:
+        return math.log(1 + len(self._docs) / sum(map(len, self._postings[word].values())))
+
+    def _sources(self, exact: Optional[str], prefixed: List[str]) -> List[Tuple[float, List[Set[Hashable]]]]:
+        """Sets of records matching one query word, grouped by score, best first"""
+        sources: Dict[float, List[Set[Hashable]]] = {}
+        for word in prefixed:
+            sources.setdefault(PREFIX_FACTOR * self._idf(word), []).extend(self._postings[word].values())
+        if exact is not None:
+            idf = self._idf(exact)
+            for weight, keys in self._postings[exact].items():
+                sources.setdefault(weight * idf, []).append(keys)
+        return sorted(sources.items(), key=itemgetter(0), reverse=True)
+
+    def _days_between(self, since: Optional[str], until: Optional[str]) -> List[str]:
+        lo = 0 if since is None else bisect_left(self._days, since)
+        hi = len(self._days) if until is None else bisect_right(self._days, until)
+        return self._days[lo:hi]
+
+    def _slices(self, categories: Optional[Tuple[str, ...]], since: Optional[str],
+                until: Optional[str]) -> Optional[List[Set[Hashable]]]:
+        """Disjoint sets of keys passing the filters, or None when nothing is filtered"""
+        if since is None and until is None:
+            if categories is None:
+                return None
+            return [self._by_category[c] for c in categories if c in self._by_category]
+        slices = []
+        for day in self._days_between(since, until):
+            on_day = self._by_day[day]
+            if categories is None:
+                slices.extend(on_day.values())
+            else:
+                slices.extend(on_day[c] for c in categories if c in on_day)
+        return slices
+
+    def search(self, query: str, categories: Optional[Iterable[str]] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 50) -> Tuple[int, List[SearchHit]]:
+        """Rank records matching every query word (as a word or word prefix)
+
+        ``categories`` restricts results to those task categories and/or
+        ACHIEVEMENT, and ``since``/``until`` to an inclusive range of
+        ``YYYY-MM-DD`` days. Scores are title-weighted term counts scaled by
+        how rare each word is; equal scores come in no particular order. An
+        empty query lists every record passing the filters, newest first.
+        Returns the total match count and the best ``limit`` hits.
+        """
+        categories = tuple(dict.fromkeys(categories)) if categories else None
+        slices = self._slices(categories, since, until)
+        terms = query_terms(query)
+        if not terms:
+            total = len(self._docs) if slices is None else sum(map(len, slices))
+            return total, self._newest(categories, since, until, limit)
+
+        matches = []
+        for term in terms:
+            sources = self._sources(*self._expand(term))
+            if not sources:
+                return 0, []
+            matches.append(sources)
+        groups = [[keys for _, sets in sources for keys in sets] for sources in matches]
+        if slices is not None:
+            groups.append(slices)
+        candidates = _intersect(groups)
+        if not candidates:
+            return 0, []
+        return len(candidates), self._rank(matches, candidates, limit)
+
+    def _rank(self, matches: List[List[Tuple[float, List[Set[Hashable]]]]],
+              candidates: Set[Hashable], limit: int) -> List[SearchHit]:
+        """Best ``limit`` candidates, taken from the best scoring tiers down"""
+        tiers = [_tiers(sources, candidates) for sources in matches]
+        if len(candidates) <= SCORE_EACH or math.prod(map(len, tiers)) > MAX_COMBINATIONS:
+            scores = dict.fromkeys(candidates, 0.0)
+            for term_tiers in tiers:
+                for score, keys in term_tiers:
+                    for key in keys:
+                        scores[key] += score
+            best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return [SearchHit(key, self._docs[key][0], score) for key, score in best]
+
+        # Each record sits in exactly one tier per query word, so the score of
+        # a combination of tiers is shared by every record in all of them
+        combinations = sorted(((sum(score for score, _ in combination), combination)
+                               for combination in product(*tiers)), key=itemgetter(0), reverse=True)
+        hits: List[SearchHit] = []
+        for score, combination in combinations:
+            keys = _intersect([[keys] for _, keys in combination])
+            for key in islice(keys, limit - len(hits)):
+                hits.append(SearchHit(key, self._docs[key][0], score))
+            if len(hits) == limit:
+                break
+        return hits
+
+    def _newest(self, categories: Optional[Tuple[str, ...]], since: Optional[str],
+                until: Optional[str], limit: int) -> List[SearchHit]:
+        """Filtered records, newest day first, without any text to rank by"""
+        hits: List[SearchHit] = []
+        for day in reversed(self._days_between(since, until)):
+            on_day = self._by_day[day]
+            for category in (on_day if categories is None else categories):
+                for key in islice(on_day.get(category, ()), limit - len(hits)):
+                    hits.append(SearchHit(key, category, 0.0))
+                if len(hits) == limit:
+                    return hits
+        return hits
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+
+def _weights(title: str, description: str) -> Counter:
+    """Title-weighted count of each word in a record"""
+    weights = Counter(tokenize(description))
+    for token in tokenize(title):
+        weights[token] += TITLE_WEIGHT
+    return weights
+
+
+def _intersect(groups: List[List[Set[Hashable]]]) -> Set[Hashable]:
+    """Keys found in some set of every group, driven by the smallest group
+
+    A group's sets are unioned only when it is the smallest; larger groups are
+    probed one set at a time. The result may be one of the given sets, so it
+    must not be modified.
+    """
+    groups = sorted(groups, key=lambda sets: sum(map(len, sets)))
+    first = groups[0]
+    result = first[0] if len(first) == 1 else set().union(*first)
+    for sets in groups[1:]:
+        if not result:
+            break
+        if len(sets) == 1:
+            # A subset test allocates nothing and stops at the first miss,
+            # so it is cheap either way and saves copying a shared match set
+            if not result <= sets[0]:
+                result = result & sets[0]
+        else:
+            result = set().union(*(result & keys for keys in sets))
+    return result
+
+
+def _tiers(sources: List[Tuple[float, List[Set[Hashable]]]],
+           candidates: Set[Hashable]) -> List[Tuple[float, Set[Hashable]]]:
+    """Split candidates by the best score one query word gives them, best first"""
+    if len(sources) == 1:
+        return [(sources[0][0], candidates)]
+    tiers = []
+    remaining = candidates
+    for score, sets in sources:
+        hit = set().union(*(remaining & keys for keys in sets))
+        if hit:
+            tiers.append((score, hit))
+            remaining = remaining - hit
+            if not remaining:
+                break
+    return tiers
+
+
+def _discard(groups: Dict[Any, Set[Hashable]], group: Any, key: Hashable) -> bool:
+    """Remove ``key`` from one group; return True if that emptied the group"""
+    members = groups.get(group)
+    if members is None:
+        return False
+    members.discard(key)
+    if members:
+        return False
+    del groups[group]
+    return True
@@ -0,0 +1,172 @@
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Any, Dict, Hashable
+
+from quest_master import persistence
+from quest_master.aggregates import Aggregates
+from quest_master.columnar import AchievementTable
+from quest_master.history import Rollups
+from quest_master.lazy import LazyAchievements
+from quest_master.models import Achievement, QuestTemplate, Task, pack_id
+from quest_master.schedule import Scheduler
+from quest_master.search import SearchIndex
+from quest_master.store import RecordStore
+
+# Index stores by each record's packed id rather than its 36-character string
+RECORD_KEYS = {'record_key': attrgetter('key'), 'id_key': pack_id}
+
+# Process-wide source of data versions, so a player evicted and loaded again
+# never reuses a version an earlier copy of its data already handed out
+_versions = itertools.count(1)
+
+# Results remembered per player for replayed idempotency keys
+IDEMPOTENCY_WINDOW = 1000
+
+_MISSING = object()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def columnar_achievements() -> bool:
+    """Whether QUEST_MASTER_COLUMNAR asks for column-oriented achievement storage"""
+    return _env_flag('QUEST_MASTER_COLUMNAR')
+
+
+def lazy_achievements() -> bool:
+    """Whether QUEST_MASTER_LAZY_ACHIEVEMENTS asks for achievements to be paged in from storage"""
+    return _env_flag('QUEST_MASTER_LAZY_ACHIEVEMENTS')
+
+
+class PlayerData:
+    """One player's tasks, achievements, schedule, stats, history rollups and search index, shared by all their sessions
+
+    ``lock`` guards every read and write of the stores so tabs rendering on
+    different script threads never observe a half-applied mutation. With
+    ``columnar`` set, achievements are kept in an AchievementTable instead.
+    ``version`` changes with every logged mutation. Once evicted from the
+    service the data is ``retired`` and must no longer be mutated; holders
+    attach to the reloaded copy instead.
+    """
+
+    def __init__(self, user_id: str, columnar: bool = False):
+        self.user_id = user_id
+        self.tasks = RecordStore(bucket_key=attrgetter('category'), **RECORD_KEYS)
+        self.achievements = AchievementTable() if columnar else RecordStore(newest_first=True, **RECORD_KEYS)
+        self.aggregates = Aggregates()
+        self.rollups = Rollups()
+        self.schedule = Scheduler()
+        self.search = SearchIndex()
+        self.lock = threading.RLock()
+        self.version = next(_versions)
+        self.retired = False
+        self._recent: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def recall(self, key: Hashable, default: Any = None) -> Any:
+        """Result remembered for an idempotency key (call with ``lock`` held)"""
+        result = self._recent.get(key, _MISSING)
+        if result is _MISSING:
+            return default
+        self._recent.move_to_end(key)
+        return result
+
+    def remember(self, key: Hashable, result: Any):
+        """Remember the result of a keyed mutation, forgetting the oldest beyond IDEMPOTENCY_WINDOW"""
+        self._recent[key] = result
+        while len(self._recent) > IDEMPOTENCY_WINDOW:
+            self._recent.popitem(last=False)
+
+    def touch(self):
+        """Give the data a new version after a mutation (call with ``lock`` held)"""
+        self.version = next(_versions)
+
+
+class DataService:
+    """Process-wide owner of all player data
+
+    Browser sessions no longer keep private copies in st.session_state; they
+    ask the service for the player they represent and get the single shared
+    PlayerData for that id. Players are loaded from storage on first use and
+    the least recently used ones are dropped (they are persisted, so they are
+    simply reloaded) once more than ``max_players`` are resident. An evicted
+    player is retired under its own lock before it can be loaded again, so a
+    mutation still running on the old copy is in storage by the time the new
+    one is read, and none can start on it afterwards.
+
+    With ``lazy_achievements`` set and a backend that can page them,
+    achievements stay in storage and each player gets a LazyAchievements view
+    instead of an in-memory store.
+    """
+
+    def __init__(self, backend: persistence.StorageBackend, max_players: int = 1000,
+                 columnar_achievements: bool = False, lazy_achievements: bool = False):
+        self.backend = backend
+        self.max_players = max_players
+        self.columnar_achievements = columnar_achievements
+        self.lazy_achievements = lazy_achievements and backend.pages_achievements
+        self._players: 'OrderedDict[str, PlayerData]' = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def player(self, user_id: str) -> PlayerData:
+        """Return the shared data for ``user_id``, loading it if needed"""
+        while True:
+            with self._lock:
+                data = self._players.get(user_id)
+                if data is not None:
+                    self._players.move_to_end(user_id)
+                    return data
+                # Per-player load lock: the first session loads, concurrent ones wait
+                loading = self._loading.setdefault(user_id, threading.Lock())
+            with loading:
+                with self._lock:
+                    if self._loading.get(user_id) is not loading:
+                        # Loaded (and maybe evicted again) while we waited; look again
+                        continue
+                data = self._load(user_id)
+                retiring = []
+                with self._lock:
+                    self._players[user_id] = data
+                    del self._loading[user_id]
+                    while len(self._players) > self.max_players:
+                        evicted_id, evicted = self._players.popitem(last=False)
+                        # Until it is retired, the evicted player's load lock is held
+                        gate = threading.Lock()
+                        gate.acquire()
+                        self._loading[evicted_id] = gate
+                        retiring.append((evicted, gate))
+            for evicted, gate in retiring:
+                with evicted.lock:
+                    evicted.retired = True
+                # The gate stays registered as the player's load lock; whoever loads them next removes it
+                gate.release()
+            return data
+
+    def _load(self, user_id: str) -> PlayerData:
+        data = PlayerData(user_id, self.columnar_achievements)
+        if self.lazy_achievements:
+            for record in self.backend.iter_records('tasks', user_id):
+                data.tasks.add(Task(**record))
+            data.achievements = LazyAchievements(self.backend, user_id)
+        else:
+            tasks, achievements = self.backend.load(user_id)
+            for record in tasks:
+                data.tasks.add(Task(**record))
+            for record in achievements:
+                data.achievements.add(Achievement(**record))
+        data.aggregates = Aggregates.from_records(data.tasks)
+        data.rollups = Rollups.from_rows(self.backend.load_rollups(user_id))
+        for record in self.backend.load_templates(user_id):
+            data.schedule.add(QuestTemplate(**record))
+        # A lazy view's achievements are searched in storage (lazy.search), not indexed here
+        data.search = SearchIndex.from_records(data.tasks, data.achievements,
+                                               index_achievements=not self.lazy_achievements)
+        return data
+
+    def resident_players(self) -> int:
+        """Number of players currently held in memory"""
+        return len(self._players)
@@ -0,0 +1,90 @@
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+
+class RecordStore:
+    """Insertion-ordered record collection with an id index and optional buckets
+
+    Records are indexed by ``record_key(record)`` (their ``id`` by default) and
+    looked up with ``id_key(record_id)``, so records that keep a packed form of
+    their id can be indexed by it without holding a second copy as a string.
+    When ``bucket_key`` is given, each record is also filed under
+    ``bucket_key(record)`` so a single category can be listed without scanning
+    the whole store. Plain dicts preserve insertion order, which keeps add, get
+    and remove O(1) while rendering stays stable. With ``newest_first``,
+    windows list the most recently added records first.
+    """
+
+    def __init__(self, records: Iterable[Any] = (), bucket_key: Optional[Callable[[Any], str]] = None,
+                 record_key: Callable[[Any], Hashable] = attrgetter('id'),
+                 id_key: Optional[Callable[[str], Hashable]] = None, newest_first: bool = False):
+        self._by_id: Dict[Hashable, Any] = {}
+        self._buckets: Dict[str, Dict[Hashable, Any]] = {}
+        self._bucket_key = bucket_key
+        self._record_key = record_key
+        self._id_key = id_key
+        self._newest_first = newest_first
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Any) -> Any:
+        """Insert or replace a record"""
+        key = self._record_key(record)
+        if key in self._by_id:
+            self._remove_key(key)
+        self._by_id[key] = record
+        if self._bucket_key is not None:
+            self._buckets.setdefault(self._bucket_key(record), {})[key] = record
+        return record
+
+    def get(self, record_id: str, default: Any = None) -> Any:
+        """Look up a record by id"""
+        return self._by_id.get(self._key(record_id), default)
+
+    def remove(self, record_id: str) -> Any:
+        """Remove a record by id, returning it (or None if it was not stored)"""
+        return self._remove_key(self._key(record_id))
+
+    def _key(self, record_id: str) -> Hashable:
+        return record_id if self._id_key is None else self._id_key(record_id)
+
+    def _remove_key(self, key: Hashable) -> Any:
+        record = self._by_id.pop(key, None)
+        if record is not None and self._bucket_key is not None:
+            bucket = self._buckets.get(self._bucket_key(record))
+            if bucket is not None:
+                bucket.pop(key, None)
+        return record
+
+    def clear(self):
+        """Drop every record"""
+        self._by_id.clear()
+        self._buckets.clear()
+
+    def bucket(self, name: str) -> Iterable[Any]:
+        """Records filed under ``name``, in insertion order"""
+        return self._buckets.get(name, {}).values()
+
+    def window(self, start: int, stop: int, bucket: Optional[str] = None) -> List[Any]:
+        """Records ``start:stop`` (of ``bucket`` if given), without touching the rest"""
+        records = self._by_id.values() if bucket is None else self.bucket(bucket)
+        if self._newest_first:
+            records = reversed(records)
+        return list(islice(records, start, stop))
+
+    def count(self, name: str) -> int:
+        """Number of records filed under ``name``"""
+        return len(self._buckets.get(name, ()))
+
+    def __contains__(self, record_id: object) -> bool:
+        return self._key(record_id) in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._by_id.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._by_id)
@@ -0,0 +1,47 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+# Stylesheets live in the app's static/ directory, which Streamlit serves at
+# app/static/ when server.enableStaticServing is on
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+STATIC_URL = 'app/static'
+
+THEME_STYLESHEET = 'medieval.css'
+FONTS_STYLESHEET = 'fonts.css'
+
+# 'bundled' self-hosts the theme fonts from static/fonts (see fonts.css);
+# 'system' skips the web fonts entirely and lets the CSS font stacks fall back
+# to installed serif fonts
+FONT_MODES = ('bundled', 'system')
+DEFAULT_FONT_MODE = 'bundled'
+
+
+def font_mode() -> str:
+    """Font mode selected by the QUEST_MASTER_FONTS environment variable"""
+    mode = os.environ.get('QUEST_MASTER_FONTS', DEFAULT_FONT_MODE).strip().lower()
+    if mode not in FONT_MODES:
+        raise ValueError(f"QUEST_MASTER_FONTS must be one of {', '.join(FONT_MODES)}, got {mode!r}")
+    return mode
+
+
+@lru_cache(maxsize=None)
+def read_stylesheet(name: str) -> str:
+    """Read a stylesheet from static/ once per process"""
+    return (STATIC_DIR / name).read_text(encoding='utf-8')
+
+
+@lru_cache(maxsize=None)
+def theme_html(static_serving: bool, fonts: str = DEFAULT_FONT_MODE) -> str:
+    """The <style> block that loads the medieval theme
+
+    When the static directory is served, the stylesheets are referenced with
+    @import so the browser downloads them once and caches them; each rerun only
+    ships a few dozen bytes. Without static serving the theme is inlined, and
+    the bundled fonts are skipped since their files would not be reachable.
+    """
+    if static_serving:
+        sheets = [FONTS_STYLESHEET, THEME_STYLESHEET] if fonts == 'bundled' else [THEME_STYLESHEET]
+        imports = ''.join(f"@import url('{STATIC_URL}/{sheet}');" for sheet in sheets)
+        return f"<style>{imports}</style>"
+    return f"<style>{read_stylesheet(THEME_STYLESHEET)}</style>"
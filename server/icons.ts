@@ -0,0 +1,142 @@
+import fs from "fs";
+import path from "path";
+
+// Keyword -> icon rules shared with the Streamlit app (quest_master/icons.py)
+const DEFAULT_RULES_PATH = path.resolve(import.meta.dirname, "..", "shared", "icon-rules.json");
+
+interface IconRulesFile {
+  default?: string;
+  rules?: { icon: string; priority?: number; keywords: string[] }[];
+}
+
+interface IconRule {
+  keyword: string;
+  icon: string;
+  priority: number;
+  order: number;
+}
+
+function normalize(text: string): string {
+  return text.toLowerCase().split(/\s+/).filter(Boolean).join(" ");
+}
+
+function outranks(rule: IconRule, other: IconRule): boolean {
+  return rule.priority !== other.priority ? rule.priority > other.priority : rule.order < other.order;
+}
+
+function escapeRegExp(text: string): string {
+  return text.replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
+}
+
+type TrieNode = Map<string, TrieNode>;
+
+// Regex alternation of the keywords factored into a trie, longest match first
+function triePattern(keywords: Iterable<string>): string {
+  const root: TrieNode = new Map();
+  for (const keyword of keywords) {
+    let node = root;
+    for (const char of keyword) {
+      if (!node.has(char)) node.set(char, new Map());
+      node = node.get(char)!;
+    }
+    node.set("", new Map());
+  }
+
+  const build = (node: TrieNode): string => {
+    const branches = Array.from(node.entries())
+      .filter(([char]) => char !== "")
+      .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0))
+      .map(([char, child]) => escapeRegExp(char) + build(child));
+    if (branches.length === 0) return "";
+    const body = branches.length === 1 ? branches[0] : `(?:${branches.join("|")})`;
+    // Optional tails are greedy, so a longer keyword wins over its prefix
+    return node.has("") ? `(?:${body})?` : body;
+  };
+
+  return build(root);
+}
+
+/**
+ * Picks an achievement icon for boss fight titles from keyword rules.
+ *
+ * Mirrors quest_master/icons.py: keywords are compiled into one trie-shaped
+ * regex inside a lookahead, so a single scan finds the longest keyword at every
+ * position, and each keyword carries the best rule among its prefixes.
+ */
+export class IconClassifier {
+  private rules = new Map<string, IconRule>();
+  private best = new Map<string, IconRule>();
+  private pattern: RegExp | null = null;
+
+  constructor(rules: IconRule[], readonly defaultIcon: string) {
+    for (const rule of rules) {
+      const keyword = normalize(rule.keyword);
+      const current = this.rules.get(keyword);
+      if (keyword && (!current || outranks(rule, current))) {
+        this.rules.set(keyword, { ...rule, keyword });
+      }
+    }
+    this.rules.forEach((rule, keyword) => {
+      let best = rule;
+      for (let end = 1; end < keyword.length; end++) {
+        const prefix = this.rules.get(keyword.slice(0, end));
+        if (prefix && outranks(prefix, best)) best = prefix;
+      }
+      this.best.set(keyword, best);
+    });
+    if (this.rules.size > 0) {
+      this.pattern = new RegExp(`(?=(${triePattern(this.rules.keys())}))`, "g");
+    }
+  }
+
+  static fromConfig(config: IconRulesFile): IconClassifier {
+    const rules: IconRule[] = [];
+    (config.rules ?? []).forEach((entry, order) => {
+      for (const keyword of entry.keywords) {
+        rules.push({ keyword, icon: entry.icon, priority: entry.priority ?? 0, order });
+      }
+    });
+    return new IconClassifier(rules, config.default ?? "⚔️");
+  }
+
+  classify(title: string): string {
+    return this.classifyMany([title])[0];
+  }
+
+  // Icons for a batch of titles, found in a single scan of all of them
+  classifyMany(titles: string[]): string[] {
+    const icons = titles.map(() => this.defaultIcon);
+    if (!this.pattern || titles.length === 0) return icons;
+
+    const normalized = titles.map(normalize);
+    const starts: number[] = [];
+    let offset = 0;
+    for (const title of normalized) {
+      starts.push(offset);
+      offset += title.length + 1;
+    }
+    const best: (IconRule | undefined)[] = new Array(titles.length);
+    let i = 0;
+    for (const match of normalized.join("\0").matchAll(this.pattern)) {
+      while (i + 1 < starts.length && starts[i + 1] <= match.index!) i++;
+      const rule = this.best.get(match[1])!;
+      const current = best[i];
+      if (!current || outranks(rule, current)) best[i] = rule;
+    }
+    best.forEach((rule, index) => {
+      if (rule) icons[index] = rule.icon;
+    });
+    return icons;
+  }
+}
+
+let classifier: IconClassifier | undefined;
+
+// The process-wide classifier, read from QUEST_MASTER_ICON_RULES or the bundled rules file
+export function iconClassifier(): IconClassifier {
+  if (!classifier) {
+    const rulesPath = process.env.QUEST_MASTER_ICON_RULES || DEFAULT_RULES_PATH;
+    classifier = IconClassifier.fromConfig(JSON.parse(fs.readFileSync(rulesPath, "utf-8")));
+  }
+  return classifier;
+}
@@ -1,6 +1,7 @@
 import type { Express } from "express";
 import { createServer, type Server } from "http";
 import { storage } from "./storage";
+import { iconClassifier } from "./icons";
 import { insertTaskSchema, insertAchievementSchema } from "@shared/schema";
 import { z } from "zod";
 
@@ -43,7 +44,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         const achievementData = {
           title: `${task.title} Victor`,
           description: `Conquered: ${task.description}`,
-          icon: getIconForBossFight(task.title),
+          icon: iconClassifier().classify(task.title),
           xpEarned: task.xpReward
         };
         await storage.createAchievement(achievementData);
@@ -96,14 +97,3 @@ export async function registerRoutes(app: Express): Promise<Server> {
   const httpServer = createServer(app);
   return httpServer;
 }
-
-function getIconForBossFight(title: string): string {
-  const lowerTitle = title.toLowerCase();
-  if (lowerTitle.includes('dragon')) return '🐉';
-  if (lowerTitle.includes('titan') || lowerTitle.includes('frost')) return '🏔️';
-  if (lowerTitle.includes('lich') || lowerTitle.includes('arcane')) return '🔮';
-  if (lowerTitle.includes('demon') || lowerTitle.includes('fiend')) return '👹';
-  if (lowerTitle.includes('beast') || lowerTitle.includes('wolf')) return '🐺';
-  if (lowerTitle.includes('skeleton') || lowerTitle.includes('bone')) return '💀';
-  return '⚔️';
-}
@@ -0,0 +1,39 @@
+import pytest
+
+from quest_master import persistence
+from quest_master.quests import QuestMaster
+from quest_master.service import DataService
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'quests.db')
+
+
+@pytest.fixture
+def sqlite_backend(db_path):
+    backend = persistence.SQLiteBackend(db_path)
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def service():
+    return DataService(persistence.MemoryBackend())
+
+
+@pytest.fixture
+def quest_master(service):
+    return QuestMaster(service, 'hero')
+
+
+def task_data(task_id, category='quest', created_at='2026-01-05T09:00:00', title='Gather herbs'):
+    """Raw CREATE_TASK event data"""
+    return {'id': task_id, 'title': title, 'description': 'From the forest', 'category': category,
+            'xp_reward': 200, 'created_at': created_at}
+
+
+def achievement_data(achievement_id, completed_at='2026-01-05T09:00:00', xp_earned=500, title='Dragon Victor'):
+    """Raw ADD_ACHIEVEMENT event data"""
+    return {'id': achievement_id, 'title': title, 'description': 'Conquered: the dragon', 'icon': '🐉',
+            'xp_earned': xp_earned, 'completed_at': completed_at}
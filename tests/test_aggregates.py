@@ -0,0 +1,32 @@
+from conftest import task_data
+from quest_master.aggregates import Aggregates
+from quest_master.models import Task
+
+
+def task(task_id, category):
+    return Task(**task_data(task_id, category))
+
+
+def test_counts_follow_adds_and_removes():
+    aggregates = Aggregates.from_records([task('t1', 'boss'), task('t2', 'boss'), task('t3', 'quest')])
+    assert aggregates.count('boss') == 2
+    aggregates.task_removed(task('t3', 'quest'))
+    assert aggregates.count('quest') == 0
+    assert aggregates.category_counts == {'boss': 2}
+    aggregates.task_added(task('t4', 'training'))
+    assert aggregates == Aggregates({'boss': 2, 'training': 1})
+
+
+def test_removing_past_zero_stays_at_zero():
+    aggregates = Aggregates()
+    aggregates.task_removed(task('t1', 'boss'))
+    assert aggregates.count('boss') == 0
+
+
+def test_quest_master_keeps_them_current(quest_master):
+    tasks = [quest_master.create_task('Ride', 'Far', category) for category in ('boss', 'quest', 'quest')]
+    quest_master.complete_task(tasks[0].id)
+    quest_master.delete_task(tasks[1].id)
+    assert quest_master.aggregates.category_counts == {'quest': 1}
+    assert quest_master.aggregates == Aggregates.from_records(quest_master.tasks)
+    assert quest_master.check_aggregates()
@@ -0,0 +1,118 @@
+import pytest
+from starlette.testclient import TestClient
+
+from quest_master import api, persistence
+from quest_master.service import DataService
+
+TASK = {'title': 'Slay the dragon', 'description': 'Red one', 'category': 'boss'}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    service = DataService(persistence.MemoryBackend())
+    monkeypatch.setattr(api, 'get_data_service', lambda: service)
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_listing_is_revalidated_with_its_etag(client):
+    listed = client.get('/api/tasks')
+    assert listed.status_code == 200 and listed.json() == []
+    etag = listed.headers['etag']
+    assert etag.startswith('W/"')
+
+    unchanged = client.get('/api/tasks', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers['etag'] == etag
+
+    created = client.post('/api/tasks', json=TASK)
+    assert created.status_code == 201
+    assert created.json()['xpReward'] == 500
+    assert created.headers['etag'] != etag
+    changed = client.get('/api/tasks', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert [task['id'] for task in changed.json()] == [created.json()['id']]
+    assert changed.headers['etag'] == created.headers['etag']
+
+
+def test_if_match_is_a_compare_and_swap(client):
+    etag = client.get('/api/tasks').headers['etag']
+    task_id = client.post('/api/tasks', json=TASK, headers={'If-Match': etag}).json()['id']
+
+    stale = client.delete(f'/api/tasks/{task_id}', headers={'If-Match': etag})
+    assert stale.status_code == 412
+    assert [task['id'] for task in client.get('/api/tasks').json()] == [task_id]
+
+    current = stale.headers['etag']
+    assert client.delete(f'/api/tasks/{task_id}', headers={'If-Match': current}).status_code == 200
+    assert client.get('/api/tasks').json() == []
+
+
+@pytest.mark.parametrize('if_match', ['W/"elsewhere.1"', 'nonsense'])
+def test_foreign_etags_never_match(client, if_match):
+    assert client.post('/api/tasks', json=TASK, headers={'If-Match': if_match}).status_code == 412
+    assert client.post('/api/tasks', json=TASK, headers={'If-Match': '*'}).status_code == 201
+
+
+def test_idempotency_key_replays_the_first_result(client):
+    headers = {'Idempotency-Key': 'retry-1'}
+    first = client.post('/api/tasks', json=TASK, headers=headers).json()
+    assert client.post('/api/tasks', json=TASK, headers=headers).json() == first
+    assert len(client.get('/api/tasks').json()) == 1
+
+    completion = client.post('/api/tasks/complete', json={'ids': [first['id']]}, headers=headers).json()
+    assert len(completion['achievements']) == 1
+    assert client.post('/api/tasks/complete', json={'ids': [first['id']]}, headers=headers).json() == completion
+    assert len(client.get('/api/achievements').json()) == 1
+
+
+def test_batches(client):
+    created = client.post('/api/tasks/batch', json=[TASK, {**TASK, 'category': 'quest'}])
+    assert created.status_code == 201
+    ids = [task['id'] for task in created.json()]
+    assert client.post('/api/tasks/complete', json={'ids': ids[:1]}).json()['completed'] == ids[:1]
+    assert client.post('/api/tasks/delete', json={'ids': ids}).json() == {'deleted': ids[1:]}
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/tasks', {'title': ' ', 'description': 'Red one', 'category': 'boss'}),
+    ('/api/tasks', {**TASK, 'category': 'chores'}),
+    ('/api/tasks', ['not', 'an', 'object']),
+    ('/api/tasks/batch', [TASK, {}]),
+    ('/api/tasks/complete', {'ids': 'abc'}),
+    ('/api/tasks/delete', {'ids': ['x'] * (api.MAX_BATCH + 1)}),
+])
+def test_invalid_bodies(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400
+    assert response.json()['message']
+
+
+def test_invalid_task_lists_each_problem(client):
+    errors = client.post('/api/tasks/batch', json=[TASK, {'category': 'chores'}]).json()['errors']
+    assert errors == ['[1] title must be a non-empty string', '[1] description must be a non-empty string',
+                      "[1] category must be one of boss, quest, training, got 'chores'"]
+
+
+@pytest.mark.parametrize('method, path', [
+    ('post', '/api/tasks/missing/complete'),
+    ('delete', '/api/tasks/missing'),
+    ('delete', '/api/achievements/missing'),
+])
+def test_missing_records(client, method, path):
+    assert getattr(client, method)(path).status_code == 404
+
+
+def test_players_are_kept_apart(client):
+    client.post('/api/tasks', json=TASK, headers={'X-Quest-Player': 'alice'})
+    assert len(client.get('/api/tasks', headers={'X-Quest-Player': 'alice'}).json()) == 1
+    assert len(client.get('/api/tasks?player=alice').json()) == 1
+    assert client.get('/api/tasks', headers={'X-Quest-Player': 'bob'}).json() == []
+    assert client.get('/api/tasks').json() == []
+
+
+def test_large_listings_are_gzipped(client):
+    client.post('/api/tasks/batch', json=[TASK] * 20)
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert len(response.json()) == 20
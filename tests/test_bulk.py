@@ -0,0 +1,99 @@
+import io
+
+import pytest
+
+from conftest import achievement_data, task_data
+from quest_master import bulk, persistence
+from quest_master.models import Achievement, Task
+from quest_master.quests import QuestMaster
+from quest_master.service import DataService
+
+
+def rows(text, fmt='jsonl'):
+    return bulk.iter_rows(io.StringIO(text), fmt)
+
+
+def test_rows_are_validated_one_by_one():
+    inserted = []
+    report = bulk.import_rows(rows('{"title": "Ride", "description": "Far", "category": "quest"}\n'
+                                   'not json\n'
+                                   '{"title": "Nap", "description": "Long", "category": "chores"}\n'
+                                   '{"title": "Drill", "description": "Hard", "category": "training",'
+                                   ' "xp_reward": -5}\n'),
+                              Task, inserted.extend)
+    assert (report.imported, report.rejected) == (1, 3)
+    assert inserted[0].xp_reward == 200 and inserted[0].id
+    assert report.errors[1:] == ["row 3: unknown category 'chores'", 'row 4: xp_reward must not be negative']
+
+
+def test_csv_rows_fill_in_defaults():
+    text = 'title,description,xp_earned\nDragon Victor,Conquered: the dragon,500\n'
+    inserted = []
+    report = bulk.import_rows(rows(text, 'csv'), Achievement, inserted.extend)
+    assert report.imported == 1
+    assert inserted[0].icon and inserted[0].completed_at
+
+
+def test_exports_round_trip(quest_master):
+    quest_master.create_task('Ride', 'Far', 'quest')
+    exported = bulk.export_bytes(quest_master.snapshot('tasks'), Task, 'csv').decode('utf-8')
+    inserted = []
+    bulk.import_rows(rows(exported, 'csv'), Task, inserted.extend)
+    assert [task.to_dict() for task in inserted] == [task.to_dict() for task in quest_master.snapshot('tasks')]
+
+
+@pytest.mark.parametrize('filename, fmt', [('a.jsonl', 'jsonl'), ('a.JSON', 'jsonl'), ('a.csv', 'csv')])
+def test_format_for(filename, fmt):
+    assert bulk.format_for(filename) == fmt
+
+
+def test_format_for_rejects_other_files():
+    with pytest.raises(ValueError, match="Unsupported file type 'a.txt'"):
+        bulk.format_for('a.txt')
+
+
+def test_reimporting_achievements_credits_xp_once(quest_master):
+    # Regression: importing the same file twice added every record again,
+    # doubling the player's XP, Hall entries and search hits
+    text = ''.join(f'{{"id": "a{i}", "title": "Dragon Victor", "description": "Conquered", "xp_earned": 500,'
+                   f' "completed_at": "2026-01-0{i + 1}T09:00:00"}}\n' for i in range(3))
+    first = bulk.import_rows(rows(text), Achievement, quest_master.insert_achievements, batch_size=2)
+    xp = quest_master.rollups.total_xp
+    again = bulk.import_rows(rows(text), Achievement, quest_master.insert_achievements, batch_size=2)
+
+    assert (first.imported, first.rejected) == (3, 0)
+    assert (again.imported, again.rejected) == (0, 3)
+    assert again.errors == [f'row {i + 1}: id a{i} already exists' for i in range(3)]
+    assert xp == 1500
+    assert quest_master.rollups.total_xp == xp
+    assert len(quest_master.achievements) == 3
+    assert quest_master.search('dragon')[0] == 3
+    assert quest_master.check_aggregates()
+
+
+def test_reimporting_tasks_counts_them_once(quest_master):
+    text = ''.join(f'{{"id": "t{i}", "title": "Ride", "description": "Far", "category": "quest"}}\n'
+                   for i in range(3))
+    bulk.import_rows(rows(text), Task, quest_master.insert_tasks)
+    report = bulk.import_rows(rows(text + '{"id": "t9", "title": "Ride", "description": "Far",'
+                                          ' "category": "quest"}\n'), Task, quest_master.insert_tasks)
+    assert (report.imported, report.rejected) == (1, 3)
+    assert quest_master.aggregates.count('quest') == 4
+    assert quest_master.search('ride')[0] == 4
+    assert quest_master.check_aggregates()
+
+
+def test_backend_inserter_skips_stored_and_repeated_ids(sqlite_backend):
+    sqlite_backend.append(persistence.ADD_ACHIEVEMENT, achievement_data('a0'), 'hero')
+    text = ''.join(f'{{"id": "{achievement_id}", "title": "Dragon Victor", "description": "Conquered",'
+                   f' "xp_earned": 500}}\n' for achievement_id in ('a0', 'a1', 'a1', 'a2'))
+    report = bulk.import_rows(rows(text), Achievement, bulk.backend_inserter(sqlite_backend, Achievement, 'hero'))
+    assert (report.imported, report.rejected) == (2, 2)
+    assert sorted(a['id'] for a in sqlite_backend.load('hero')[1]) == ['a0', 'a1', 'a2']
+    assert QuestMaster(DataService(sqlite_backend), 'hero').rollups.total_xp == 1500
+
+
+def test_backend_inserter_tasks(sqlite_backend):
+    sqlite_backend.append(persistence.CREATE_TASK, task_data('t0'), 'hero')
+    insert = bulk.backend_inserter(sqlite_backend, Task, 'hero')
+    assert [task.id for task in insert([Task(**task_data(task_id)) for task_id in ('t0', 't1')])] == ['t1']
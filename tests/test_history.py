@@ -0,0 +1,79 @@
+from datetime import date
+
+from conftest import achievement_data, task_data
+from quest_master import persistence
+from quest_master.history import DayTotals, Rollups
+from quest_master.quests import QuestMaster
+from quest_master.service import DataService
+
+
+def completion(day, xp=100, category='training'):
+    return persistence.history_entry(persistence.COMPLETE_TASK, {
+        'id': 't', 'category': category, 'xp': xp, 'at': f'{day}T09:00:00'})
+
+
+def rollups(*days):
+    result = Rollups()
+    for day in days:
+        result.apply(completion(day))
+    return result
+
+
+def test_events_fold_into_daily_totals():
+    result = Rollups()
+    created = task_data('t1', created_at='2026-03-02T08:00:00')
+    result.apply(persistence.history_entry(persistence.CREATE_TASK, created))
+    result.apply(completion('2026-03-02', 200, 'quest'))
+    result.apply(persistence.history_entry(persistence.DELETE_TASK, {'id': 't2', 'category': 'quest',
+                                                                      'at': '2026-03-02T10:00:00'}))
+    result.apply(persistence.history_entry(persistence.ADD_ACHIEVEMENT, achievement_data(
+        'a1', '2026-03-03T09:00:00', xp_earned=500)))
+    assert result.days['2026-03-02'] == {'quest': DayTotals(created=1, completed=1, deleted=1, xp=200)}
+    assert result.days['2026-03-03'] == {persistence.ACHIEVEMENT: DayTotals(created=1, xp=500)}
+    assert result.total_xp == 700
+    assert result.completions == {'quest': 1}
+
+
+def test_deleting_an_achievement_keeps_its_xp():
+    deleted = {'id': 'a1', 'at': '2026-03-03T09:00:00'}
+    assert persistence.history_entry(persistence.DELETE_ACHIEVEMENT, deleted).xp == 0
+
+
+def test_xp_by_day_and_week():
+    result = rollups('2026-03-01', '2026-03-02', '2026-03-02', '2026-03-08', '2026-03-09')
+    assert result.xp_by_day() == {'2026-03-01': 100, '2026-03-02': 200, '2026-03-08': 100, '2026-03-09': 100}
+    assert result.xp_by_day(since='2026-03-02') == {'2026-03-02': 200, '2026-03-08': 100, '2026-03-09': 100}
+    # Weeks start on Monday: the 1st and 8th are Sundays
+    assert result.xp_by_week() == {'2026-02-23': 100, '2026-03-02': 300, '2026-03-09': 100}
+
+
+def test_streaks():
+    result = rollups('2026-03-01', '2026-03-02', '2026-03-03', '2026-03-05', '2026-03-06')
+    assert result.streaks(date(2026, 3, 6)) == (2, 3)
+    # Today's quest may still be done
+    assert result.streaks(date(2026, 3, 7)) == (2, 3)
+    assert result.current_streak(date(2026, 3, 7)) == 2
+    assert result.streaks(date(2026, 3, 8)) == (0, 3)
+    assert result.current_streak(date(2026, 3, 8)) == 0
+    assert Rollups().streaks(date(2026, 3, 8)) == (0, 0)
+
+
+def test_stored_rows_rebuild_the_same_rollups(sqlite_backend):
+    quest_master = QuestMaster(DataService(sqlite_backend), 'hero')
+    quest_master.complete_task(quest_master.create_task('Slay the dragon', 'Red one', 'boss').id)
+    quest_master.delete_task(quest_master.create_task('Ride', 'Far', 'quest').id)
+    stored = Rollups.from_rows(sqlite_backend.load_rollups('hero'))
+    assert stored.days == quest_master.rollups.days
+    assert stored.total_xp == quest_master.rollups.total_xp > 0
+    assert sum(1 for _ in sqlite_backend.iter_history('hero')) == 4
+
+
+def test_check_aggregates_detects_xp_drift(sqlite_backend):
+    quest_master = QuestMaster(DataService(sqlite_backend), 'hero')
+    quest_master.complete_task(quest_master.create_task('Slay the dragon', 'Red one', 'boss').id)
+    earned = quest_master.rollups.total_xp
+    assert quest_master.check_aggregates()
+    quest_master.data.rollups.total_xp += 100
+    assert not quest_master.check_aggregates()
+    assert quest_master.rollups.total_xp == earned
+    assert quest_master.check_aggregates()
@@ -0,0 +1,44 @@
+from conftest import task_data
+from quest_master.html_cache import HTMLCache
+from quest_master.models import Task
+from quest_master.page import card_key, task_card_html
+
+
+def test_hits_misses_and_evictions():
+    cache = HTMLCache(maxsize=2)
+    renders = []
+
+    def render(name):
+        renders.append(name)
+        return f'<p>{name}</p>'
+
+    assert cache.get_or_render('a', lambda: render('a')) == '<p>a</p>'
+    assert cache.get_or_render('a', lambda: render('a')) == '<p>a</p>'
+    cache.get_or_render('b', lambda: render('b'))
+    cache.get_or_render('a', lambda: render('a'))
+    cache.get_or_render('c', lambda: render('c'))
+    assert renders == ['a', 'b', 'c']
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 3, 'evictions': 1}
+    # 'b' was the least recently used
+    cache.get_or_render('b', lambda: render('b'))
+    assert renders[-1] == 'b'
+
+
+def test_discard_and_clear():
+    cache = HTMLCache()
+    cache.get_or_render('a', lambda: 'x')
+    cache.discard('a')
+    cache.discard('missing')
+    assert cache.get_or_render('a', lambda: 'y') == 'y'
+    cache.clear()
+    assert cache.stats()['size'] == 0
+
+
+def test_players_reusing_an_id_get_their_own_cards():
+    # Regression: cards were keyed by record id alone, so one player's card
+    # was served for another player's record with the same id
+    cache = HTMLCache()
+    alice, bob = Task(**task_data('1', title='Alice quest')), Task(**task_data('1', title='Bob quest'))
+    assert 'Alice quest' in cache.get_or_render(card_key(alice), lambda: task_card_html(alice))
+    assert 'Bob quest' in cache.get_or_render(card_key(bob), lambda: task_card_html(bob))
+    assert card_key(Task(**task_data('1', title='Alice quest'))) == card_key(alice)
@@ -0,0 +1,96 @@
+import json
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from quest_master.icons import DEFAULT_RULES_PATH, IconClassifier, IconRule, load_classifier
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CONFIG = {
+    'default': '⚔️',
+    'rules': [
+        {'icon': '🐉', 'priority': 60, 'keywords': ['dragon']},
+        {'icon': '❄️', 'priority': 50, 'keywords': ['ice queen', 'frost']},
+        {'icon': '🏔️', 'priority': 50, 'keywords': ['titan', 'ice']},
+        {'icon': '🔮', 'priority': 40, 'keywords': ['arcane']},
+        {'icon': '✨', 'priority': 5, 'keywords': ['arc']},
+        {'icon': '💀', 'priority': 10, 'keywords': ['bone', 'bone dragon']},
+    ],
+}
+
+TITLES = ['Frost Dragon', 'The ICE   queen', 'Ice storm', 'Titan of frost', 'Arcane vault', 'Arcade night',
+          'Bone Dragon', 'Boneyard', 'Goblin camp', '', 'dragonfly', 'Frost titan', 'arc']
+
+
+@pytest.fixture
+def classifier():
+    return IconClassifier.from_config(CONFIG)
+
+
+@pytest.mark.parametrize('title, icon', [
+    ('Frost Dragon', '🐉'),       # highest priority wins
+    ('Titan of frost', '❄️'),     # equal priority: the rule listed first
+    ('The ICE   queen', '❄️'),    # multi-word keywords allow any whitespace
+    ('Ice storm', '🏔️'),
+    ('Arcane vault', '🔮'),       # the longer keyword outranks its prefix
+    ('Arcade night', '✨'),
+    ('Bone Dragon', '🐉'),
+    ('Goblin camp', '⚔️'),
+    ('', '⚔️'),
+])
+def test_classify(classifier, title, icon):
+    assert classifier.classify(title) == icon
+
+
+def test_prefix_keeps_a_higher_priority():
+    classifier = IconClassifier([IconRule('arc', '✨', 90, 0), IconRule('arcane', '🔮', 40, 1)], '⚔️')
+    assert classifier.classify('arcane') == '✨'
+
+
+def test_duplicate_keywords_keep_the_best_rule():
+    classifier = IconClassifier([IconRule('Wolf', '🐺', 10, 0), IconRule('wolf', '🐕', 20, 1)], '⚔️')
+    assert len(classifier) == 1
+    assert classifier.classify('WOLF pack') == '🐕'
+
+
+def test_batches_match_single_titles(classifier):
+    words = ['dragon', 'ice', 'queen', 'arc', 'arcane', 'bone', 'frost', 'goblin', 'titan', 'the', '']
+    rng = random.Random(7)
+    titles = TITLES + [' '.join(rng.choice(words) for _ in range(rng.randint(0, 5))) for _ in range(300)]
+    assert classifier.classify_many(titles) == [classifier.classify(title) for title in titles]
+    assert classifier.classify_many([]) == []
+
+
+def test_no_rules():
+    classifier = IconClassifier([], '⚔️')
+    assert classifier.classify('dragon') == '⚔️'
+    assert classifier.classify_many(['dragon']) == ['⚔️']
+
+
+def test_bundled_rules():
+    classifier = load_classifier(DEFAULT_RULES_PATH)
+    assert classifier.classify('Slay the Frost Dragon') == '🐉'
+    assert classifier.classify('Frost Titan') == '🏔️'
+
+
+TSX = shutil.which('tsx') or shutil.which('tsx', path=str(ROOT / 'node_modules' / '.bin'))
+
+
+@pytest.mark.skipif(TSX is None, reason="tsx is not installed (npm install)")
+def test_server_classifier_agrees(classifier, tmp_path):
+    script = tmp_path / 'classify.mts'
+    script.write_text(
+        "import fs from 'fs';\n"
+        f"import {{ IconClassifier }} from {json.dumps(str(ROOT / 'server' / 'icons.ts'))};\n"
+        "const { config, titles } = JSON.parse(fs.readFileSync(0, 'utf-8'));\n"
+        "const classifier = IconClassifier.fromConfig(config);\n"
+        "console.log(JSON.stringify([classifier.classifyMany(titles), titles.map((t: string) => "
+        "classifier.classify(t))]));\n", encoding='utf-8')
+    result = subprocess.run([TSX, str(script)], input=json.dumps({'config': CONFIG, 'titles': TITLES}),
+                            capture_output=True, text=True, check=True, cwd=ROOT)
+    expected = classifier.classify_many(TITLES)
+    assert json.loads(result.stdout) == [expected, expected]
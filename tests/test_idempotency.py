@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from quest_master import persistence
+from quest_master.quests import QuestMaster, VersionConflict
+from quest_master.service import IDEMPOTENCY_WINDOW, DataService
+
+
+def test_keyed_create_returns_the_first_task(quest_master):
+    first = quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k1')
+    again = quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k1')
+    assert again is first
+    assert len(quest_master.tasks) == 1
+    other = quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k2')
+    assert other.id != first.id
+
+
+def test_keyed_create_is_found_past_the_window(quest_master):
+    first = quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k1')
+    for i in range(IDEMPOTENCY_WINDOW + 1):
+        quest_master.data.remember(('other', i), None)
+    assert quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k1').id == first.id
+    assert len(quest_master.tasks) == 1
+
+
+def test_keys_are_per_player(service):
+    alice, bob = QuestMaster(service, 'alice'), QuestMaster(service, 'bob')
+    assert alice.create_task('Ride', 'Far', 'quest', idempotency_key='k').id != \
+        bob.create_task('Ride', 'Far', 'quest', idempotency_key='k').id
+
+
+def test_keyed_batch_create(quest_master):
+    specs = [('Ride', 'Far', 'quest'), ('Drill', 'Hard', 'training')]
+    first = quest_master.create_tasks(specs, idempotency_key='batch')
+    assert quest_master.create_tasks(specs, idempotency_key='batch') == first
+    assert len(quest_master.tasks) == 2
+
+
+def test_keyed_completion_awards_once(quest_master):
+    task = quest_master.create_task('Slay the dragon', 'Red one', 'boss')
+    completed, achievements = quest_master.complete_tasks([task.id], idempotency_key='c1')
+    xp = quest_master.rollups.total_xp
+    assert quest_master.complete_tasks([task.id], idempotency_key='c1') == (completed, achievements)
+    assert quest_master.rollups.total_xp == xp
+    assert len(quest_master.achievements) == 1
+
+
+def test_keyed_schedule_replay(quest_master):
+    first = quest_master.schedule_task('Morning drill', 'Swordplay', 'training', cron='0 7 * * *',
+                                       idempotency_key='s1')
+    assert quest_master.schedule_task('Morning drill', 'Swordplay', 'training', cron='0 7 * * *',
+                                      idempotency_key='s1') is first
+    assert len(quest_master.data.schedule) == 1
+
+
+def test_completion_race_mints_one_achievement(service):
+    task = QuestMaster(service, 'hero').create_task('Slay the dragon', 'Red one', 'boss')
+    barrier = threading.Barrier(8)
+    results = []
+
+    def complete():
+        quest_master = QuestMaster(service, 'hero')
+        barrier.wait()
+        results.append(quest_master.complete_tasks([task.id])[1])
+
+    threads = [threading.Thread(target=complete) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(len(achievements) for achievements in results) == 1
+    assert len(QuestMaster(service, 'hero').achievements) == 1
+
+
+def test_expected_version_is_a_compare_and_swap(quest_master):
+    version = quest_master.data.version
+    task = quest_master.create_task('Ride', 'Far', 'quest', expected_version=version)
+    with pytest.raises(VersionConflict) as conflict:
+        quest_master.delete_task(task.id, expected_version=version)
+    assert conflict.value.expected == version
+    assert conflict.value.actual == quest_master.data.version
+    assert task.id in quest_master.tasks
+    quest_master.delete_task(task.id, expected_version=quest_master.data.version)
+    assert task.id not in quest_master.tasks
+
+
+def test_keyed_replay_skips_the_version_check(quest_master):
+    version = quest_master.data.version
+    first = quest_master.create_task('Ride', 'Far', 'quest', idempotency_key='k', expected_version=version)
+    assert quest_master.create_task('Ride', 'Far', 'quest', idempotency_key='k', expected_version=version) is first
+
+
+def test_keyed_create_survives_a_restart(sqlite_backend):
+    first = QuestMaster(DataService(sqlite_backend), 'hero').create_task('Ride', 'Far', 'quest',
+                                                                          idempotency_key='k')
+    reloaded = QuestMaster(DataService(sqlite_backend), 'hero')
+    assert reloaded.create_task('Ride', 'Far', 'quest', idempotency_key='k').id == first.id
+    assert len(reloaded.tasks) == 1
+
+
+@pytest.mark.parametrize('restart', [False, True])
+def test_completed_keyed_create_is_not_recreated(db_path, restart):
+    # Regression: past the window or after a restart only open tasks were
+    # found by their derived id, so replaying a completed boss fight created
+    # it again and a second completion minted another achievement
+    backend = persistence.SQLiteBackend(db_path)
+    quest_master = QuestMaster(DataService(backend), 'hero')
+    first = quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k1')
+    batch = quest_master.create_tasks([('Ride', 'Far', 'quest'), ('Drill', 'Hard', 'training')],
+                                      idempotency_key='b1')
+    quest_master.complete_tasks([first.id, batch[0].id])
+    xp = quest_master.rollups.total_xp
+    if restart:
+        backend.close()
+        backend = persistence.SQLiteBackend(db_path)
+        quest_master = QuestMaster(DataService(backend), 'hero')
+    else:
+        quest_master.data._recent.clear()
+    try:
+        assert quest_master.create_task('Slay the dragon', 'Red one', 'boss', idempotency_key='k1') == first
+        assert quest_master.create_tasks([('Ride', 'Far', 'quest'), ('Drill', 'Hard', 'training')],
+                                         idempotency_key='b1') == batch
+        assert quest_master.complete_task(first.id) is None
+        assert [t.id for t in quest_master.tasks] == [batch[1].id]
+        assert len(quest_master.achievements) == 1
+        assert quest_master.rollups.total_xp == xp
+    finally:
+        backend.close()
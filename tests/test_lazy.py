@@ -0,0 +1,125 @@
+import pytest
+
+from conftest import achievement_data
+from quest_master import persistence
+from quest_master.lazy import LazyAchievements
+from quest_master.models import Achievement
+from quest_master.quests import QuestMaster
+from quest_master.service import DataService
+
+
+def stamp(i):
+    return f'2026-01-01T{i // 60:02d}:{i % 60:02d}:00'
+
+
+@pytest.fixture
+def backend(sqlite_backend):
+    sqlite_backend.append_many([(persistence.ADD_ACHIEVEMENT, achievement_data(f'a{i:03d}', stamp(i)))
+                                for i in range(100)], 'hero')
+    return sqlite_backend
+
+
+def ids(records):
+    return [record.id for record in records]
+
+
+def test_adds_and_removes_around_the_loaded_window(backend):
+    view = LazyAchievements(backend, 'hero')
+    assert len(view) == 100 and view.loaded() == 0
+    assert ids(view.window(0, 3)) == ['a099', 'a098', 'a097']
+    assert view.loaded() == view.page_size
+
+    # Newer than the loaded pages: shown at once
+    newest = Achievement(**achievement_data('newest', stamp(500)))
+    backend.append(persistence.ADD_ACHIEVEMENT, newest.to_dict(), 'hero')
+    view.add(newest)
+    assert view.window(0, 1) == [newest]
+    # Older than the loaded pages: only counted, and read from storage when asked for
+    oldest = Achievement(**achievement_data('oldest', '2025-12-31T00:00:00'))
+    backend.append(persistence.ADD_ACHIEVEMENT, oldest.to_dict(), 'hero')
+    view.add(oldest)
+    assert len(view) == 102 and view.loaded() == view.page_size
+    assert view.get('oldest') == oldest and 'oldest' in view
+
+    for record_id in ('a099', 'a000'):
+        assert view.remove(record_id).id == record_id
+        backend.append(persistence.DELETE_ACHIEVEMENT, {'id': record_id}, 'hero')
+    assert view.remove('a000') is None
+    assert len(view) == 100 and view.loaded() == view.page_size - 1
+
+    everything = view.window(0, 200)
+    assert ids(everything[:3]) == ['newest', 'a098', 'a097']
+    assert len(everything) == 100 and everything[-1] == oldest
+    # Scrolling back up keeps one page, not everything scrolled through
+    assert ids(view.window(0, 2)) == ['newest', 'a098']
+    assert view.loaded() == view.page_size
+    assert ids(view.window(98, 100)) == ['a001', 'oldest']
+
+
+def seed(quest_master):
+    for title, description, category in [
+            ('Slay the frost dragon', 'Cold and ancient', 'boss'),
+            ('Feed the dragon', 'A dragon dragon chore', 'quest'),
+            ('Sword drill', 'Practice near the dragon pit', 'training'),
+            ('Dragonfly hunt', 'Quick wings', 'boss'),
+            ('Frost walk', 'Brave the cold', 'training')]:
+        quest_master.create_task(title, description, category)
+    for task in list(quest_master.tasks):
+        if task.category == 'boss':
+            quest_master.complete_task(task.id)
+    quest_master.create_task('Dragon bones', 'Dig up the dragon', 'quest')
+
+
+@pytest.fixture
+def players(sqlite_backend):
+    seed(QuestMaster(DataService(sqlite_backend), 'hero'))
+    eager = QuestMaster(DataService(sqlite_backend), 'hero')
+    lazy = QuestMaster(DataService(sqlite_backend, lazy_achievements=True), 'hero')
+    return eager, lazy
+
+
+@pytest.mark.parametrize('query, options, ranked', [
+    ('dragon', {}, True),
+    ('dragon', {'categories': ['achievement']}, True),
+    ('dragon', {'categories': ['quest']}, True),
+    ('dragon', {'limit': 2}, True),
+    ('wyvern', {}, True),
+    # Every match scores the same, or falls on the same day
+    ('drag', {}, False),
+    ('frost', {}, False),
+    ('', {}, False),
+    ('', {'categories': ['achievement', 'training']}, False),
+])
+def test_lazy_achievements_are_searched_in_storage(players, query, options, ranked):
+    eager, lazy = players
+    assert isinstance(lazy.data.achievements, LazyAchievements)
+    # Only the tasks are indexed in memory
+    assert len(lazy.data.search) == len(lazy.tasks) == 4
+    total, records = lazy.search(query, **options)
+    expected_total, expected = eager.search(query, **options)
+    assert total == expected_total
+    if ranked:
+        assert ids(records) == ids(expected)
+    else:
+        assert sorted(ids(records)) == sorted(ids(expected))
+
+
+def test_lazy_search_follows_writes_and_restarts(db_path):
+    backend = persistence.SQLiteBackend(db_path)
+    quest_master = QuestMaster(DataService(backend, lazy_achievements=True), 'hero')
+    quest_master.complete_task(quest_master.create_task('Slay the wyvern', 'Up north', 'boss').id)
+    _, (badge,) = quest_master.complete_tasks([quest_master.create_task('Wyvern queen', 'Far north', 'boss').id])
+    assert [a.title for a in quest_master.search('wyvern')[1]] == ['Wyvern queen Victor', 'Slay the wyvern Victor']
+    assert quest_master.search('north', since='2999-01-01') == (0, [])
+    quest_master.delete_achievement(badge.id)
+    backend.close()
+
+    backend = persistence.SQLiteBackend(db_path)
+    try:
+        quest_master = QuestMaster(DataService(backend, lazy_achievements=True), 'hero')
+        total, records = quest_master.search('wyv')
+        assert total == 1 and [a.title for a in records] == ['Slay the wyvern Victor']
+        # Another player's achievements stay out of the results
+        assert QuestMaster(DataService(backend, lazy_achievements=True), 'rival').search('wyvern') == (0, [])
+    finally:
+        backend.close()
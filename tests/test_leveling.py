@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from quest_master import leveling
+from quest_master.leveling import Leveling, LevelProgress, thresholds
+from quest_master.page import task_card_html
+
+
+@pytest.mark.parametrize('curve, options, table', [
+    ('linear', {}, [0, 100, 200, 300]),
+    ('polynomial', {'exponent': 1.5}, [0, 100, 283, 520]),
+    ('exponential', {'growth': 2}, [0, 100, 300, 700]),
+    ('exponential', {'growth': 1}, [0, 100, 200, 300]),
+])
+def test_thresholds(curve, options, table):
+    assert thresholds(curve, 100, 4, **options) == table
+
+
+@pytest.mark.parametrize('args, message', [
+    (('cubic', 100, 4), "Leveling curve must be one of linear, polynomial, exponential, got 'cubic'"),
+    (('linear', 0, 4), "Leveling needs a positive base and max_level"),
+    (('polynomial', 100, 4, 0.0), "Leveling curve 'polynomial' must need more XP for every level"),
+])
+def test_invalid_curves(args, message):
+    with pytest.raises(ValueError, match=message):
+        thresholds(*args)
+
+
+def test_levels_and_progress():
+    rules = Leveling([0, 100, 300, 700], {})
+    assert [rules.level(xp) for xp in (0, 99, 100, 299, 300, 700, 10_000)] == [1, 1, 2, 2, 3, 4, 4]
+    assert rules.progress(150) == LevelProgress(2, 150, 100, 300)
+    assert rules.progress(150).to_next == 150 and rules.progress(150).fraction == 0.25
+    top = rules.progress(900)
+    assert top.level == rules.max_level == 4 and top.ceiling is None
+    assert top.to_next == 0 and top.fraction == 1.0
+
+
+def test_award_applies_multipliers_and_a_capped_streak_bonus():
+    rules = Leveling.from_config({'curve': 'linear', 'base': 100, 'max_level': 10,
+                                  'multipliers': {'boss': 1.5},
+                                  'streak_bonus': {'per_day': 0.05, 'max': 0.5}})
+    assert rules.award('quest', 200) == 200
+    assert rules.award('boss', 500) == 750
+    assert rules.award('quest', 200, streak=3) == 230
+    assert rules.award('boss', 500, streak=30) == 1125
+
+
+def test_configured_file_is_used(tmp_path, monkeypatch):
+    path = tmp_path / 'leveling.json'
+    path.write_text(json.dumps({'curve': 'linear', 'base': 10, 'max_level': 3}), encoding='utf-8')
+    monkeypatch.setenv('QUEST_MASTER_LEVELING', str(path))
+    assert leveling.leveling().thresholds == [0, 10, 20]
+    monkeypatch.delenv('QUEST_MASTER_LEVELING')
+    assert leveling.leveling() is leveling.load_leveling(leveling.DEFAULT_CONFIG_PATH)
+
+
+def test_completion_earns_the_awarded_xp(quest_master, monkeypatch):
+    rules = Leveling([0, 100], {'boss': 2.0})
+    monkeypatch.setattr('quest_master.quests.leveling', lambda: rules)
+    task = quest_master.create_task('Slay the dragon', 'Red one', 'boss')
+    # The card shows the task's reward before multipliers and streaks
+    assert 'Base reward: 500 XP' in task_card_html(task)
+    _, (achievement,) = quest_master.complete_tasks([task.id])
+    assert achievement.xp_earned == quest_master.rollups.total_xp == 1000
@@ -0,0 +1,215 @@
+import sqlite3
+
+import pytest
+
+from conftest import achievement_data, task_data
+from quest_master import persistence
+from quest_master.quests import QuestMaster
+from quest_master.service import DataService
+
+
+def history_count(backend, user_id):
+    return sum(1 for _ in backend.iter_history(user_id))
+
+
+def test_events_replay_before_and_after_compaction(sqlite_backend):
+    sqlite_backend.append_many([
+        (persistence.CREATE_TASK, task_data('t1')),
+        (persistence.CREATE_TASK, task_data('t2')),
+        (persistence.COMPLETE_TASK, {'id': 't1', 'category': 'quest', 'xp': 200,
+                                     'achievement': achievement_data('a1')}),
+        (persistence.DELETE_TASK, {'id': 't2', 'category': 'quest'}),
+        (persistence.CREATE_TASK, task_data('t3')),
+    ], 'hero')
+    replayed = sqlite_backend.load('hero')
+    sqlite_backend.compact()
+    assert sqlite_backend.load('hero') == replayed
+    assert [t['id'] for t in replayed[0]] == ['t3']
+    assert [a['id'] for a in replayed[1]] == ['a1']
+
+
+def test_compaction_keeps_players_with_the_same_ids_apart(sqlite_backend):
+    # Regression: snapshot rows were keyed by id alone, so one player's
+    # compaction replaced or deleted another player's rows
+    for user_id in ('alice', 'bob'):
+        sqlite_backend.append_many([(persistence.CREATE_TASK, task_data('shared', title=user_id)),
+                                    (persistence.ADD_ACHIEVEMENT, achievement_data('badge', title=user_id))],
+                                   user_id)
+    sqlite_backend.compact()
+    sqlite_backend.append_many([(persistence.DELETE_TASK, {'id': 'shared', 'category': 'quest'}),
+                                (persistence.DELETE_ACHIEVEMENT, {'id': 'badge'})], 'alice')
+    sqlite_backend.compact()
+    assert sqlite_backend.load('alice') == ([], [])
+    tasks, achievements = sqlite_backend.load('bob')
+    assert [t['title'] for t in tasks] == ['bob']
+    assert [a['title'] for a in achievements] == ['bob']
+
+
+def test_reads_lay_the_log_tail_over_the_snapshot(db_path):
+    backend = persistence.SQLiteBackend(db_path, compact_every=10_000)
+    try:
+        backend.append_many([(persistence.ADD_ACHIEVEMENT, achievement_data(f'a{i}', f'2026-01-{i + 1:02d}T00:00:00'))
+                             for i in range(10)], 'hero')
+        backend.compact()
+        backend.append_many([
+            (persistence.DELETE_ACHIEVEMENT, {'id': 'a9'}),
+            (persistence.ADD_ACHIEVEMENT, achievement_data('late', '2026-02-01T00:00:00')),
+            (persistence.COMPLETE_TASK, {'id': 't', 'category': 'boss', 'xp': 500,
+                                         'achievement': achievement_data('boss', '2026-01-05T12:00:00')}),
+            (persistence.DELETE_ACHIEVEMENT, {'id': 'a0'}),
+        ], 'hero')
+
+        def reads():
+            first = backend.page_achievements(4, None, 'hero')
+            rest = backend.page_achievements(100, (first[-1]['completed_at'], first[-1]['id']), 'hero')
+            return ([a['id'] for a in first + rest], backend.count_records('achievements', 'hero'),
+                    backend.get_achievement('a9', 'hero'), backend.get_achievement('boss', 'hero')['id'],
+                    sorted(a['id'] for a in backend.iter_records('achievements', 'hero')))
+
+        merged = reads()
+        assert backend._pending == 4, "reads compacted the log"
+        backend.compact()
+        assert reads() == merged
+        assert merged[0][:4] == ['late', 'a8', 'a7', 'a6']
+        assert merged[1] == 10
+        assert merged[2] is None
+    finally:
+        backend.close()
+
+
+def test_players_share_one_copy_of_their_data(service):
+    first, second = QuestMaster(service, 'alice'), QuestMaster(service, 'alice')
+    task = first.create_task('Ride', 'Far', 'quest')
+    assert second.tasks.get(task.id) is task
+    assert QuestMaster(service, 'bob').tasks.get(task.id) is None
+
+
+def test_evicted_players_are_reloaded(sqlite_backend):
+    service = DataService(sqlite_backend, max_players=1)
+    alice = QuestMaster(service, 'alice')
+    task = alice.create_task('Ride', 'Far', 'quest')
+    QuestMaster(service, 'bob').create_task('Drill', 'Hard', 'training')
+    assert service.resident_players() == 1
+    alice.complete_task(task.id)
+    assert QuestMaster(service, 'alice').tasks.get(task.id) is None
+
+
+def test_compaction_runs_every_n_events(db_path):
+    backend = persistence.SQLiteBackend(db_path, compact_every=3)
+    try:
+        backend.append_many([(persistence.CREATE_TASK, task_data(f't{i}')) for i in range(2)], 'hero')
+        assert backend._pending == 2
+        backend.append(persistence.CREATE_TASK, task_data('t2'), 'hero')
+        assert backend._pending == 0
+        assert len(backend.load('hero')[0]) == 3
+    finally:
+        backend.close()
+
+
+def test_data_survives_a_restart(db_path):
+    backend = persistence.SQLiteBackend(db_path)
+    quest_master = QuestMaster(DataService(backend), 'hero')
+    task = quest_master.create_task('Slay the dragon', 'Red one', 'boss')
+    quest_master.complete_task(quest_master.create_task('Ride', 'Far', 'quest').id)
+    backend.close()
+
+    backend = persistence.SQLiteBackend(db_path)
+    try:
+        reloaded = QuestMaster(DataService(backend), 'hero')
+        assert [t.id for t in reloaded.tasks] == [task.id]
+        assert reloaded.tasks.get(task.id) == task
+    finally:
+        backend.close()
+
+
+def test_memory_backend_keeps_nothing():
+    backend = persistence.MemoryBackend()
+    backend.append(persistence.CREATE_TASK, task_data('t1'), 'hero')
+    assert backend.load('hero') == ([], [])
+
+
+@pytest.mark.parametrize('path', [':memory:', 'quests.db'])
+def test_open_backend(tmp_path, monkeypatch, path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('QUEST_MASTER_DB', path)
+    backend = persistence.open_backend()
+    assert backend is persistence.open_backend()
+    assert isinstance(backend, persistence.MemoryBackend if path == ':memory:' else persistence.WriteBehindBackend)
+    backend.close()
+    persistence._open_backend.cache_clear()
+
+
+class TestWriteBehind:
+    def test_sync_writes_are_stored_on_return(self, sqlite_backend):
+        backend = persistence.WriteBehindBackend(sqlite_backend, persistence.SYNC)
+        backend.append(persistence.CREATE_TASK, task_data('t1'), 'hero')
+        assert backend.pending() == 0
+        assert [t['id'] for t in sqlite_backend.load('hero')[0]] == ['t1']
+        backend.close()
+
+    def test_batched_writes_are_visible_to_reads(self, sqlite_backend):
+        backend = persistence.WriteBehindBackend(sqlite_backend, persistence.INTERVAL, interval=60)
+        backend.append_many([(persistence.CREATE_TASK, task_data(f't{i}')) for i in range(5)], 'hero')
+        assert len(backend.load('hero')[0]) == 5
+        backend.close()
+
+    def test_failed_write_is_retried_once_stored(self, sqlite_backend, monkeypatch):
+        write = sqlite_backend.append_batch
+        attempts = []
+
+        def flaky(events):
+            attempts.append(len(events))
+            if len(attempts) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            write(events)
+
+        monkeypatch.setattr(sqlite_backend, 'append_batch', flaky)
+        monkeypatch.setattr(persistence.time, 'sleep', lambda seconds: None)
+        backend = persistence.WriteBehindBackend(sqlite_backend, persistence.SYNC)
+        backend.append(persistence.CREATE_TASK, task_data('t1'), 'hero')
+        backend.close()
+        assert attempts == [1, 1]
+        assert history_count(sqlite_backend, 'hero') == 1
+
+    def test_compaction_failure_does_not_write_twice(self, db_path, monkeypatch):
+        # Regression: compaction raising after the write committed made the
+        # worker re-queue the batch, storing its events a second time
+        sqlite_backend = persistence.SQLiteBackend(db_path, compact_every=2)
+        compact = sqlite_backend._compact_locked
+        failures = []
+
+        def failing_once():
+            if not failures:
+                failures.append(True)
+                raise sqlite3.OperationalError('disk I/O error')
+            compact()
+
+        monkeypatch.setattr(sqlite_backend, '_compact_locked', failing_once)
+        backend = persistence.WriteBehindBackend(sqlite_backend, persistence.SYNC)
+        backend.append_many([(persistence.CREATE_TASK, task_data('t1')),
+                             (persistence.CREATE_TASK, task_data('t2'))], 'hero')
+        assert failures and sqlite_backend._pending == 2
+        assert history_count(backend, 'hero') == 2
+        assert backend.load_rollups('hero') == [('2026-01-05', 'quest', 2, 0, 0, 0)]
+
+        backend.append(persistence.CREATE_TASK, task_data('t3'), 'hero')
+        assert sqlite_backend._pending == 0
+        assert [t['id'] for t in backend.load('hero')[0]] == ['t1', 't2', 't3']
+        backend.close()
+
+    def test_unknown_durability(self, sqlite_backend):
+        with pytest.raises(ValueError, match="durability must be one of sync, batched, interval, got 'nope'"):
+            persistence.WriteBehindBackend(sqlite_backend, 'nope')
+
+
+@pytest.mark.parametrize('mode', ['eager', 'columnar', 'lazy'])
+def test_hall_is_newest_first_in_every_mode(sqlite_backend, mode):
+    seed = QuestMaster(DataService(sqlite_backend), 'hero')
+    for title in ('First', 'Second', 'Third'):
+        seed.complete_task(seed.create_task(title, 'Boss', 'boss').id)
+    service = DataService(sqlite_backend, columnar_achievements=mode == 'columnar',
+                          lazy_achievements=mode == 'lazy')
+    quest_master = QuestMaster(service, 'hero')
+    assert [a.title for a in quest_master.achievement_window(2)] == ['Third Victor', 'Second Victor']
+    quest_master.complete_task(quest_master.create_task('Fourth', 'Boss', 'boss').id)
+    assert quest_master.achievement_window(1)[0].title == 'Fourth Victor'
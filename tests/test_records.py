@@ -0,0 +1,91 @@
+import pickle
+import uuid
+
+import pytest
+
+from conftest import achievement_data, task_data
+from quest_master.columnar import AchievementTable
+from quest_master.models import Achievement, Task, pack_id, pack_timestamp, unpack_id, unpack_timestamp
+
+
+def achievement(achievement_id, completed_at='2026-01-05T09:00:00'):
+    return Achievement(**achievement_data(achievement_id, completed_at))
+
+
+@pytest.mark.parametrize('value, packed_type', [
+    (str(uuid.uuid4()), bytes),
+    (str(uuid.uuid4()).upper(), str),
+    ('legacy-7', str),
+])
+def test_ids_pack_only_when_they_round_trip(value, packed_type):
+    packed = pack_id(value)
+    assert isinstance(packed, packed_type)
+    assert unpack_id(packed) == value
+
+
+@pytest.mark.parametrize('value, packed_type', [
+    ('2026-01-05T09:00:00.123456', int),
+    ('2026-01-05T09:00:00', int),
+    ('2026-01-05T09:00:00+02:00', str),
+    ('2026-01-05', str),
+    ('yesterday', str),
+])
+def test_timestamps_pack_only_when_they_round_trip(value, packed_type):
+    packed = pack_timestamp(value)
+    assert isinstance(packed, packed_type)
+    assert unpack_timestamp(packed) == value
+
+
+def test_records_round_trip_and_are_immutable():
+    task = Task(**task_data(str(uuid.uuid4())))
+    assert Task.from_dict(task.to_dict()) == task
+    assert pickle.loads(pickle.dumps(task)) == task
+    assert task._xp_reward is None and task.xp_reward == 200
+    assert Task(**{**task_data('t1'), 'xp_reward': 250}).xp_reward == 250
+    with pytest.raises(AttributeError):
+        task.title = 'Changed'
+    with pytest.raises(AttributeError):
+        task.extra = 1
+    assert not hasattr(task, '__dict__')
+
+
+def test_table_rows_round_trip():
+    records = [achievement(str(uuid.uuid4())), achievement('legacy-id', '2026-01-05T09:00:00+02:00'),
+               achievement(str(uuid.uuid4()), '2026-02-01T10:30:00.5')]
+    table = AchievementTable(records)
+    assert list(table) == records
+    assert [a.to_dict() for a in table] == [a.to_dict() for a in records]
+    assert table.get('legacy-id') == records[1]
+    assert table.window(0, 2) == [records[2], records[1]]
+    assert table.window(1, 10) == [records[1], records[0]]
+
+
+def test_table_replaces_and_removes():
+    table = AchievementTable([achievement('a1'), achievement('a2')])
+    assert 'a1' in table
+    table.add(Achievement(**achievement_data('a1', title='Renamed')))
+    assert len(table) == 2
+    assert table.get('a1').title == 'Renamed'
+    assert table.remove('a2').id == 'a2'
+    assert table.remove('a2') is None
+    assert [a.id for a in table] == ['a1']
+    assert table.window(0, 5) == [table.get('a1')]
+
+
+def test_table_sweeps_tombstones():
+    table = AchievementTable(achievement(f'a{i}') for i in range(3000))
+    for i in range(2000):
+        table.remove(f'a{i}')
+    # Swept once dead rows outnumbered the live ones (and 1024)
+    assert len(table._alive) < 3000
+    assert len(table) == 1000
+    assert [a.id for a in table.window(0, 2)] == ['a2999', 'a2998']
+    assert table.get('a2500').id == 'a2500'
+    assert 'a10' not in table
+
+
+def test_table_interns_icons():
+    # Built per row, as loading from storage does
+    icons = [bytes.fromhex('f09f9089').decode() for _ in range(3)]
+    table = AchievementTable(Achievement(**{**achievement_data(f'a{i}'), 'icon': icon}) for i, icon in enumerate(icons))
+    assert len({id(icon) for icon in table._icons}) == 1
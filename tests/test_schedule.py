@@ -0,0 +1,115 @@
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from quest_master import schedule
+from quest_master.models import QuestTemplate
+from quest_master.quests import QuestMaster
+from quest_master.service import DataService
+
+
+def template(next_at, cron='0 7 * * *', template_id='drill'):
+    return QuestTemplate(id=template_id, title='Morning drill', description='Swordplay', category='training',
+                         cron=cron, next_at=next_at.isoformat(), created_at='2026-01-01T00:00:00')
+
+
+def test_cron_fields_expand():
+    cron = schedule.parse('*/15 7-9 * * 1,3')
+    assert cron.minutes == (0, 15, 30, 45)
+    assert cron.hours == (7, 8, 9)
+    assert cron.weekdays == {1, 3}
+
+
+@pytest.mark.parametrize('expression, message', [
+    ('0 7 * *', 'has 5 fields'),
+    ('99 7 * * *', "minute field '99' is outside 0-59"),
+    ('0 x * * *', "hour field 'x' is not a number"),
+    ('0 0 31 2 *', 'never fires'),
+])
+def test_invalid_cron(expression, message):
+    with pytest.raises(ValueError, match=message):
+        schedule.Cron(expression)
+
+
+def test_next_after_is_strictly_later():
+    cron = schedule.parse('0 7 * * *')
+    assert cron.next_after(datetime(2026, 3, 2, 6, 59)) == datetime(2026, 3, 2, 7, 0)
+    assert cron.next_after(datetime(2026, 3, 2, 7, 0)) == datetime(2026, 3, 3, 7, 0)
+
+
+def test_restricted_day_fields_fire_on_either():
+    # The 1st of the month, or any Friday
+    cron = schedule.parse('0 12 1 * 5')
+    assert cron.next_after(datetime(2026, 3, 1, 13, 0)) == datetime(2026, 3, 6, 12, 0)
+    assert cron.next_after(datetime(2026, 3, 27, 13, 0)) == datetime(2026, 4, 1, 12, 0)
+
+
+def test_weekly_uses_monday_zero():
+    assert schedule.weekly(time(7, 30), [0, 2]) == '30 7 * * 1,3'
+    assert schedule.describe(template(datetime(2026, 1, 1), cron='30 7 * * 1,3')) == 'every Mon, Wed at 07:30'
+    with pytest.raises(ValueError):
+        schedule.weekly(time(7, 30), [])
+
+
+def test_occurrences_catch_up_within_window():
+    now = datetime(2026, 3, 20, 12, 0)
+    due, next_at = schedule.occurrences(template(datetime(2026, 3, 1, 7, 0)), now)
+    assert due[0] == datetime(2026, 3, 14, 7, 0)
+    assert due[-1] == datetime(2026, 3, 20, 7, 0)
+    assert len(due) == 7
+    assert next_at == datetime(2026, 3, 21, 7, 0)
+
+
+def test_occurrences_keep_the_most_recent():
+    now = datetime(2026, 3, 20, 12, 0)
+    due, _ = schedule.occurrences(template(now - timedelta(days=1), cron='* * * * *'), now)
+    assert len(due) == schedule.MAX_CATCH_UP
+    assert due[-1] == now
+
+
+def test_one_off_finishes():
+    now = datetime(2026, 3, 20, 12, 0)
+    assert schedule.occurrences(template(now - timedelta(hours=1), cron=''), now) == ([now - timedelta(hours=1)], None)
+    assert schedule.occurrences(template(now + timedelta(hours=1), cron=''), now) == ([], now + timedelta(hours=1))
+
+
+def test_scheduler_pops_due_in_order_and_skips_replaced():
+    scheduler = schedule.Scheduler()
+    scheduler.add(template(datetime(2026, 3, 3), template_id='late'))
+    scheduler.add(template(datetime(2026, 3, 1), template_id='early'))
+    scheduler.add(template(datetime(2026, 3, 2), template_id='moved'))
+    scheduler.add(template(datetime(2026, 3, 9), template_id='moved'))
+    assert scheduler.next_due() == datetime(2026, 3, 1)
+    assert [t.id for t in scheduler.pop_due(datetime(2026, 3, 5))] == ['early', 'late']
+    assert scheduler.next_due() == datetime(2026, 3, 9)
+    assert scheduler.remove('moved') is not None
+    assert scheduler.next_due() is None
+
+
+def test_materialize_due_creates_each_occurrence_once(quest_master):
+    drill = quest_master.schedule_task('Morning drill', 'Swordplay', 'training', cron='0 7 * * *')
+    first = datetime.fromisoformat(drill.next_at)
+    created = quest_master.materialize_due(first + timedelta(days=2))
+    assert [task.created_at for task in created] == [(first + timedelta(days=d)).isoformat() for d in range(3)]
+    assert quest_master.materialize_due(first + timedelta(days=2)) == []
+    assert quest_master.aggregates.count('training') == 3
+
+
+def test_materialize_due_survives_a_restart(sqlite_backend):
+    quest_master = QuestMaster(DataService(sqlite_backend), 'hero')
+    drill = quest_master.schedule_task('Morning drill', 'Swordplay', 'training', cron='0 7 * * *')
+    first = datetime.fromisoformat(drill.next_at)
+    quest_master.materialize_due(first + timedelta(days=1))
+
+    reloaded = QuestMaster(DataService(sqlite_backend), 'hero')
+    assert reloaded.materialize_due(first + timedelta(days=1)) == []
+    assert len(reloaded.tasks) == 2
+    assert len(reloaded.materialize_due(first + timedelta(days=2))) == 1
+
+
+def test_one_off_quest_is_unscheduled_once_due(quest_master):
+    due_at = datetime.now() + timedelta(hours=1)
+    quest_master.schedule_task('Festival', 'Dance', 'quest', due_at=due_at)
+    assert len(quest_master.data.schedule) == 1
+    assert len(quest_master.materialize_due(due_at)) == 1
+    assert len(quest_master.data.schedule) == 0
@@ -0,0 +1,112 @@
+import pytest
+
+from quest_master import search
+from quest_master.models import Achievement, Task
+from quest_master.search import ACHIEVEMENT, SearchIndex
+
+
+def task(task_id, title, description='', category='quest', day='2026-01-05'):
+    return Task(id=task_id, title=title, description=description, category=category, xp_reward=200,
+                created_at=f'{day}T09:00:00')
+
+
+def achievement(achievement_id, title, description='', day='2026-01-05'):
+    return Achievement(id=achievement_id, title=title, description=description, icon='🏆', xp_earned=500,
+                       completed_at=f'{day}T09:00:00')
+
+
+@pytest.fixture
+def index():
+    return SearchIndex.from_records([
+        task('t1', 'Slay the frost dragon', 'Cold and ancient', 'boss', '2026-01-01'),
+        task('t2', 'Feed the dragon', 'A dragon dragon chore', 'quest', '2026-01-02'),
+        task('t3', 'Sword drill', 'Practice near the dragon pit', 'training', '2026-01-03'),
+        task('t4', 'Frost walk', 'Brave the cold', 'training', '2026-01-04'),
+    ], [
+        achievement('a1', 'Slay the frost dragon Victor', 'Conquered: cold', '2026-01-02'),
+    ])
+
+
+def ids(hits):
+    return [hit.key for hit in hits]
+
+
+def key(record_id):
+    return task(record_id, 'x').key
+
+
+def test_title_words_outrank_description_words(index):
+    total, hits = index.search('dragon', categories=['boss', 'quest', 'training'])
+    assert total == 3
+    # Two description hits still lose to one title hit
+    assert ids(hits)[-1] == key('t3')
+    assert hits[0].score >= hits[1].score > hits[2].score
+
+
+def test_every_query_word_must_match(index):
+    total, hits = index.search('frost dragon')
+    assert total == 2
+    assert {hit.category for hit in hits} == {'boss', ACHIEVEMENT}
+    assert index.search('frost pit') == (0, [])
+
+
+def test_prefixes_match_from_three_letters(index):
+    assert index.search('dra')[0] == 4
+    assert index.search('dr') == (0, [])
+    # Stopwords are ignored, leaving an empty query that lists everything
+    assert index.search('the')[0] == 5
+
+
+def test_filters_by_category_and_day(index):
+    assert ids(index.search('dragon', categories=[ACHIEVEMENT])[1]) == [achievement('a1', 'x').key]
+    total, hits = index.search('', since='2026-01-02', until='2026-01-03')
+    assert total == 3
+    assert [hit.category for hit in hits][0] == 'training'
+    assert index.search('frost', categories=['training'], since='2026-01-04')[0] == 1
+    assert index.search('frost', categories=['quest']) == (0, [])
+
+
+def test_empty_query_lists_newest_first(index):
+    total, hits = index.search('', limit=2)
+    assert total == 5
+    assert ids(hits) == [key('t4'), key('t3')]
+
+
+def test_removed_records_leave_the_index(index):
+    index.task_removed(task('t2', 'Feed the dragon', 'A dragon dragon chore', 'quest', '2026-01-02'))
+    assert index.search('feed') == (0, [])
+    assert index.search('dragon')[0] == 3
+    assert index.search('', since='2026-01-02', until='2026-01-02')[0] == 1
+    assert len(index) == 4
+
+
+def test_readding_a_key_is_ignored(index):
+    index.task_added(task('t1', 'Completely different', '', 'boss', '2026-01-01'))
+    assert index.search('completely') == (0, [])
+
+
+@pytest.mark.parametrize('score_each, max_combinations', [(0, 1000), (10_000, 1000), (0, 1)])
+def test_ranking_paths_agree(index, monkeypatch, score_each, max_combinations):
+    expected = {query: index.search(query) for query in ('dragon', 'dra col', 'frost', 'slay dragon victor')}
+    monkeypatch.setattr(search, 'SCORE_EACH', score_each)
+    monkeypatch.setattr(search, 'MAX_COMBINATIONS', max_combinations)
+    for query, (total, hits) in expected.items():
+        got_total, got_hits = index.search(query)
+        assert got_total == total
+        assert sorted((hit.key, round(hit.score, 9)) for hit in got_hits) == \
+            sorted((hit.key, round(hit.score, 9)) for hit in hits)
+
+
+def test_limit_takes_the_best(index):
+    total, hits = index.search('dragon', limit=1)
+    assert total == 4
+    assert len(hits) == 1
+    assert hits[0].score == max(hit.score for hit in index.search('dragon')[1])
+
+
+def test_quest_master_search_returns_records(quest_master):
+    quest_master.create_task('Slay the frost dragon', 'Cold', 'boss')
+    quest_master.create_task('Feed the dragon', 'Chore', 'quest')
+    total, records = quest_master.search('frost dra')
+    assert total == 1
+    assert records[0].title == 'Slay the frost dragon'
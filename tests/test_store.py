@@ -0,0 +1,60 @@
+import uuid
+from operator import attrgetter
+
+from conftest import task_data
+from quest_master.models import Task, pack_id
+from quest_master.store import RecordStore
+
+
+def task(task_id, category='quest'):
+    return Task(**task_data(task_id, category))
+
+
+def test_add_get_remove():
+    store = RecordStore([task('t1'), task('t2')])
+    assert store.get('t1').id == 't1'
+    assert store.get('missing') is None
+    assert store.remove('t1').id == 't1'
+    assert store.remove('t1') is None
+    assert 't1' not in store and 't2' in store
+    assert len(store) == 1 and store
+
+
+def test_buckets_follow_adds_replacements_and_removes():
+    store = RecordStore(bucket_key=attrgetter('category'))
+    store.add(task('t1', 'boss'))
+    store.add(task('t2', 'quest'))
+    store.add(task('t1', 'training'))
+    assert [t.id for t in store.bucket('boss')] == []
+    assert [t.id for t in store.bucket('training')] == ['t1']
+    assert store.count('quest') == 1
+    store.remove('t2')
+    assert store.count('quest') == 0
+    assert list(store.bucket('nothing')) == []
+
+
+def test_replacing_keeps_one_copy_at_the_end():
+    store = RecordStore([task('t1'), task('t2')])
+    store.add(task('t1'))
+    assert [t.id for t in store] == ['t2', 't1']
+    assert len(store) == 2
+
+
+def test_windows():
+    store = RecordStore((task(f't{i}', 'boss' if i % 2 else 'quest') for i in range(6)),
+                        bucket_key=attrgetter('category'))
+    assert [t.id for t in store.window(1, 3)] == ['t1', 't2']
+    assert [t.id for t in store.window(0, 2, 'boss')] == ['t1', 't3']
+    assert store.window(10, 20) == []
+    newest = RecordStore((task(f't{i}') for i in range(4)), newest_first=True)
+    assert [t.id for t in newest.window(0, 2)] == ['t3', 't2']
+
+
+def test_packed_keys():
+    task_id = str(uuid.uuid4())
+    store = RecordStore([task(task_id), task('legacy-id')], record_key=attrgetter('key'), id_key=pack_id)
+    assert store.get(task_id).id == task_id
+    assert task_id in store and 'legacy-id' in store
+    assert store.remove(task_id).id == task_id
+    store.clear()
+    assert not store and list(store.bucket('quest')) == []
@@ -0,0 +1,32 @@
+import re
+
+import pytest
+
+from quest_master import theme
+
+
+def test_bundled_fonts_are_the_default(monkeypatch):
+    monkeypatch.delenv('QUEST_MASTER_FONTS', raising=False)
+    assert theme.font_mode() == 'bundled'
+    html = theme.theme_html(True, theme.font_mode())
+    assert html == "<style>@import url('app/static/fonts.css');@import url('app/static/medieval.css');</style>"
+    assert 'googleapis' not in html
+
+
+def test_every_bundled_font_file_is_shipped():
+    urls = re.findall(r"url\('([^']+)'\)", theme.read_stylesheet(theme.FONTS_STYLESHEET))
+    assert urls
+    for url in urls:
+        assert (theme.STATIC_DIR / url).is_file(), url
+
+
+def test_without_static_serving_the_theme_is_inlined():
+    html = theme.theme_html(False, 'bundled')
+    assert '@import' not in html
+    assert theme.read_stylesheet(theme.THEME_STYLESHEET) in html
+
+
+def test_unknown_font_mode(monkeypatch):
+    monkeypatch.setenv('QUEST_MASTER_FONTS', 'google')
+    with pytest.raises(ValueError, match="QUEST_MASTER_FONTS must be one of bundled, system, got 'google'"):
+        theme.font_mode()